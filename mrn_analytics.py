@@ -0,0 +1,305 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+
+#!/usr/bin/env python
+"""
+    Columnar accumulation of the MRN_TRNA and MRN_TRNA_DOC news analytics.
+
+    Each analytics score of a news (one per asset) becomes a row of typed, growable column arrays
+    (array.array): receive and news creation times, the news GUID and asset code as dictionary codes, the
+    relevance, sentiment class and probabilities, and the novelty and volume counts of every period. No
+    Python object is kept per row, a snapshot copies the columns into NumPy arrays or a pandas DataFrame,
+    so the aggregations over millions of rows are vectorized:
+
+        columns = TrnaColumns()
+        for story in subscribe('/tmp/mrn.sock', ['MRN_TRNA']):
+            columns.add(story.news)
+        frame = columns.to_dataframe()
+        frame.groupby('asset', observed=True)['sentiment_positive'].mean()
+
+    NumPy is required for the NumPy snapshots, pandas for the DataFrame snapshots only.
+"""
+
+import sys
+import math
+import time
+import getopt
+import logging
+import threading
+from array import array
+from datetime import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+NOVELTY_PERIODS = ('12H', '24H', '3D', '5D', '7D')
+
+# Column name and array typecode: d float64, b int8, i int32. The guid and asset columns hold the codes
+# of the guids and assets lists, the times are seconds since the epoch, NaN when the news has none
+COLUMNS = (
+    ('received', 'd'),
+    ('first_created', 'd'),
+    ('guid', 'i'),
+    ('asset', 'i'),
+    ('relevance', 'd'),
+    ('sentiment_class', 'b'),
+    ('sentiment_negative', 'd'),
+    ('sentiment_neutral', 'd'),
+    ('sentiment_positive', 'd'),
+    ('sentiment_word_count', 'i'),
+    ('first_mention_sentence', 'i'),
+) + tuple((f'novelty_{period.lower()}', 'i') for period in NOVELTY_PERIODS) \
+  + tuple((f'volume_{period.lower()}', 'i') for period in NOVELTY_PERIODS)
+
+log = logging.getLogger('mrn_analytics')
+
+
+def parse_timestamp(value):
+    """ Seconds since the epoch of an MRN timestamp like 2026-01-02T03:04:05.678Z, NaN if it is invalid """
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (ValueError, AttributeError):
+        return math.nan
+
+
+def score_asset(score):
+    """ The asset code of an analytics score: its RIC code, else its first asset code, else its PermID """
+    codes = score.get('assetCodes') or []
+    for code in codes:
+        if code.startswith('R:'):
+            return code
+    if codes:
+        return codes[0]
+    return 'P:' + str(score.get('assetId', ''))
+
+
+def _period_counts(counts):
+    """ The counts of NOVELTY_PERIODS of a noveltyCounts or volumeCounts list, 0 for a missing period """
+    by_period = {count.get('period'): count.get('count', 0) for count in counts or ()}
+    return [int(by_period.get(period, 0)) for period in NOVELTY_PERIODS]
+
+
+class TrnaColumns:
+    """
+        Growable columns of the analytics scores of the MRN_TRNA and MRN_TRNA_DOC news, safe to use from
+        several threads. The guid and asset columns are codes of the guids and assets lists.
+    """
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+        self.guids = []
+        self.assets = []
+        self._guid_codes = {}
+        self._asset_codes = {}
+        # Number of news added, and of news without valid analytics scores
+        self.news = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._appenders = [self.columns[name].append for name, _ in COLUMNS]
+
+    def __len__(self):
+        return len(self.columns['received'])
+
+    def add(self, news, received=None):
+        """ Add the analytics scores of a parsed MRN_TRNA or MRN_TRNA_DOC news, returns the number of rows added """
+        scores = news.get('analytics', {}).get('analyticsScores')
+        if not scores:
+            self.skipped += 1
+            return 0
+        news_item = news.get('newsItem', {})
+        metadata = news_item.get('metadata', {})
+        guid = metadata.get('guid') or news.get('id', '')
+        first_created = parse_timestamp(metadata.get('firstCreated'))
+        if received is None:
+            received = time.time()
+        # the rows are converted before the lock, a news with an invalid score adds no row
+        try:
+            rows = [[
+                float(score.get('relevance', math.nan)),
+                # -1 negative, 0 neutral, 1 positive
+                max(-1, min(1, int(score.get('sentimentClass', 0)))),
+                float(score.get('sentimentNegative', math.nan)),
+                float(score.get('sentimentNeutral', math.nan)),
+                float(score.get('sentimentPositive', math.nan)),
+                int(score.get('sentimentWordCount', 0)),
+                int(score.get('firstMentionSentence', 0)),
+                *_period_counts(score.get('noveltyCounts')),
+                *_period_counts(score.get('volumeCounts'))
+            ] for score in scores]
+        except (TypeError, ValueError, AttributeError) as e:
+            self.skipped += 1
+            log.warning('Invalid analytics scores of the news %s: %s', guid, e)
+            return 0
+        with self._lock:
+            # the MRN_TRNA and MRN_TRNA_DOC news of a story have the same guid
+            guid_code = self._guid_codes.get(guid)
+            if guid_code is None:
+                guid_code = self._guid_codes[guid] = len(self.guids)
+                self.guids.append(guid)
+            asset_codes = self._asset_codes
+            for score, row in zip(scores, rows):
+                asset = score_asset(score)
+                asset_code = asset_codes.get(asset)
+                if asset_code is None:
+                    asset_code = asset_codes[asset] = len(self.assets)
+                    self.assets.append(asset)
+                for append, value in zip(self._appenders, (received, first_created, guid_code, asset_code, *row)):
+                    append(value)
+            self.news += 1
+        return len(rows)
+
+    def add_story(self, story, received=None):
+        """ Add a Story of an MRN_TRNA or MRN_TRNA_DOC stream, returns the number of rows added """
+        if story.item not in ('MRN_TRNA', 'MRN_TRNA_DOC'):
+            return 0
+        return self.add(story.news, received)
+
+    def clear(self):
+        """ Remove all the rows, the asset codes are kept """
+        with self._lock:
+            for name, typecode in COLUMNS:
+                del self.columns[name][:]
+            self.guids = []
+            self._guid_codes = {}
+
+    def stats(self):
+        return {'news': self.news, 'skipped': self.skipped, 'rows': len(self), 'guids': len(self.guids),
+                'assets': len(self.assets), 'bytes': sum(column.itemsize * len(column) for column in self.columns.values())}
+
+    def to_numpy(self):
+        """
+            Snapshot of the columns as NumPy arrays by column name, the guid and asset columns are the codes,
+            the guids and assets entries are the NumPy string arrays they index
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for the columns snapshots')
+        with self._lock:
+            snapshot = {}
+            for name, column in self.columns.items():
+                # a copy of the column buffer, the column can grow again once the view is released
+                view = numpy.frombuffer(column, dtype=column.typecode) if column else \
+                    numpy.empty(0, dtype=column.typecode)
+                snapshot[name] = view.copy()
+                del view
+            snapshot['guids'] = numpy.array(self.guids, dtype=str)
+            snapshot['assets'] = numpy.array(self.assets, dtype=str)
+        return snapshot
+
+    def to_dataframe(self):
+        """ Snapshot of the columns as a pandas DataFrame, with categorical guid and asset columns and UTC times """
+        if pandas is None:
+            raise ImportError('pandas is required for the DataFrame snapshots')
+        snapshot = self.to_numpy()
+        guids = snapshot.pop('guids')
+        assets = snapshot.pop('assets')
+        snapshot['guid'] = pandas.Categorical.from_codes(snapshot['guid'], categories=pandas.Index(guids, dtype=object))
+        snapshot['asset'] = pandas.Categorical.from_codes(snapshot['asset'],
+                                                          categories=pandas.Index(assets, dtype=object))
+        for name in ('received', 'first_created'):
+            snapshot[name] = pandas.to_datetime(snapshot[name], unit='s', utc=True)
+        return pandas.DataFrame(snapshot)
+
+    def asset_summary(self, top=10):
+        """
+            The top assets by number of scores: (asset, scores, mean relevance, mean sentiment) tuples, the
+            sentiment of a score is its positive minus negative probability, weighted by its relevance
+        """
+        snapshot = self.to_numpy()
+        assets = snapshot['asset']
+        if not len(assets):
+            return []
+        counts = numpy.bincount(assets)
+        relevance = numpy.nan_to_num(snapshot['relevance'])
+        sentiment = numpy.nan_to_num(snapshot['sentiment_positive'] - snapshot['sentiment_negative'])
+        relevance_sums = numpy.bincount(assets, weights=relevance)
+        sentiment_sums = numpy.bincount(assets, weights=sentiment * relevance)
+        summary = []
+        for code in numpy.argsort(counts)[::-1][:top]:
+            summary.append((str(snapshot['assets'][code]), int(counts[code]), float(relevance_sums[code] / counts[code]),
+                            float(sentiment_sums[code] / relevance_sums[code]) if relevance_sums[code] else 0.0))
+        return summary
+
+
+def print_commandline_usage_and_exit(exit_code):
+    print('Usage: mrn_analytics.py --socket path [--output file.npz] [--top count] '
+          '[--log_level debug|info|warning|error] [--json auto|orjson|json] [--help]')
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    import mrn_codec
+    from mrn_fanout import subscribe
+    from mrn_logging import configure_logging, LOG_LEVELS
+
+    socket_path = ''
+    output_path = ''
+    top = 10
+    log_level = 'info'
+    json_codec = mrn_codec.DEFAULT_JSON_CODEC
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", ["help", "socket=", "output=", "top=", "log_level=", "json="])
+    except getopt.GetoptError:
+        print_commandline_usage_and_exit(2)
+    for opt, arg in opts:
+        if opt in "--help":
+            print_commandline_usage_and_exit(0)
+        elif opt in "--socket":
+            socket_path = arg
+        elif opt in "--output":
+            output_path = arg
+        elif opt in "--top":
+            top = int(arg)
+        elif opt in "--log_level":
+            if arg not in LOG_LEVELS:
+                print('The supported log levels are debug, info, warning or error only')
+                sys.exit(2)
+            log_level = arg
+        elif opt in "--json":
+            if arg not in mrn_codec.JSON_CODECS:
+                print('The supported JSON codecs are auto, orjson or json only')
+                sys.exit(2)
+            json_codec = arg
+
+    if not socket_path:
+        print_commandline_usage_and_exit(2)
+    if numpy is None:
+        print('NumPy is required, install it with pip install numpy')
+        sys.exit(2)
+    configure_logging(log_level)
+    try:
+        mrn_codec.use_codec(json_codec)
+    except ImportError as e:
+        print(f'{e}, use --json json or install it with pip install orjson')
+        sys.exit(2)
+
+    # The news analytics of the publisher are accumulated until it stops or Ctrl+C is pressed
+    trna_columns = TrnaColumns()
+    try:
+        for story in subscribe(socket_path, ['MRN_TRNA', 'MRN_TRNA_DOC']):
+            trna_columns.add_story(story)
+        log.info('The publisher closed the connection')
+    except OSError as e:
+        print(f'Cannot subscribe to {socket_path}: {e}')
+        sys.exit(2)
+    except KeyboardInterrupt:
+        pass
+    log.info('News analytics columns: %s', trna_columns.stats())
+    for asset, scores, relevance, sentiment in trna_columns.asset_summary(top):
+        log.info('%-16s %6d scores, mean relevance %.3f, mean sentiment %+.3f', asset, scores, relevance, sentiment)
+    if output_path:
+        numpy.savez_compressed(output_path, **trna_columns.to_numpy())
+        log.info('Saved the columns to %s', output_path)
@@ -0,0 +1,276 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+
+#!/usr/bin/env python
+"""
+    Append-only archive of the completed news, as received (gzip compressed FRAGMENT data).
+
+    The news are appended to segment files '<prefix>-<number>.seg'. Each segment starts with
+    SEGMENT_MAGIC and holds records of a RECORD_HEADER (received time, data length, GUID length,
+    item length), the GUID, the MRN item name and the compressed data. The GUID and time indexes are
+    kept in memory and rebuilt from the record headers when the archive is opened. Reads use mmap:
+    the compressed data of a news is returned as a memoryview of the segment, and it is decompressed
+    only when the news itself is read.
+"""
+
+import os
+import sys
+import zlib
+import mmap
+import struct
+import getopt
+import bisect
+import logging
+import threading
+from array import array
+from datetime import datetime
+
+SEGMENT_MAGIC = b'MRNARC1\n'
+# received time (epoch seconds), compressed data length, GUID length, MRN item length
+RECORD_HEADER = struct.Struct('<dIHB')
+
+DEFAULT_ARCHIVE_DIR = 'archive'
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+
+log = logging.getLogger('mrn_archive')
+
+
+class StoryArchive:
+    """
+        Append-only news archive, safe to use from several threads.
+
+        append() adds a news once per (MRN item, GUID), get() returns its compressed data without
+        copying it, read() its decompressed JSON data and stories() the news received in a time range.
+        The received times are kept non-decreasing, so the time index is searched with bisect.
+    """
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR, segment_bytes=DEFAULT_SEGMENT_BYTES, prefix='mrn'):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.prefix = prefix
+        # Number of news dropped because they were already archived
+        self.duplicates = 0
+        # Record number by (MRN item, GUID), then one array entry per record
+        self._records = {}
+        self._keys = []
+        self._segment_numbers = array('I')
+        self._offsets = array('Q')
+        self._lengths = array('I')
+        self._times = array('d')
+        self._maps = {}
+        self._file = None
+        self._segment = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self):
+        return len(self._times)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def append(self, item, guid, data, received=None):
+        """ Archive the compressed data of a completed news, returns False if it is already archived """
+        if received is None:
+            received = datetime.now().timestamp()
+        guid_bytes = guid.encode('utf-8')
+        item_bytes = item.encode('utf-8')
+        with self._lock:
+            key = (item, guid)
+            if key in self._records:
+                self.duplicates += 1
+                return False
+            if self._times and received < self._times[-1]:
+                received = self._times[-1]
+            record_size = RECORD_HEADER.size + len(guid_bytes) + len(item_bytes) + len(data)
+            if self._file is None or (self._size > len(SEGMENT_MAGIC) and self._size + record_size > self.segment_bytes):
+                self._open_segment(self._segment + 1)
+            self._file.write(RECORD_HEADER.pack(received, len(data), len(guid_bytes), len(item_bytes)) + guid_bytes + item_bytes)
+            self._file.write(data)
+            self._index(key, self._segment, self._size + record_size - len(data), len(data), received)
+            self._size += record_size
+            return True
+
+    def get(self, item, guid):
+        """ The compressed data of an archived news as a memoryview of its segment, None if it is not archived """
+        with self._lock:
+            record = self._records.get((item, guid))
+            return None if record is None else self._view(record)
+
+    def read(self, item, guid):
+        """ The decompressed JSON data of an archived news, None if it is not archived """
+        data = self.get(item, guid)
+        return None if data is None else zlib.decompress(data, zlib.MAX_WBITS | 32)
+
+    def stories(self, start=None, end=None):
+        """ (received, item, guid, compressed data) of the news received from start to end (epoch seconds) """
+        with self._lock:
+            first = 0 if start is None else bisect.bisect_left(self._times, start)
+            last = len(self._times) if end is None else bisect.bisect_right(self._times, end)
+            records = [(self._times[record], *self._keys[record], self._view(record)) for record in range(first, last)]
+        return records
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for segment_map in self._maps.values():
+                try:
+                    segment_map.close()
+                except BufferError:
+                    # a returned memoryview still uses it, it is closed when the view is released
+                    pass
+            self._maps.clear()
+
+    def stats(self):
+        return {
+            'news': len(self._times),
+            'segments': self._segment,
+            'bytes': sum(self._lengths),
+            'duplicates': self.duplicates
+        }
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'{self.prefix}-{segment:06d}.seg')
+
+    def _open_segment(self, segment):
+        if self._file is not None:
+            self._file.close()
+        self._segment = segment
+        self._file = open(self._segment_path(segment), 'ab')
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._file.write(SEGMENT_MAGIC)
+            self._size = len(SEGMENT_MAGIC)
+
+    def _index(self, key, segment, offset, length, received):
+        self._records[key] = len(self._times)
+        self._keys.append(key)
+        self._segment_numbers.append(segment)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+        self._times.append(received)
+
+    def _view(self, record):
+        segment = self._segment_numbers[record]
+        offset = self._offsets[record]
+        end = offset + self._lengths[record]
+        segment_map = self._maps.get(segment)
+        if segment_map is None or len(segment_map) < end:
+            # the current segment grew since it was mapped
+            if segment == self._segment and self._file is not None:
+                self._file.flush()
+            with open(self._segment_path(segment), 'rb') as segment_file:
+                segment_map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = segment_map
+        return memoryview(segment_map)[offset:end]
+
+    def _load(self):
+        """ Rebuild the indexes from the record headers of the existing segments """
+        segments = sorted(int(name[len(self.prefix) + 1:-4]) for name in os.listdir(self.directory)
+                          if name.startswith(self.prefix + '-') and name.endswith('.seg')
+                          and name[len(self.prefix) + 1:-4].isdigit())
+        for segment in segments:
+            path = self._segment_path(segment)
+            size = os.path.getsize(path)
+            with open(path, 'rb') as segment_file:
+                if segment_file.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+                    # the next news are appended to a new segment
+                    log.warning('Skipped %s, not an archive segment', path)
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    self._segment = segment
+                    continue
+                position = len(SEGMENT_MAGIC)
+                while position + RECORD_HEADER.size <= size:
+                    received, length, guid_length, item_length = RECORD_HEADER.unpack(segment_file.read(RECORD_HEADER.size))
+                    names = segment_file.read(guid_length + item_length)
+                    offset = position + RECORD_HEADER.size + guid_length + item_length
+                    if offset + length > size:
+                        break
+                    key = (names[guid_length:].decode('utf-8'), names[:guid_length].decode('utf-8'))
+                    self._index(key, segment, offset, length, received)
+                    position = offset + length
+                    segment_file.seek(position)
+            if position < size:
+                # a record cut by a crash, the next news are appended after the last complete one
+                log.warning('Truncated %d bytes of an incomplete record in %s', size - position, path)
+                os.truncate(path, position)
+            self._open_segment(segment)
+        log.info('Opened news archive %s: %s', self.directory, self.stats())
+
+
+def parse_time(value):
+    """ Epoch seconds or an ISO format local date and time """
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def print_commandline_usage_and_exit(exit_code):
+    print('Usage: mrn_archive.py [--archive_dir directory] [--ric ric] [--guid guid] [--from time] [--to time] [--help]')
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    archive_dir = DEFAULT_ARCHIVE_DIR
+    ric = 'MRN_STORY'
+    guid = ''
+    start = None
+    end = None
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", ["help", "archive_dir=", "ric=", "guid=", "from=", "to="])
+    except getopt.GetoptError:
+        print_commandline_usage_and_exit(2)
+    for opt, arg in opts:
+        if opt in "--help":
+            print_commandline_usage_and_exit(0)
+        elif opt in "--archive_dir":
+            archive_dir = arg
+        elif opt in "--ric":
+            ric = arg
+        elif opt in "--guid":
+            guid = arg
+        elif opt in ("--from", "--to"):
+            try:
+                if opt == "--from":
+                    start = parse_time(arg)
+                else:
+                    end = parse_time(arg)
+            except ValueError:
+                print('The time must be epoch seconds or an ISO format date and time')
+                sys.exit(2)
+
+    if not os.path.isdir(archive_dir):
+        print(f'{archive_dir} is not a news archive directory')
+        sys.exit(2)
+    sys.stdout.reconfigure(encoding='utf-8')
+    archive = StoryArchive(archive_dir)
+    if guid:
+        # The news JSON data of one GUID
+        news = archive.read(ric, guid)
+        if news is None:
+            print(f'{ric} news {guid} is not archived')
+            sys.exit(1)
+        print(news.decode('utf-8'))
+    else:
+        # One line per news received in the time range
+        for received, item, story_guid, data in archive.stories(start, end):
+            print(f'{datetime.fromtimestamp(received).isoformat()} {item} {story_guid} {len(data)}')
+        print(archive.stats())
+    archive.close()
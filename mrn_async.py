@@ -0,0 +1,594 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+
+#!/usr/bin/env python
+"""
+    asyncio implementation of the MRN console session: Login, MRN item requests, Ping/Pong and the
+    fragment assembly run as coroutines, several sessions share one event loop.
+
+        auth = AsyncAuth(auth_url, client_id, client_secret)
+        await auth.start()
+        async with AsyncMRNSession(host, 443, ['MRN_STORY'], auth=auth, ssl_context=make_ssl_context()) as session:
+            async for story in session.stories():
+                print(story.guid, story.news)
+
+    The authentication and service discovery requests run the requests library in the default executor,
+    the access token is renewed by a timer before it expires and reissued on the Login stream of the open
+    sessions.
+"""
+
+import os
+import sys
+import ssl
+import time
+import zlib
+import random
+import getopt
+import socket
+import asyncio
+import logging
+from datetime import datetime
+import requests
+from dotenv import load_dotenv
+import mrn_codec
+import mrn_wsproto as wsproto
+from mrn_logging import configure_logging, JsonDump, log_decoded_news, LOG_LEVELS, DEFAULT_LOG_LEVEL
+from mrn_reassembly import DEFAULT_ENVELOPE_TTL, DEFAULT_MAX_ENVELOPES, DEFAULT_MAX_ENVELOPE_BYTES, \
+    DECOMPRESS_MODES, DEFAULT_DECOMPRESS_MODE
+from mrn_streams import parse_items, mrn_domain
+from mrn_decoder import MRNDecoder, Story
+from mrn_dedup import GuidCache
+from mrn_filter import HeaderFilter
+
+# Global Default Variables
+app_id = '256'
+auth_url = 'https://api.refinitiv.com/auth/oauth2/v2/token'
+discovery_url = 'https://api.refinitiv.com/streaming/pricing/v1/'
+clientid = ''
+client_secret = ''
+hostName = ''
+port = 443
+position = ''
+region = 'ap-southeast-1'
+scope = 'trapi.streaming.pricing.read'
+service = 'ELEKTRON_DD'
+mrn_items = ['MRN_STORY']
+connections = 1
+envelope_ttl = DEFAULT_ENVELOPE_TTL
+max_envelopes = DEFAULT_MAX_ENVELOPES
+max_envelope_bytes = DEFAULT_MAX_ENVELOPE_BYTES
+decompress_mode = DEFAULT_DECOMPRESS_MODE
+log_level = DEFAULT_LOG_LEVEL
+json_codec = mrn_codec.DEFAULT_JSON_CODEC
+# Header filter of the news, None to output all the news
+news_filter = None
+
+# Jittered exponential backoff of the reconnections: a random delay up to
+# reconnect_delay * 2^attempt seconds, capped at reconnect_max_delay
+reconnect_delay = 0.1
+reconnect_max_delay = 30.0
+
+# Seconds before a new authentication or service discovery request after a server error
+HTTP_RETRY_DELAY = 5.0
+# Number of decoded stories a session keeps for a slow stories() consumer, the connection is not read when full
+DEFAULT_STORY_QUEUE_SIZE = 1000
+HTTP_TIMEOUT = 45
+
+log = logging.getLogger('mrn_async')
+
+
+class AuthenticationError(Exception):
+    """ Raised when the Delivery Platform refuses the authentication or service discovery request """
+
+
+# Keep-alive HTTP connections shared by the authentication and service discovery requests
+http_session = requests.Session()
+
+
+async def http_request(method, url, **kwargs):
+    """ http_session.request() run in the default executor, redirects are followed by the caller """
+    return await asyncio.to_thread(http_session.request, method, url, allow_redirects=False, timeout=HTTP_TIMEOUT,
+                                   **kwargs)
+
+
+class AsyncAuth:
+    """
+        Version 2 client credentials access token, renewed by a timer before it expires and reissued on the
+        Login stream of the open sessions using it, so the connections are not dropped at the token expiry:
+        5% of the token lifetime before expiry for short lived tokens, 300 seconds otherwise.
+    """
+
+    def __init__(self, url, client_id, client_secret, token_scope=scope):
+        self.url = url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = token_scope
+        self.token = None
+        self.expires_in = 0
+        self.token_time = 0
+        # The sessions logging in with this token, added by AsyncMRNSession
+        self.sessions = []
+        self._refresh_task = None
+
+    async def start(self):
+        """ Get the first access token and start the renewal timer """
+        await self.refresh()
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    async def refresh(self, url=None):
+        """ Request a new access token, raises AuthenticationError for an unrecoverable error """
+        if url is None:
+            url = self.url
+        data = {'grant_type': 'client_credentials', 'scope': self.scope, 'client_id': self.client_id,
+                'client_secret': self.client_secret}
+        while True:
+            log.info('%s Sending authentication request with client credentials to %s ...', datetime.now(), url)
+            try:
+                r = await http_request('POST', url, headers={'Accept': 'application/json'}, data=data)
+            except requests.exceptions.RequestException as e:
+                raise AuthenticationError(f'Delivery Platform authentication exception failure: {e}')
+            if r.status_code == 200:
+                auth_json = r.json()
+                log.info('%s Delivery Platform Authentication succeeded.', datetime.now())
+                self.token = auth_json['access_token']
+                self.expires_in = int(auth_json['expires_in'])
+                self.token_time = time.time()
+                return self.token
+            if r.status_code in [301, 302, 307, 308] and r.headers.get('Location'):
+                log.info('Delivery Platform authentication HTTP code: %s %s', r.status_code, r.reason)
+                url = r.headers['Location']
+            elif r.status_code in [400, 401, 403, 404, 410, 451]:
+                raise AuthenticationError(f'Delivery Platform authentication HTTP code: {r.status_code} {r.reason}')
+            else:
+                log.warning('Delivery Platform authentication failed. HTTP code: %s %s', r.status_code, r.reason)
+                await asyncio.sleep(HTTP_RETRY_DELAY)
+
+    def refresh_delay(self):
+        """ Seconds until the token must be renewed """
+        delta = self.expires_in * 0.05 if self.expires_in < 600 else 300
+        return max(0.0, self.token_time + self.expires_in - delta - time.time())
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_delay())
+            try:
+                await self.refresh()
+            except AuthenticationError as e:
+                log.error('%s, retrying in %s seconds', e, HTTP_RETRY_DELAY)
+                await asyncio.sleep(HTTP_RETRY_DELAY)
+                continue
+            for session in self.sessions:
+                await session.reissue_token()
+
+
+async def discover_endpoints(url, auth, endpoint_region=region):
+    """
+        Query the Delivery Platform service discovery, returns the WebSocket endpoints of the region as
+        'host:port': the multiple locations endpoints first, then the single location endpoints.
+    """
+    while True:
+        log.info('%s Sending Delivery Platform service discovery request to %s...', datetime.now(), url)
+        try:
+            r = await http_request('GET', url, headers={'Authorization': f'Bearer {auth.token}'},
+                                   params={'transport': 'websocket'})
+        except requests.exceptions.RequestException as e:
+            raise AuthenticationError(f'Delivery Platform service discovery exception failure: {e}')
+        if r.status_code == 200:
+            break
+        if r.status_code in [301, 302, 307, 308] and r.headers.get('Location'):
+            url = r.headers['Location']
+        elif r.status_code in [403, 404, 410, 451]:
+            raise AuthenticationError(f'Delivery Platform service discovery HTTP code: {r.status_code} {r.reason}')
+        else:
+            log.warning('Delivery Platform service discovery HTTP code: %s %s', r.status_code, r.reason)
+            await asyncio.sleep(HTTP_RETRY_DELAY)
+
+    log.info('%s Delivery Platform Service discovery succeeded.', datetime.now())
+    hosts = []
+    backup_hosts = []
+    for service_json in r.json()['services']:
+        if not service_json['location'][0].startswith(endpoint_region):
+            continue
+        endpoint = f'{service_json["endpoint"]}:{service_json["port"]}'
+        if len(service_json['location']) >= 2:
+            hosts.append(endpoint)
+        elif len(service_json['location']) == 1:
+            backup_hosts.append(endpoint)
+    return hosts + backup_hosts
+
+
+class AsyncMRNSession:
+    """
+        One tr_json2 WebSocket connection with its MRN item streams, reconnected with a jittered exponential
+        backoff when it is lost. Logs in with the access token of auth, or with the user name when auth is None.
+        The completed news are put into a queue read by stories(); sessions created with the same queue and
+        news_cache deliver the first complete copy of each news only. When the session is closed it puts itself
+        into the queue as its end marker, after its stories. news_filter, a HeaderFilter, drops the news it
+        does not select before they are decoded.
+    """
+
+    def __init__(self, host, port, items, auth=None, user='root', name='Session', service_name=service,
+                 ssl_context=None, queue=None, news_cache=None, app=app_id, login_position=position,
+                 envelope_settings=None, news_filter=None):
+        self.host = host
+        self.port = int(port)
+        self.auth = auth
+        if auth is not None:
+            auth.sessions.append(self)
+        self.user = user
+        self.name = name
+        self.service = service_name
+        self.ssl_context = ssl_context
+        self.app_id = app
+        self.position = login_position
+        self.decoder = MRNDecoder(items, **(envelope_settings or {}), news_filter=news_filter, news_cache=news_cache,
+                                  name=name)
+        self.item_streams = self.decoder.item_streams
+        self.queue = queue if queue is not None else asyncio.Queue(DEFAULT_STORY_QUEUE_SIZE)
+        self.web_socket_open = False
+        self.logged_in = False
+        self.closed = False
+        # Failed connections since the last successful subscription
+        self.reconnect_attempts = 0
+        self._writer = None
+        self._task = None
+        self._end_marker_put = False
+        self._end_marker_task = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        """ Run the session in a task of the running event loop """
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def close(self):
+        """ Close the WebSocket and end stories() once the queued stories are read """
+        self.closed = True
+        if self._writer is not None and self.web_socket_open:
+            log.info('%s %s: Closing WebSocket', datetime.now(), self.name)
+            try:
+                self._writer.write(wsproto.encode_frame(wsproto.OP_CLOSE, wsproto.close_payload(), mask=True))
+                await self._writer.drain()
+            except ConnectionError:
+                pass
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._put_end_marker()
+
+    def _put_end_marker(self):
+        """ Put the end marker of the session after its stories, without waiting for a full queue to be read """
+        if self._end_marker_put:
+            return
+        self._end_marker_put = True
+        try:
+            self.queue.put_nowait(self)
+        except asyncio.QueueFull:
+            # put once the consumer reads the queue, close() does not wait for it
+            self._end_marker_task = asyncio.create_task(self.queue.put(self))
+
+    async def stories(self):
+        """ Asynchronous iterator of the completed news, ends when the session is closed """
+        while True:
+            story = await self.queue.get()
+            if story is self:
+                break
+            if isinstance(story, AsyncMRNSession):
+                # the end marker of another session sharing the queue
+                continue
+            yield story
+
+    async def run(self):
+        """ Connect, process the messages and reconnect until close() """
+        while not self.closed:
+            try:
+                await self._connect_and_process()
+            except (OSError, asyncio.IncompleteReadError, wsproto.WebSocketProtocolError) as error:
+                log.error('%s %s: Error %s', datetime.now(), self.name, error)
+            except Exception as error:
+                # an unexpected message or frame, the session reconnects instead of stopping silently
+                log.exception('%s %s: Unexpected error %r', datetime.now(), self.name, error)
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+                self.logged_in = False
+                if self.web_socket_open:
+                    self.web_socket_open = False
+                    log.info('%s %s: WebSocket Closed', datetime.now(), self.name)
+                    self.log_stats()
+            if not self.closed:
+                # jittered exponential backoff, the sessions do not all reconnect at the same time
+                delay = random.uniform(0, min(reconnect_max_delay, reconnect_delay * 2 ** min(self.reconnect_attempts, 30)))
+                self.reconnect_attempts += 1
+                log.info('%s %s: Reconnecting in %.3f seconds (attempt %d)', datetime.now(), self.name, delay,
+                         self.reconnect_attempts)
+                await asyncio.sleep(delay)
+
+    def log_stats(self):
+        """ Output the counters of each MRN item stream """
+        for stream in self.item_streams:
+            log.info('%s %s stream %d: %s', self.name, stream.item, stream.stream_id, stream.stats())
+
+    async def _connect_and_process(self):
+        scheme = 'wss' if self.ssl_context else 'ws'
+        log.info('%s %s: Connecting WebSocket to %s://%s:%s/WebSocket ...', datetime.now(), self.name, scheme,
+                 self.host, self.port)
+        reader, self._writer = await wsproto.client_connect(self.host, self.port, ssl=self.ssl_context)
+        self.web_socket_open = True
+        self.logged_in = False
+        log.info('%s %s: WebSocket successfully connected!', datetime.now(), self.name)
+        await self._send(self._login_json())
+        while True:
+            opcode, payload = await wsproto.read_message(reader, self._writer, mask=True)
+            if opcode == wsproto.OP_CLOSE:
+                return
+            message_json = mrn_codec.loads(payload)
+            log.debug('%s RECEIVED on %s:\n%s', datetime.now(), self.name, JsonDump(log, message_json))
+            for single_msg in message_json:
+                await self._process_message(single_msg)
+
+    async def _send(self, message_json):
+        self._writer.write(wsproto.encode_frame(wsproto.OP_TEXT, mrn_codec.dumps(message_json).encode('utf-8'),
+                                                mask=True))
+        await self._writer.drain()
+        log.debug('%s SENT on %s:\n%s', datetime.now(), self.name, JsonDump(log, message_json))
+
+    def _login_json(self, refresh=True):
+        """ Login request with the current access token, a reissue (refresh False) does not request a Refresh """
+        if self.auth is None:
+            key = {'Name': self.user, 'Elements': {'ApplicationId': self.app_id, 'Position': self.position}}
+        else:
+            key = {'NameType': 'AuthnToken',
+                   'Elements': {'ApplicationId': self.app_id, 'Position': self.position,
+                                'AuthenticationToken': self.auth.token}}
+        login_json = {'ID': 1, 'Domain': 'Login', 'Key': key}
+        if not refresh:
+            login_json['Refresh'] = False
+        return login_json
+
+    async def reissue_token(self):
+        """ Send the renewed access token on the open Login stream, the connection and item streams are kept """
+        if not (self.web_socket_open and self.logged_in):
+            return
+        try:
+            await self._send(self._login_json(refresh=False))
+            log.info('%s %s: Access token reissued on the Login stream', datetime.now(), self.name)
+        except OSError as e:
+            log.warning('%s %s: Cannot reissue the access token: %s', datetime.now(), self.name, e)
+
+    async def _process_message(self, message_json):
+        message_type = message_json['Type']
+        if message_type == 'Refresh':
+            if message_json.get('Domain') == 'Login':
+                # the item streams are requested once per connection, not again for a reissued token
+                if not self.logged_in:
+                    self.logged_in = True
+                    await self._send([stream.request_json(self.service if self.auth else None)
+                                      for stream in self.item_streams])
+            else:
+                log.info('RECEIVED on %s: Refresh Message for %s', self.name, message_json.get('Key', {}).get('Name'))
+                self.reconnect_attempts = 0
+        elif message_type == 'Update':
+            if message_json.get('Domain') == mrn_domain:
+                stream = self.item_streams.get(message_json.get('ID'))
+                if stream is None:
+                    log.warning('%s: Update for unknown stream ID %s', self.name, message_json.get('ID'))
+                    return
+                stream.updates += 1
+                story = self._process_update(stream, message_json)
+                if story is not None:
+                    # A full queue stops reading the connection until the stories are consumed
+                    await self.queue.put(story)
+        elif message_type == 'Status':
+            log.info('RECEIVED on %s: Status Message\n%s', self.name, JsonDump(log, message_json))
+            if message_json.get('Domain') == 'Login' and message_json.get('State', {}).get('Stream') != 'Open':
+                log.error('%s Error: Login failed, received status message, closing', datetime.now())
+                await self.close()
+        elif message_type == 'Ping':
+            await self._send({'Type': 'Pong'})
+
+    def _process_update(self, stream, message_json):
+        """ Assemble an Update of an item stream, returns the Story when its news is completed """
+        completed = self.decoder.assemble(stream, message_json['Fields'])
+        if completed is None:
+            return None
+        try:
+            decompressed_data = completed.decompress()
+            return Story(stream.item, completed.guid, len(decompressed_data), mrn_codec.loads(decompressed_data),
+                         self.name)
+        except (ValueError, zlib.error) as error:
+            stream.errors += 1
+            log.warning('%s: cannot decode the news %s: %r', self.name, completed.guid, error)
+            return None
+
+
+def make_ssl_context():
+    """ Client TLS context, trusting the CA bundle of WEBSOCKET_CLIENT_CA_BUNDLE if it is set """
+    context = ssl.create_default_context(cafile=os.environ.get('WEBSOCKET_CLIENT_CA_BUNDLE'))
+    # Same as the websocket-client sslopt of the RTO console example
+    context.check_hostname = False
+    return context
+
+
+def print_commandline_usage_and_exit(exit_code):
+    print('Usage: mrn_async.py [--app_id app_id] '
+          '--clientid clientid --clientsecret client secret [--position position] [--auth_url auth_url] '
+          '[--hostname hostname] [--port port] [--discovery_url discovery_url] [--scope scope] [--service service] '
+          '[--region region] [--ric ric[,ric...]] [--connections count] [--envelope_ttl seconds] '
+          '[--max_envelopes count] [--max_envelope_bytes bytes] [--decompress_mode stream|final] '
+          '[--log_level debug|info|warning|error] [--json auto|orjson|json] [--filter expression] '
+          '[--reconnect_delay seconds] [--reconnect_max_delay seconds] [--help]')
+    sys.exit(exit_code)
+
+
+async def main():
+    """ Authenticate, open the sessions on one event loop and output the stories until Ctrl+C """
+    auth = AsyncAuth(auth_url, clientid, client_secret, scope)
+    try:
+        await auth.start()
+        endpoints = [f'{hostName}:{port}'] if hostName else await discover_endpoints(discovery_url, auth, region)
+    except AuthenticationError as e:
+        log.error('%s. Exiting...', e)
+        return 1
+    if not endpoints:
+        log.error('The region: %s is not present in list of endpoints', region)
+        return 1
+
+    # The sessions share the stories queue, and with several connections the first complete copy of a news wins
+    queue = asyncio.Queue(DEFAULT_STORY_QUEUE_SIZE)
+    news_cache = GuidCache() if connections > 1 else None
+    envelope_settings = {'envelope_ttl': envelope_ttl, 'max_envelopes': max_envelopes,
+                         'max_envelope_bytes': max_envelope_bytes, 'decompress_mode': decompress_mode}
+    ssl_context = make_ssl_context()
+    sessions = []
+    for index in range(connections):
+        host, endpoint_port = endpoints[index % len(endpoints)].rsplit(':', 1)
+        sessions.append(AsyncMRNSession(host, endpoint_port, mrn_items, auth=auth, name=f'Session{index + 1}',
+                                        service_name=service, ssl_context=ssl_context, queue=queue,
+                                        news_cache=news_cache, app=app_id, login_position=position,
+                                        envelope_settings=envelope_settings, news_filter=news_filter))
+    for session in sessions:
+        session.start()
+    # The sessions which are closed, for example after a rejected Login, the other sessions go on
+    stopped = set()
+    try:
+        while len(stopped) < len(sessions):
+            story = await queue.get()
+            if isinstance(story, AsyncMRNSession):
+                stopped.add(story)
+                log.warning('%s is stopped, %d session(s) left', story.name, len(sessions) - len(stopped))
+                continue
+            # The full news at debug level, one line per news at info level
+            log_decoded_news(log, story.guid, story.size, story.news)
+        log.error('All the sessions are stopped. Exiting...')
+        return 1
+    finally:
+        for session in sessions:
+            await session.close()
+        auth.stop()
+        if news_cache is not None:
+            log.info('Hot-standby de-duplication: %s', news_cache.stats())
+
+
+if __name__ == "__main__":
+    load_dotenv()  # take environment variables from .env.
+    clientid = os.environ.get('CLIENT_ID', '')
+    client_secret = os.environ.get('CLIENT_SECRET', '')
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", [
+            "help", "app_id=", "clientsecret=", "clientid=", "hostname=", "port=", "position=", "auth_url=",
+            "discovery_url=", "scope=", "service=", "region=", "ric=", "connections=", "envelope_ttl=",
+            "max_envelopes=", "max_envelope_bytes=", "decompress_mode=", "log_level=", "json=", "filter=",
+            "reconnect_delay=", "reconnect_max_delay="])
+    except getopt.GetoptError:
+        print_commandline_usage_and_exit(2)
+    for opt, arg in opts:
+        if opt in "--help":
+            print_commandline_usage_and_exit(0)
+        elif opt in "--app_id":
+            app_id = arg
+        elif opt in "--clientsecret":
+            client_secret = arg
+        elif opt in "--clientid":
+            clientid = arg
+        elif opt in "--hostname":
+            hostName = arg
+        elif opt in "--port":
+            port = arg
+        elif opt in "--position":
+            position = arg
+        elif opt in "--auth_url":
+            auth_url = arg
+        elif opt in "--discovery_url":
+            discovery_url = arg
+        elif opt in "--scope":
+            scope = arg
+        elif opt in "--service":
+            service = arg
+        elif opt in "--region":
+            region = arg
+        elif opt in "--ric":
+            try:
+                mrn_items = parse_items(arg)
+            except ValueError:
+                print('The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRSI only')
+                sys.exit(2)
+        elif opt in "--connections":
+            connections = int(arg)
+        elif opt in "--envelope_ttl":
+            envelope_ttl = float(arg)
+        elif opt in "--max_envelopes":
+            max_envelopes = int(arg)
+        elif opt in "--max_envelope_bytes":
+            max_envelope_bytes = int(arg)
+        elif opt in "--decompress_mode":
+            if arg not in DECOMPRESS_MODES:
+                print('The supported decompress modes are stream or final only')
+                sys.exit(2)
+            decompress_mode = arg
+        elif opt in "--log_level":
+            if arg not in LOG_LEVELS:
+                print('The supported log levels are debug, info, warning or error only')
+                sys.exit(2)
+            log_level = arg
+        elif opt in "--json":
+            if arg not in mrn_codec.JSON_CODECS:
+                print('The supported JSON codecs are auto, orjson or json only')
+                sys.exit(2)
+            json_codec = arg
+        elif opt in "--filter":
+            try:
+                news_filter = HeaderFilter(arg)
+            except ValueError as e:
+                print(e)
+                sys.exit(2)
+        elif opt in "--reconnect_delay":
+            reconnect_delay = float(arg)
+        elif opt in "--reconnect_max_delay":
+            reconnect_max_delay = float(arg)
+
+    configure_logging(log_level)
+    try:
+        mrn_codec.use_codec(json_codec)
+    except ImportError as e:
+        print(f'{e}, use --json json or install it with pip install orjson')
+        sys.exit(2)
+
+    if clientid == '' or client_secret == '':
+        print('Authentication Version 2 clientid and clientsecret are required options')
+        sys.exit(2)
+
+    if position == '':
+        # Populate position if possible
+        try:
+            position_host = socket.gethostname()
+            position = f'{socket.gethostbyname(position_host)}/{position_host}'
+        except socket.gaierror:
+            position = '127.0.0.1/net'
+
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        pass
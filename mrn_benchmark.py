@@ -0,0 +1,242 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+
+#!/usr/bin/env python
+""" Benchmark of the MRN Update decode path of the RTDS and RTO console examples and of the MRNDecoder batch API, from the received WebSocket text to the news """
+
+import sys
+import os
+import time
+import getopt
+import json
+import contextlib
+import multiprocessing
+import mrn_codec
+from mrn_generator import MRNGenerator, MRN_ITEMS, DEFAULT_FRAGMENT_SIZE, DEFAULT_MAX_BODY_SIZE, DEFAULT_OPEN_STORIES
+from mrn_logging import configure_logging, LOG_LEVELS
+from mrn_reassembly import DECOMPRESS_MODES, DEFAULT_DECOMPRESS_MODE
+from mrn_decoder import MRNDecoder
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Global Default Variables
+messages_count = 20000
+targets = ['rtds', 'rto']
+items = list(MRN_ITEMS)
+fragment_size = DEFAULT_FRAGMENT_SIZE
+max_body_size = DEFAULT_MAX_BODY_SIZE
+open_stories = DEFAULT_OPEN_STORIES
+decompress_mode = DEFAULT_DECOMPRESS_MODE
+pack = 1
+json_codec = mrn_codec.DEFAULT_JSON_CODEC
+seed = 1
+log_level = 'info'
+output_file = ''
+
+
+def peak_rss():
+    """ Peak resident set size of this process in bytes, None if not available """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def percentile(sorted_values, fraction):
+    """ Nearest rank percentile of an already sorted list """
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def load_decode_function(target, items, decompress_mode):
+    """
+        Import the console example and return its WebSocket message callback, or the decoder batch function,
+        with the item streams which count the decoded news
+    """
+    # The item streams get the same IDs as the generated messages, in the order of items
+    if target == 'decoder':
+        decoder = MRNDecoder(items, decompress_mode=decompress_mode)
+        return decoder.feed, decoder.item_streams
+    if target == 'rtds':
+        import mrn_console_rtds as module
+        module._decoder = MRNDecoder(items, decompress_mode=decompress_mode)
+        return (lambda message: module.on_message(None, message)), module._decoder.item_streams
+    import mrn_console_rto_v2 as module
+    module.mrn_items = items
+    module.decompress_mode = decompress_mode
+    session = module.WebSocketSession('Benchmark', '')
+    return (lambda message: session._on_message(None, message)), session.item_streams
+
+
+def make_frames(messages, pack):
+    """
+        WebSocket text of the messages, pack messages per frame, with the GUIDs of the news whose first
+        fragment and whose last fragment the frame carries
+    """
+    frames = []
+    for index in range(0, len(messages), pack):
+        batch = messages[index:index + pack]
+        frames.append((json.dumps([message_json for message_json, _ in batch]),
+                       [message_json['Fields']['GUID'] for message_json, _ in batch
+                        if message_json['Fields']['FRAG_NUM'] == 1],
+                       [message_json['Fields']['GUID'] for message_json, is_last in batch if is_last]))
+    return frames
+
+
+def run_target(target, settings, result_queue):
+    """ Decode the generated MRN Update messages with one console example and report the results """
+    generator = MRNGenerator(items=settings['items'], fragment_size=settings['fragment_size'],
+                             max_body_size=settings['max_body_size'], open_stories=settings['open_stories'],
+                             seed=settings['seed'])
+    fragments = generator.fragments()
+    messages = [next(fragments) for _ in range(settings['messages'])]
+    frames = make_frames(messages, settings['pack'])
+    generated = sum(len(last_guids) for _, _, last_guids in frames)
+    codec_name = mrn_codec.use_codec(settings['json_codec'])
+    decode, item_streams = load_decode_function(target, settings['items'], settings['decompress_mode'])
+
+    # Latency of a news from the start of the frame of its first fragment to the end of the frame of its last
+    # fragment, including the other news decoded in between
+    latencies = []
+    started = {}
+    clock = time.perf_counter_ns
+    # Format the console output at the requested level, but discard it
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        configure_logging(settings['log_level'], devnull)
+        start = clock()
+        for message, first_guids, last_guids in frames:
+            message_start = clock()
+            for guid in first_guids:
+                started[guid] = message_start
+            decode(message)
+            if last_guids:
+                message_end = clock()
+                for guid in last_guids:
+                    latencies.append(message_end - started.pop(guid, message_start))
+        elapsed = (clock() - start) / 1e9
+
+    # The news completed by the decode path, not the generated ones
+    stories = sum(stream.news for stream in item_streams)
+    errors = sum(stream.errors for stream in item_streams)
+    latencies.sort()
+    result_queue.put({
+        'target': target,
+        'json_codec': codec_name,
+        'messages': len(messages),
+        'generated_stories': generated,
+        'stories': stories,
+        'errors': errors,
+        'seconds': elapsed,
+        'messages_per_sec': len(messages) / elapsed,
+        'stories_per_sec': stories / elapsed,
+        'p50_story_us': percentile(latencies, 0.50) / 1000,
+        'p99_story_us': percentile(latencies, 0.99) / 1000,
+        'peak_rss_bytes': peak_rss()
+    })
+
+
+def print_result(result):
+    rss = result['peak_rss_bytes']
+    print(f"{result['target']:<7} json={result['json_codec']} messages={result['messages']} stories={result['stories']} "
+          f"errors={result['errors']} "
+          f"time={result['seconds']:.3f}s msg/s={result['messages_per_sec']:.0f} "
+          f"stories/s={result['stories_per_sec']:.0f} p50={result['p50_story_us']:.1f}us "
+          f"p99={result['p99_story_us']:.1f}us "
+          f"peak_rss={'n/a' if rss is None else f'{rss / (1024 * 1024):.1f}MB'}")
+    if result['stories'] != result['generated_stories'] or result['errors']:
+        print(f"{result['target']:<7} WARNING: {result['stories']} news completed of {result['generated_stories']} "
+              f"generated, {result['errors']} errors")
+
+
+def print_commandline_usage_and_exit(exit_code):
+    print('Usage: mrn_benchmark.py [--messages count] [--target rtds|rto|decoder|both|all] [--items MRN_STORY,MRN_TRNA,...] '
+          '[--fragment_size bytes] [--max_body_size bytes] [--open_stories count] '
+          '[--decompress_mode stream|final] [--log_level debug|info|warning|error] [--pack count] '
+          '[--json auto|orjson|json] [--seed seed] [--output file] [--help]')
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    # Get command line parameters
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", [
+            "help", "messages=", "target=", "items=", "fragment_size=", "max_body_size=",
+            "open_stories=", "decompress_mode=", "log_level=", "pack=", "json=", "seed=", "output="])
+    except getopt.GetoptError:
+        print_commandline_usage_and_exit(2)
+    for opt, arg in opts:
+        if opt in "--help":
+            print_commandline_usage_and_exit(0)
+        elif opt in "--messages":
+            messages_count = int(arg)
+        elif opt in "--target":
+            if arg not in ['rtds', 'rto', 'decoder', 'both', 'all']:
+                print('The supported targets are rtds, rto, decoder, both or all only')
+                sys.exit(2)
+            targets = {'both': ['rtds', 'rto'], 'all': ['rtds', 'rto', 'decoder']}.get(arg, [arg])
+        elif opt in "--items":
+            items = arg.split(',')
+            if any(item not in MRN_ITEMS for item in items):
+                print('The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRSI only')
+                sys.exit(2)
+        elif opt in "--fragment_size":
+            fragment_size = int(arg)
+        elif opt in "--max_body_size":
+            max_body_size = int(arg)
+        elif opt in "--open_stories":
+            open_stories = int(arg)
+        elif opt in "--decompress_mode":
+            if arg not in DECOMPRESS_MODES:
+                print('The supported decompress modes are stream or final only')
+                sys.exit(2)
+            decompress_mode = arg
+        elif opt in "--log_level":
+            if arg not in LOG_LEVELS:
+                print('The supported log levels are debug, info, warning or error only')
+                sys.exit(2)
+            log_level = arg
+        elif opt in "--pack":
+            pack = int(arg)
+        elif opt in "--json":
+            if arg not in mrn_codec.JSON_CODECS:
+                print('The supported JSON codecs are auto, orjson or json only')
+                sys.exit(2)
+            if arg == 'orjson' and mrn_codec.orjson is None:
+                print('The orjson package is not installed, install it with pip install orjson')
+                sys.exit(2)
+            json_codec = arg
+        elif opt in "--seed":
+            seed = int(arg)
+        elif opt in "--output":
+            output_file = arg
+
+    settings = {'messages': messages_count, 'items': items, 'fragment_size': fragment_size,
+                'max_body_size': max_body_size, 'open_stories': open_stories,
+                'decompress_mode': decompress_mode, 'log_level': log_level, 'pack': pack,
+                'json_codec': json_codec, 'seed': seed}
+
+    # Run each console example in its own process, so peak RSS is measured separately
+    results = []
+    for target in targets:
+        result_queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_target, args=(target, settings, result_queue))
+        process.start()
+        result = result_queue.get()
+        process.join()
+        print_result(result)
+        results.append(result)
+
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as output:
+            json.dump({'settings': settings, 'results': results}, output, indent=2)
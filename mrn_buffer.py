@@ -0,0 +1,218 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    Bounded buffer between a session decoding the news and their output (console, subscribers, sink).
+
+    The session puts the completed news into the buffer and an output thread writes them, so a slow
+    console or sink does not stop the WebSocket thread from answering the Ping messages. When the buffer
+    is full the overflow policy applies:
+
+        block        the session waits for the output thread, the socket is not read meanwhile
+        drop_oldest  the oldest buffered news is dropped
+        spill        the news are appended to a file, the output thread reads them back in order
+                     once the buffered news are written
+"""
+
+import os
+import time
+import struct
+import logging
+import threading
+from collections import deque
+import mrn_codec
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'spill')
+DEFAULT_OVERFLOW_POLICY = 'block'
+DEFAULT_OUTPUT_QUEUE_SIZE = 10000
+DEFAULT_SPILL_DIR = 'spill'
+
+# parsed news flag, GUID length, MRN item length, decompressed size, data length
+SPILL_RECORD_HEADER = struct.Struct('<BHBII')
+
+log = logging.getLogger('mrn_buffer')
+
+
+class SpillQueue:
+    """ File backed FIFO of the news which do not fit in the buffer, the file is emptied when it is drained """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'w+b')
+        self._read_offset = 0
+        self._write_offset = 0
+        # Number of news in the file
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def bytes(self):
+        """ Size of the news in the file """
+        return self._write_offset - self._read_offset
+
+    def put(self, item, guid, size, news):
+        """ Append a news, news is the decompressed JSON data or the parsed news """
+        parsed = not isinstance(news, (bytes, bytearray, memoryview))
+        data = mrn_codec.dumps(news).encode('utf-8') if parsed else news
+        item_bytes = item.encode('utf-8')
+        guid_bytes = guid.encode('utf-8')
+        self._file.seek(self._write_offset)
+        self._file.write(SPILL_RECORD_HEADER.pack(parsed, len(guid_bytes), len(item_bytes), size, len(data)))
+        self._file.write(guid_bytes)
+        self._file.write(item_bytes)
+        self._file.write(data)
+        self._write_offset = self._file.tell()
+        self.count += 1
+
+    def get(self):
+        """ Read the oldest news (item, guid, size, news), None if the file is empty """
+        if not self.count:
+            return None
+        self._file.seek(self._read_offset)
+        parsed, guid_length, item_length, size, data_length = \
+            SPILL_RECORD_HEADER.unpack(self._file.read(SPILL_RECORD_HEADER.size))
+        guid = self._file.read(guid_length).decode('utf-8')
+        item = self._file.read(item_length).decode('utf-8')
+        data = self._file.read(data_length)
+        self._read_offset = self._file.tell()
+        self.count -= 1
+        if not self.count:
+            # the file is drained, its space is reused
+            self._file.seek(0)
+            self._file.truncate()
+            self._read_offset = self._write_offset = 0
+        return item, guid, size, mrn_codec.loads(data) if parsed else data
+
+    def close(self):
+        self._file.close()
+        os.remove(self.path)
+
+
+class NewsBuffer:
+    """
+        Bounded FIFO of the completed news written by an output thread, safe to use from several threads.
+        output(item, guid, size, news) is called on the output thread, news is what put() received.
+    """
+
+    def __init__(self, output, size=DEFAULT_OUTPUT_QUEUE_SIZE, policy=DEFAULT_OVERFLOW_POLICY,
+                 spill_dir=DEFAULT_SPILL_DIR, name='news'):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {policy}')
+        self.output = output
+        self.size = size
+        self.policy = policy
+        self.name = name
+        # Number of news written by the output thread, dropped, spilled to the file, output errors,
+        # and the time the session waited for the output thread
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.errors = 0
+        self.blocked_seconds = 0.0
+        self._queue = deque()
+        self._spill = SpillQueue(os.path.join(spill_dir, f'{name}.spill')) if policy == 'spill' else None
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'{name}-output', daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def put(self, item, guid, size, news):
+        """ Buffer a completed news, called by the session """
+        with self._lock:
+            if self._spill is not None and self._spill.count:
+                # the spilled news are written first, the next news follow them in the file
+                self._spill.put(item, guid, size, news)
+                self.spilled += 1
+            elif len(self._queue) >= self.size:
+                if self.policy == 'block':
+                    started = time.monotonic()
+                    while len(self._queue) >= self.size and not self._closed:
+                        self._not_full.wait()
+                    self.blocked_seconds += time.monotonic() - started
+                    self._queue.append((item, guid, size, news))
+                elif self.policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+                    self._queue.append((item, guid, size, news))
+                else:
+                    self._spill.put(item, guid, size, news)
+                    self.spilled += 1
+            else:
+                self._queue.append((item, guid, size, news))
+            self._not_empty.notify()
+
+    def close(self):
+        """ Write the buffered and spilled news, then stop the output thread """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify()
+            self._not_full.notify_all()
+        self._thread.join()
+        if self._spill is not None:
+            self._spill.close()
+
+    def stats(self):
+        """ Current buffer occupancy and counters """
+        return {
+            'queued': len(self._queue),
+            'spill_queued': len(self._spill) if self._spill is not None else 0,
+            'written': self.written,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'errors': self.errors,
+            'blocked_seconds': round(self.blocked_seconds, 3)
+        }
+
+    def register_metrics(self, registry, **labels):
+        """ Export the buffer depth, spill file occupancy and counters with these labels """
+        registry.gauge('mrn_output_queue', 'Completed news waiting for the output thread', self.__len__, **labels)
+        registry.counter('mrn_output_dropped_total', 'Completed news dropped by the drop_oldest overflow policy',
+                         lambda: self.dropped, **labels)
+        registry.counter('mrn_output_blocked_seconds_total', 'Time the session waited for the output thread',
+                         lambda: self.blocked_seconds, **labels)
+        if self._spill is not None:
+            registry.gauge('mrn_spill_queue', 'Completed news waiting in the spill file',
+                           lambda: len(self._spill), **labels)
+            registry.gauge('mrn_spill_bytes', 'Size of the news waiting in the spill file',
+                           lambda: self._spill.bytes, **labels)
+            registry.counter('mrn_spilled_total', 'Completed news spilled to the file', lambda: self.spilled, **labels)
+
+    def _next(self):
+        """ The next news to write, None when the buffer is closed and empty """
+        with self._lock:
+            while True:
+                if self._queue:
+                    news = self._queue.popleft()
+                    self._not_full.notify()
+                    return news
+                if self._spill is not None and self._spill.count:
+                    return self._spill.get()
+                if self._closed:
+                    return None
+                self._not_empty.wait()
+
+    def _run(self):
+        while True:
+            news = self._next()
+            if news is None:
+                break
+            try:
+                self.output(*news)
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                log.warning('%s: news output exception: %s', self.name, e)
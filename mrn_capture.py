@@ -0,0 +1,297 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+
+#!/usr/bin/env python
+"""
+    Capture of the received WebSocket frames, and replay of a capture through the decode path of a
+    console example.
+
+    A capture file is a gzip stream of CAPTURE_MAGIC and records of a RECORD_HEADER (monotonic receive
+    time, connection name length, frame length), the connection name and the frame text. The receiving
+    thread only appends the frame and its receive time to a queue, a writer thread encodes, compresses
+    and writes the frames every flush_interval seconds.
+
+    The replay feeds the frames to the WebSocket message callback of the RTDS or RTO console example,
+    or to MRNDecoder.feed(), at the captured speed, N times faster, or as fast as possible:
+
+        (MRN_RTO) $> python mrn_capture.py --capture mrn.cap --target rto --speed 10
+"""
+
+import os
+import sys
+import gzip
+import time
+import getopt
+import struct
+import logging
+import threading
+from collections import deque
+
+CAPTURE_MAGIC = b'MRNCAP1\n'
+# monotonic receive time (seconds), connection name length, frame length
+RECORD_HEADER = struct.Struct('<dBI')
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+# The frames are base64 encoded compressed news, a fast compression level saves most of the space
+DEFAULT_COMPRESS_LEVEL = 1
+
+log = logging.getLogger('mrn_capture')
+
+
+class FrameCapture:
+    """
+        Appends the received frames to a capture file, safe to use from several connection threads.
+        write() is called on the receiving thread, the frames are written by a daemon writer thread.
+    """
+
+    def __init__(self, path, flush_interval=DEFAULT_FLUSH_INTERVAL, compress_level=DEFAULT_COMPRESS_LEVEL):
+        self.path = path
+        self.flush_interval = flush_interval
+        # Number of frames and frame bytes written
+        self.frames = 0
+        self.bytes = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = gzip.open(path, 'wb', compresslevel=compress_level)
+        self._file.write(CAPTURE_MAGIC)
+        self._writer = threading.Thread(target=self._write_loop, name='frame-capture', daemon=True)
+        self._writer.start()
+
+    def write(self, frame, connection=''):
+        """ Capture a received frame (str or bytes) of a connection """
+        # deque.append and popleft are thread safe, the receiving thread never waits for the writer
+        self._pending.append((time.monotonic(), connection, frame))
+
+    def flush(self):
+        """ Write the captured frames """
+        with self._lock:
+            pending = self._pending
+            count = len(pending)
+            if not count or self._file is None:
+                return
+            records = []
+            for _ in range(count):
+                received, connection, frame = pending.popleft()
+                if isinstance(frame, str):
+                    frame = frame.encode('utf-8')
+                name = connection.encode('utf-8')[:255]
+                records.append(RECORD_HEADER.pack(received, len(name), len(frame)))
+                records.append(name)
+                records.append(frame)
+                self.bytes += len(frame)
+            self._file.write(b''.join(records))
+            self.frames += count
+
+    def close(self):
+        """ Write the remaining frames and close the capture file """
+        self._closed.set()
+        self._writer.join()
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        return {'path': self.path, 'frames': self.frames, 'bytes': self.bytes}
+
+    def _write_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                log.error('Cannot write the capture file %s: %s', self.path, e)
+
+
+def read_frames(path):
+    """
+        Iterate the (monotonic receive time, connection name, frame text) records of a capture file,
+        ValueError if it is not a capture file. A file truncated by a crash ends at its last complete record.
+    """
+    with gzip.open(path, 'rb') as capture_file:
+        if capture_file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f'{path} is not a frame capture file')
+        try:
+            while True:
+                header = capture_file.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                received, name_length, frame_length = RECORD_HEADER.unpack(header)
+                name = capture_file.read(name_length).decode('utf-8')
+                frame = capture_file.read(frame_length)
+                if len(frame) < frame_length:
+                    return
+                yield received, name, frame.decode('utf-8')
+        except EOFError:
+            # the gzip stream of a capture which was not closed
+            return
+
+
+class NullWebSocket:
+    """ Stands for the WebSocket of a replayed connection: the Login, item requests and Pong are discarded """
+
+    def send(self, data):
+        pass
+
+    def close(self):
+        pass
+
+
+def replay(path, decode_function, speed=1.0):
+    """
+        Feed the frames of a capture to decode_function(connection name), which returns the message
+        callback of a connection. speed 1 replays at the captured pace, 10 ten times faster, 0 as fast as
+        possible. Returns the replay statistics.
+    """
+    callbacks = {}
+    frames = 0
+    frame_bytes = 0
+    max_lag = 0.0
+    first = None
+    started = time.perf_counter()
+    for received, connection, frame in read_frames(path):
+        if first is None:
+            first = received
+        if speed > 0:
+            # the time the frame is due, relative to the start of the replay
+            delay = started + (received - first) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+        callback = callbacks.get(connection)
+        if callback is None:
+            callback = callbacks[connection] = decode_function(connection)
+        callback(frame)
+        frames += 1
+        frame_bytes += len(frame)
+    elapsed = time.perf_counter() - started
+    return {'frames': frames, 'bytes': frame_bytes, 'connections': len(callbacks), 'seconds': elapsed,
+            'frames_per_sec': frames / elapsed if elapsed else 0.0, 'max_lag_ms': max_lag * 1000}
+
+
+def print_commandline_usage_and_exit(exit_code):
+    print('Usage: mrn_capture.py --capture file [--target rtds|rto|decoder] [--speed factor] '
+          '[--ric MRN_STORY,MRN_TRNA,...] [--decompress_mode stream|final] '
+          '[--log_level debug|info|warning|error] [--json auto|orjson|json] [--help]')
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    import mrn_codec
+    from mrn_logging import configure_logging, LOG_LEVELS, DEFAULT_LOG_LEVEL
+    from mrn_reassembly import DECOMPRESS_MODES, DEFAULT_DECOMPRESS_MODE
+    from mrn_streams import parse_items
+
+    capture_path = ''
+    target = 'rto'
+    speed = 1.0
+    items = ['MRN_STORY']
+    decompress_mode = DEFAULT_DECOMPRESS_MODE
+    log_level = DEFAULT_LOG_LEVEL
+    json_codec = mrn_codec.DEFAULT_JSON_CODEC
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", [
+            "help", "capture=", "target=", "speed=", "ric=", "decompress_mode=", "log_level=", "json="])
+    except getopt.GetoptError:
+        print_commandline_usage_and_exit(2)
+    for opt, arg in opts:
+        if opt in "--help":
+            print_commandline_usage_and_exit(0)
+        elif opt in "--capture":
+            capture_path = arg
+        elif opt in "--target":
+            if arg not in ['rtds', 'rto', 'decoder']:
+                print('The supported targets are rtds, rto or decoder only')
+                sys.exit(2)
+            target = arg
+        elif opt in "--speed":
+            speed = float(arg)
+            if speed < 0:
+                print('The speed must be 0 (as fast as possible) or a positive factor')
+                sys.exit(2)
+        elif opt in "--ric":
+            try:
+                items = parse_items(arg)
+            except ValueError:
+                print('The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRSI only')
+                sys.exit(2)
+        elif opt in "--decompress_mode":
+            if arg not in DECOMPRESS_MODES:
+                print('The supported decompress modes are stream or final only')
+                sys.exit(2)
+            decompress_mode = arg
+        elif opt in "--log_level":
+            if arg not in LOG_LEVELS:
+                print('The supported log levels are debug, info, warning or error only')
+                sys.exit(2)
+            log_level = arg
+        elif opt in "--json":
+            if arg not in mrn_codec.JSON_CODECS:
+                print('The supported JSON codecs are auto, orjson or json only')
+                sys.exit(2)
+            json_codec = arg
+
+    if not capture_path:
+        print_commandline_usage_and_exit(2)
+    configure_logging(log_level)
+    try:
+        mrn_codec.use_codec(json_codec)
+    except ImportError as e:
+        print(f'{e}, use --json json or install it with pip install orjson')
+        sys.exit(2)
+
+    # The replayed connections subscribe the items of the captured connections, in the same order
+    if target == 'decoder':
+        from mrn_decoder import MRNDecoder
+        decoders = []
+
+        def decode_function(connection):
+            decoder = MRNDecoder(items, decompress_mode=decompress_mode, name=connection)
+            decoders.append(decoder)
+            return decoder.feed
+    elif target == 'rtds':
+        import mrn_console_rtds as console
+        from mrn_decoder import MRNDecoder
+        console._decoder = MRNDecoder(items, decompress_mode=decompress_mode)
+
+        def decode_function(connection):
+            return lambda frame: console.on_message(NullWebSocket(), frame)
+    else:
+        import mrn_console_rto_v2 as console
+        console.mrn_items = items
+        console.decompress_mode = decompress_mode
+
+        def decode_function(connection):
+            session = console.WebSocketSession(connection or 'Replay', '')
+            session.web_socket_app = NullWebSocket()
+            session.web_socket_open = True
+            console.sessions.append(session)
+            return lambda frame: session._on_message(None, frame)
+
+    try:
+        result = replay(capture_path, decode_function, speed)
+    except (OSError, ValueError) as e:
+        print(f'Cannot replay {capture_path}: {e}')
+        sys.exit(2)
+    except KeyboardInterrupt:
+        sys.exit(1)
+    if target == 'decoder':
+        for decoder in decoders:
+            for stream in decoder.item_streams:
+                log.info('%s %s stream %d: %s', decoder.name, stream.item, stream.stream_id, stream.stats())
+    elif target == 'rtds':
+        console.log_stats()
+    else:
+        for session in console.sessions:
+            session.log_stats()
+    log.info('Replayed %s: %s', capture_path, result)
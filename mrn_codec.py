@@ -0,0 +1,67 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    JSON codec of the MRN examples for the received messages, the decompressed news and the sent requests.
+
+    Uses orjson when it is installed, otherwise the standard library json module. Call the module
+    functions as mrn_codec.loads()/mrn_codec.dumps() so a codec selected by use_codec() takes effect.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_CODECS = ('auto', 'orjson', 'json')
+DEFAULT_JSON_CODEC = 'auto'
+
+# Name of the codec in use, 'orjson' or 'json'
+codec_name = 'json'
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _json_dumps(message_json):
+    return json.dumps(message_json)
+
+
+def _orjson_loads(data):
+    # orjson parses bytes directly, the decompressed news does not go through a str
+    return orjson.loads(data)
+
+
+def _orjson_dumps(message_json):
+    return orjson.dumps(message_json).decode('utf-8')
+
+
+loads = _json_loads
+dumps = _json_dumps
+
+
+def use_codec(name=DEFAULT_JSON_CODEC):
+    """
+        Select the JSON codec: 'orjson', 'json' or 'auto' (orjson if installed).
+        Raises ImportError if 'orjson' is requested but not installed.
+    """
+    global loads, dumps, codec_name
+    if name not in JSON_CODECS:
+        raise ValueError(f'Unknown JSON codec {name}')
+    if name == 'orjson' and orjson is None:
+        raise ImportError('The orjson package is not installed')
+    if name != 'json' and orjson is not None:
+        loads, dumps, codec_name = _orjson_loads, _orjson_dumps, 'orjson'
+    else:
+        loads, dumps, codec_name = _json_loads, _json_dumps, 'json'
+    return codec_name
+
+
+use_codec()
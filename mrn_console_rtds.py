@@ -13,12 +13,26 @@ import sys
 import time
 import getopt
 import socket
-import json
+import logging
 import websocket
 import threading
 from threading import Thread, Event
-import base64
 import zlib
+import mrn_codec
+from mrn_logging import configure_logging, JsonDump, log_news, log_decoded_news, LOG_LEVELS, DEFAULT_LOG_LEVEL
+from mrn_reassembly import DEFAULT_ENVELOPE_TTL, DEFAULT_MAX_ENVELOPES, DEFAULT_MAX_ENVELOPE_BYTES, \
+    DECOMPRESS_MODES, DEFAULT_DECOMPRESS_MODE
+from mrn_streams import parse_items
+from mrn_decoder import MRNDecoder
+import mrn_sinks
+import mrn_metrics
+from mrn_metrics import REGISTRY
+from mrn_archive import StoryArchive, DEFAULT_SEGMENT_BYTES
+from mrn_filter import HeaderFilter
+from mrn_router import TopicRouter, load_subscriptions
+from mrn_capture import FrameCapture
+from mrn_buffer import NewsBuffer, OVERFLOW_POLICIES, DEFAULT_OVERFLOW_POLICY, DEFAULT_SPILL_DIR
+from mrn_fanout import StoryPublisher
 
 # Global Default Variables
 hostname = '127.0.0.1'
@@ -27,13 +41,62 @@ user = 'root'
 app_id = '256'
 position = socket.gethostbyname(socket.gethostname())
 mrn_domain = 'NewsTextAnalytics'
-mrn_item = 'MRN_STORY'
+mrn_items = ['MRN_STORY']
+envelope_ttl = DEFAULT_ENVELOPE_TTL
+max_envelopes = DEFAULT_MAX_ENVELOPES
+max_envelope_bytes = DEFAULT_MAX_ENVELOPE_BYTES
+decompress_mode = DEFAULT_DECOMPRESS_MODE
+log_level = DEFAULT_LOG_LEVEL
+json_codec = mrn_codec.DEFAULT_JSON_CODEC
+sink_format = ''
+sink_dir = mrn_sinks.DEFAULT_SINK_DIR
+sink_batch = mrn_sinks.DEFAULT_BATCH_SIZE
+sink_rotate_bytes = mrn_sinks.DEFAULT_ROTATE_BYTES
+sink_rotate_seconds = mrn_sinks.DEFAULT_ROTATE_SECONDS
+sink_fsync = mrn_sinks.DEFAULT_FSYNC_POLICY
+archive_dir = ''
+archive_segment_bytes = DEFAULT_SEGMENT_BYTES
+metrics_port = 0
+metrics_interval = 0.0
+filter_expression = ''
+subscriptions_file = ''
+capture_file = ''
+output_queue = 0
+overflow = DEFAULT_OVERFLOW_POLICY
+spill_dir = DEFAULT_SPILL_DIR
+publish_path = ''
 
 # Global Variables
 web_socket_app = None
 web_socket_open = False
 
-_news_envelopes = []
+# One stream ID, envelope store and counters per MRN item, all opened on the connection, and their decoding
+_decoder = MRNDecoder(mrn_items)
+
+# File sink of the completed news, None to output them on the console only
+_story_sink = None
+# Archive of the completed news compressed data, None to keep nothing
+_story_archive = None
+# Header filter of the news, None to output all the news
+_news_filter = None
+# Topic router of the decoded news to the subscribers of their codes, None to route nothing
+_router = None
+# Capture of the received frames for the mrn_capture.py replay, None to capture nothing
+_frame_capture = None
+# Bounded buffer of the completed news written by the output thread, None to output them on the WebSocket thread
+_news_buffer = None
+# Publisher of the decoded news to the local subscriber processes, None to publish nothing
+_story_publisher = None
+
+# Counters and latency histograms, exported with the --metrics_port and --metrics_interval options
+_frames = REGISTRY.counter('mrn_frames_total', 'WebSocket frames received')
+_frame_bytes = REGISTRY.counter('mrn_frame_bytes_total', 'WebSocket frames bytes received')
+_frame_parse_seconds = REGISTRY.histogram('mrn_frame_parse_seconds', 'JSON parsing time of a received frame')
+_news_output_seconds = REGISTRY.histogram('mrn_news_output_seconds',
+                                          'Output time of a completed news (JSON parsing, console and sink)')
+REGISTRY.gauge('mrn_connected', 'WebSocket connection open', lambda: web_socket_open)
+
+log = logging.getLogger('mrn_console_rtds')
 
 # Config the encoding for the console
 sys.stdin.reconfigure(encoding='utf-8')
@@ -44,120 +107,79 @@ sys.stdout.reconfigure(encoding='utf-8')
 
 def decodeFieldList(fieldList_dict):
     for key, value in fieldList_dict.items():
-        print("Name = %s: Value = %s" % (key, value))
+        log.debug("Name = %s: Value = %s", key, value)
 
 
 def send_mrn_request(ws):
-    """ Create and send MRN request """
-    mrn_req_json = {
-        'ID': 2,
-        "Domain": mrn_domain,
-        'Key': {
-            'Name': mrn_item
-        }
-    }
+    """ Create and send the MRN item requests, one stream ID per item in a single frame """
+    mrn_req_json = [stream.request_json() for stream in _decoder.item_streams]
 
-    ws.send(json.dumps(mrn_req_json))
-    print("SENT:")
-    print(json.dumps(mrn_req_json, sort_keys=True, indent=2, separators=(',', ':')))
+    ws.send(mrn_codec.dumps(mrn_req_json))
+    log.debug("SENT:\n%s", JsonDump(log, mrn_req_json))
 
 
 def processRefresh(ws, message_json):
 
-    print("RECEIVED: Refresh Message")
-    decodeFieldList(message_json["Fields"])
+    log.info("RECEIVED: Refresh Message for %s", message_json.get("Key", {}).get("Name"))
+    if log.isEnabledFor(logging.DEBUG):
+        decodeFieldList(message_json["Fields"])
 
 
-def processMRNUpdate(ws, message_json):  # process incoming News Update messages
+def processMRNUpdate(ws, stream, message_json):  # process incoming News Update messages of an item stream
 
-    fields_data = message_json["Fields"]
     # Dump the FieldList first (for informational purposes)
     # decodeFieldList(message_json["Fields"])
 
-    # declare variables
-    tot_size = 0
-    guid = None
+    # The decoder filters and assembles the fragments, the news is completed with its last fragment
+    completed = _decoder.assemble(stream, message_json["Fields"])
+    if completed is None:
+        return None
+    guid = completed.guid
 
     try:
-        # Get data for all required fields
-        fragment = base64.b64decode(fields_data["FRAGMENT"])
-        frag_num = int(fields_data["FRAG_NUM"])
-        guid = fields_data["GUID"]
-        mrn_src = fields_data["MRN_SRC"]
-
-        #print("GUID  = %s" % guid)
-        #print("FRAG_NUM = %d" % frag_num)
-        #print("MRN_SRC = %s" % mrn_src)
-
-        if frag_num > 1:  # We are now processing more than one part of an envelope - retrieve the current details
-            guid_index = next((index for (index, d) in enumerate(
-                _news_envelopes) if d["guid"] == guid), None)
-            envelop = _news_envelopes[guid_index]
-            if envelop and envelop["data"]["mrn_src"] == mrn_src and frag_num == envelop["data"]["frag_num"] + 1:
-                print("process multiple fragments for guid %s" %
-                      envelop["guid"])
-
-                #print("fragment before merge = %d" % len(envelop["data"]["fragment"]))
-
-                # Merge incoming data to existing news envelop and getting FRAGMENT and TOT_SIZE data to local variables
-                fragment = envelop["data"]["fragment"] = envelop["data"]["fragment"] + fragment
-                envelop["data"]["frag_num"] = frag_num
-                tot_size = envelop["data"]["tot_size"]
-                print("TOT_SIZE = %d" % tot_size)
-                print("Current FRAGMENT length = %d" % len(fragment))
-
-                # The multiple fragments news are not completed, waiting.
-                if tot_size != len(fragment):
-                    return None
-                # The multiple fragments news are completed, delete assoiclate GUID envelop
-                elif tot_size == len(fragment):
-                    del _news_envelopes[guid_index]
-            else:
-                print("Error: Cannot find fragment for GUID %s with matching FRAG_NUM or MRN_SRC %s" % (
-                    guid, mrn_src))
-                return None
-        else:  # FRAG_NUM = 1 The first fragment
-            tot_size = int(fields_data["TOT_SIZE"])
-            print("FRAGMENT length = %d" % len(fragment))
-            # The fragment news is not completed, waiting and add this news data to envelop object.
-            if tot_size != len(fragment):
-                print("Add new fragments to news envelop for guid %s" % guid)
-                _news_envelopes.append({  # the envelop object is a Python dictionary with GUID as a key and other fields are data
-                    "guid": guid,
-                    "data": {
-                        "fragment": fragment,
-                        "mrn_src": mrn_src,
-                        "frag_num": frag_num,
-                        "tot_size": tot_size
-                    }
-                })
-                return None
-
         # News Fragment(s) completed, decompress and print data as JSON to console
-        if tot_size == len(fragment):
-            print("decompress News FRAGMENT(s) for GUID  %s" % guid)
-            decompressed_data = zlib.decompress(fragment, zlib.MAX_WBITS | 32)
-            print("News = %s" % json.loads(decompressed_data))
-
-    except KeyError as keyerror:
-        print('KeyError exception: ', keyerror)
-    except IndexError as indexerror:
-        print('IndexError exception: ', indexerror)
-    except binascii.Error as b64error:
-        print('base64 decoding exception:', b64error)
+        if _story_archive is not None:
+            # the news is archived as received, it is decompressed again only when read from the archive
+            _story_archive.append(stream.item, guid, completed.fragment)
+        decompressed_data = completed.decompress()
+        if _news_buffer is not None:
+            # the output thread outputs the news, a slow console or sink does not hold the WebSocket thread
+            _news_buffer.put(stream.item, guid, len(decompressed_data), decompressed_data)
+        else:
+            output_news(stream.item, guid, len(decompressed_data), decompressed_data)
+
     except zlib.error as error:
-        print('zlib decompressing exception: ', error)
+        stream.errors += 1
+        log.warning('zlib decompressing exception: %s', error)
     # Some console environments like Windows may encounter this unicode display as a limitation of OS
     except UnicodeEncodeError as encodeerror:
-        print("UnicodeEncodeError exception. Cannot decode unicode character for %s in this enviroment: " %
-              guid, encodeerror)
+        log.warning("UnicodeEncodeError exception. Cannot decode unicode character for %s in this enviroment: %s",
+                    guid, encodeerror)
     except Exception as e:
-        print('exception: ', sys.exc_info()[0])
+        stream.errors += 1
+        log.warning('exception: %s', sys.exc_info()[0])
+
+
+def output_news(item, guid, size, decompressed_data):
+    """ Output a completed news on the console, to its subscribers, to the sink and to the local subscribers """
+    started = time.perf_counter()
+    # The full news at debug level, one line per news at info level
+    if _router is not None:
+        # the news is parsed once for the output and the routing
+        news = mrn_codec.loads(decompressed_data)
+        log_decoded_news(log, guid, size, news)
+        _router.route(item, guid, news)
+    else:
+        log_news(log, guid, decompressed_data)
+    if _story_sink is not None:
+        _story_sink.write(item, guid, decompressed_data)
+    if _story_publisher is not None:
+        _story_publisher.publish(item, guid, size, decompressed_data)
+    _news_output_seconds.observe(time.perf_counter() - started)
 
 
 def processStatus(ws, message_json):  # process incoming status message
-    print("RECEIVED: Status Message")
-    print(json.dumps(message_json, sort_keys=True, indent=2, separators=(',', ':')))
+    log.info("RECEIVED: Status Message\n%s", JsonDump(log, message_json))
 
 
 ''' JSON-OMM Process functions '''
@@ -176,15 +198,19 @@ def process_message(ws, message_json):
                 processRefresh(ws, message_json)
     elif message_type == "Update":
         if "Domain" in message_json and message_json["Domain"] == mrn_domain:
-            processMRNUpdate(ws, message_json)
+            # Route the Update to the item stream of its ID
+            stream = _decoder.item_streams.get(message_json.get("ID"))
+            if stream is None:
+                log.warning("Update for unknown stream ID %s", message_json.get("ID"))
+                return
+            stream.updates += 1
+            processMRNUpdate(ws, stream, message_json)
     elif message_type == "Status":
         processStatus(ws, message_json)
     elif message_type == "Ping":
         pong_json = {'Type': 'Pong'}
-        ws.send(json.dumps(pong_json))
-        print("SENT:")
-        print(json.dumps(pong_json, sort_keys=True,
-                         indent=2, separators=(',', ':')))
+        ws.send(mrn_codec.dumps(pong_json))
+        log.debug("SENT:\n%s", JsonDump(log, pong_json))
 
 
 def process_login_response(ws, message_json):
@@ -210,9 +236,8 @@ def send_login_request(ws):
     login_json['Key']['Elements']['ApplicationId'] = app_id
     login_json['Key']['Elements']['Position'] = position
 
-    ws.send(json.dumps(login_json))
-    print("SENT:")
-    print(json.dumps(login_json, sort_keys=True, indent=2, separators=(',', ':')))
+    ws.send(mrn_codec.dumps(login_json))
+    log.debug("SENT:\n%s", JsonDump(log, login_json))
 
 
 ''' WebSocket Process functions '''
@@ -220,9 +245,15 @@ def send_login_request(ws):
 
 def on_message(ws, message):
     """ Called when message received, parse message into JSON for processing """
-    print("RECEIVED: ")
-    message_json = json.loads(message)
-    print(json.dumps(message_json, sort_keys=True, indent=2, separators=(',', ':')))
+    _frames.inc()
+    _frame_bytes.inc(len(message))
+    if _frame_capture is not None:
+        _frame_capture.write(message)
+    started = time.perf_counter()
+    message_json = mrn_codec.loads(message)
+    _frame_parse_seconds.observe(time.perf_counter() - started)
+    # The pretty printed message is only formatted at debug level
+    log.debug("RECEIVED: \n%s", JsonDump(log, message_json))
 
     for singleMsg in message_json:
         process_message(ws, singleMsg)
@@ -230,20 +261,33 @@ def on_message(ws, message):
 
 def on_error(ws, error):
     """ Called when websocket error has occurred """
-    print(error)
+    log.error(error)
 
 
 def on_close(ws,close_status_code, close_msg):
     """ Called when websocket is closed """
     global web_socket_open
-    print("WebSocket Closed")
+    log.info("WebSocket Closed")
     web_socket_open = False
+    log_stats()
+
+
+def log_stats():
+    """ Output the counters of each MRN item stream """
+    for stream in _decoder.item_streams:
+        log.info("%s stream %d: %s", stream.item, stream.stream_id, stream.stats())
+    if _story_sink is not None:
+        log.info("News sink: %s", _story_sink.stats())
+    if _story_archive is not None:
+        log.info("News archive: %s", _story_archive.stats())
+    if _router is not None:
+        log.info("News routing: %s", _router.stats())
 
 
 def on_open(ws):
     """ Called when handshake is complete and websocket is open, send login """
 
-    print("WebSocket successfully connected!")
+    log.info("WebSocket successfully connected!")
     global web_socket_open
     web_socket_open = True
     send_login_request(ws)
@@ -256,15 +300,32 @@ if __name__ == "__main__":
     # Get command line parameters
     try:
         opts, args = getopt.getopt(sys.argv[1:], "", [
-                                   "help", "hostname=", "port=", "app_id=", "user=", "position=", "ric="])
+                                   "help", "hostname=", "port=", "app_id=", "user=", "position=", "ric=",
+                                   "envelope_ttl=", "max_envelopes=", "max_envelope_bytes=", "decompress_mode=", "log_level=", "json=",
+                                   "sink=", "sink_dir=", "sink_batch=", "sink_rotate_bytes=", "sink_rotate_seconds=", "sink_fsync=",
+                                   "archive_dir=", "archive_segment_bytes=",
+                                   "metrics_port=", "metrics_interval=", "filter=", "subscriptions=", "capture=",
+                                   "output_queue=", "overflow=", "spill_dir=", "publish="])
     except getopt.GetoptError:
         print(
-            'Usage: market_price.py [--hostname hostname] [--port port] [--app_id app_id] [--user user] [--position position] [--ric news RIC name] [--help]')
+            'Usage: market_price.py [--hostname hostname] [--port port] [--app_id app_id] [--user user] [--position position] [--ric news RIC name[,RIC name...]] '
+            '[--envelope_ttl seconds] [--max_envelopes count] [--max_envelope_bytes bytes] [--decompress_mode stream|final] '
+            '[--log_level debug|info|warning|error] [--json auto|orjson|json] [--sink jsonl|jsonl.gz|parquet] [--sink_dir directory] '
+            '[--sink_batch count] [--sink_rotate_bytes bytes] [--sink_rotate_seconds seconds] [--sink_fsync batch|rotate|none] '
+            '[--archive_dir directory] [--archive_segment_bytes bytes] [--metrics_port port] [--metrics_interval seconds] '
+            '[--filter expression] [--subscriptions file] [--capture file] [--output_queue count] '
+            '[--overflow block|drop_oldest|spill] [--spill_dir directory] [--publish socket] [--help]')
         sys.exit(2)
     for opt, arg in opts:
         if opt in ("--help"):
             print(
-                'Usage: market_price.py [--hostname hostname] [--port port] [--app_id app_id] [--user user] [--position position] [--ric news RIC name] [--help]')
+                'Usage: market_price.py [--hostname hostname] [--port port] [--app_id app_id] [--user user] [--position position] [--ric news RIC name[,RIC name...]] '
+            '[--envelope_ttl seconds] [--max_envelopes count] [--max_envelope_bytes bytes] [--decompress_mode stream|final] '
+            '[--log_level debug|info|warning|error] [--json auto|orjson|json] [--sink jsonl|jsonl.gz|parquet] [--sink_dir directory] '
+            '[--sink_batch count] [--sink_rotate_bytes bytes] [--sink_rotate_seconds seconds] [--sink_fsync batch|rotate|none] '
+            '[--archive_dir directory] [--archive_segment_bytes bytes] [--metrics_port port] [--metrics_interval seconds] '
+            '[--filter expression] [--subscriptions file] [--capture file] [--output_queue count] '
+            '[--overflow block|drop_oldest|spill] [--spill_dir directory] [--publish socket] [--help]')
             sys.exit(0)
         elif opt in ("--hostname"):
             hostname = arg
@@ -277,16 +338,150 @@ if __name__ == "__main__":
         elif opt in ("--position"):
             position = arg
         elif opt in ("--ric"):
-            if arg not in ["MRN_STORY", "MRN_TRNA", "MRN_TRNA_DOC", "MRN_TRSI"]:
-                #print("The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRSI only")
-                print("The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRS only")
+            # Comma separated MRN RIC names are opened as item streams on the same connection
+            try:
+                mrn_items = parse_items(arg)
+            except ValueError:
+                print("The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRSI only")
+                sys.exit(2)
+        elif opt in ("--envelope_ttl"):
+            envelope_ttl = float(arg)
+        elif opt in ("--max_envelopes"):
+            max_envelopes = int(arg)
+        elif opt in ("--max_envelope_bytes"):
+            max_envelope_bytes = int(arg)
+        elif opt in ("--decompress_mode"):
+            if arg not in DECOMPRESS_MODES:
+                print("The supported decompress modes are stream or final only")
                 sys.exit(2)
-            else:
-                item = arg
+            decompress_mode = arg
+        elif opt in ("--log_level"):
+            if arg not in LOG_LEVELS:
+                print("The supported log levels are debug, info, warning or error only")
+                sys.exit(2)
+            log_level = arg
+        elif opt in ("--json"):
+            if arg not in mrn_codec.JSON_CODECS:
+                print("The supported JSON codecs are auto, orjson or json only")
+                sys.exit(2)
+            json_codec = arg
+        elif opt in ("--sink"):
+            if arg not in mrn_sinks.SINK_FORMATS:
+                print("The supported sink formats are jsonl, jsonl.gz or parquet only")
+                sys.exit(2)
+            sink_format = arg
+        elif opt in ("--sink_dir"):
+            sink_dir = arg
+        elif opt in ("--sink_batch"):
+            sink_batch = int(arg)
+        elif opt in ("--sink_rotate_bytes"):
+            sink_rotate_bytes = int(arg)
+        elif opt in ("--sink_rotate_seconds"):
+            sink_rotate_seconds = float(arg)
+        elif opt in ("--sink_fsync"):
+            if arg not in mrn_sinks.FSYNC_POLICIES:
+                print("The supported sink fsync policies are batch, rotate or none only")
+                sys.exit(2)
+            sink_fsync = arg
+        elif opt in ("--archive_dir"):
+            archive_dir = arg
+        elif opt in ("--archive_segment_bytes"):
+            archive_segment_bytes = int(arg)
+        elif opt in ("--metrics_port"):
+            metrics_port = int(arg)
+        elif opt in ("--metrics_interval"):
+            metrics_interval = float(arg)
+        elif opt in ("--filter"):
+            filter_expression = arg
+        elif opt in ("--subscriptions"):
+            subscriptions_file = arg
+        elif opt in ("--capture"):
+            capture_file = arg
+        elif opt in ("--output_queue"):
+            output_queue = int(arg)
+        elif opt in ("--overflow"):
+            if arg not in OVERFLOW_POLICIES:
+                print('The supported overflow policies are block, drop_oldest or spill only')
+                sys.exit(2)
+            overflow = arg
+        elif opt in ("--spill_dir"):
+            spill_dir = arg
+        elif opt in ("--publish"):
+            publish_path = arg
+
+    configure_logging(log_level)
+    try:
+        mrn_codec.use_codec(json_codec)
+    except ImportError as e:
+        print("{}, use --json json or install it with pip install orjson".format(e))
+        sys.exit(2)
+    log.info("JSON codec: %s", mrn_codec.codec_name)
+    if filter_expression:
+        try:
+            _news_filter = HeaderFilter(filter_expression)
+        except ValueError as e:
+            print(e)
+            sys.exit(2)
+        log.info("News filter: %s", _news_filter)
+    _decoder = MRNDecoder(mrn_items, envelope_ttl, max_envelopes, max_envelope_bytes, decompress_mode,
+                          news_filter=_news_filter)
+    if subscriptions_file:
+        _router = TopicRouter()
+        try:
+            load_subscriptions(subscriptions_file, _router, log)
+        except (OSError, ValueError) as e:
+            print("Cannot read the subscriptions file {}: {}".format(subscriptions_file, e))
+            sys.exit(2)
+        log.info("News routing: %s", _router.stats())
+        REGISTRY.counter('mrn_routed_deliveries_total', 'News delivered to the subscribers of their codes',
+                         lambda: _router.deliveries)
+    if sink_format:
+        try:
+            _story_sink = mrn_sinks.open_sink(sink_format, directory=sink_dir, prefix='mrn_rtds', batch_size=sink_batch,
+                                              rotate_bytes=sink_rotate_bytes, rotate_seconds=sink_rotate_seconds,
+                                              fsync=sink_fsync)
+        except ImportError as e:
+            print("{}, install it with pip install pyarrow".format(e))
+            sys.exit(2)
+        log.info("News sink: %s files in %s", sink_format, sink_dir)
+    if archive_dir:
+        _story_archive = StoryArchive(archive_dir, archive_segment_bytes)
+    if capture_file:
+        try:
+            _frame_capture = FrameCapture(capture_file)
+        except OSError as e:
+            print("Cannot write the capture file {}: {}".format(capture_file, e))
+            sys.exit(2)
+        log.info("Capturing the received frames to %s", capture_file)
+    if publish_path:
+        try:
+            _story_publisher = StoryPublisher(publish_path)
+        except OSError as e:
+            print("Cannot publish the news on {}: {}".format(publish_path, e))
+            sys.exit(2)
+        _story_publisher.register_metrics(REGISTRY)
+        log.info("Publishing the news on %s", publish_path)
+    if output_queue > 0:
+        try:
+            _news_buffer = NewsBuffer(output_news, output_queue, overflow, spill_dir, 'mrn_rtds')
+        except OSError as e:
+            print("Cannot create the spill file in {}: {}".format(spill_dir, e))
+            sys.exit(2)
+        _news_buffer.register_metrics(REGISTRY)
+        log.info("News output queue: %d news, %s overflow policy", output_queue, overflow)
+    _decoder.item_streams.register_metrics(REGISTRY)
+    if metrics_port:
+        try:
+            mrn_metrics.start_http_server(metrics_port)
+        except OSError as e:
+            print("Cannot serve the metrics on port {}: {}".format(metrics_port, e))
+            sys.exit(2)
+    if metrics_interval > 0:
+        mrn_metrics.SummaryReporter(metrics_interval).start()
 
     # Start websocket handshake
     ws_address = "ws://{}:{}/WebSocket".format(hostname, port)
-    print("Connecting to WebSocket " + ws_address + " ...")
+    log.info("Connecting to WebSocket %s ...", ws_address)
     web_socket_app = websocket.WebSocketApp(ws_address, header=['User-Agent: Python'],
                                             on_message=on_message,
                                             on_error=on_error,
@@ -303,3 +498,17 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         web_socket_app.close()
+        if _news_buffer is not None:
+            # the buffered news are written before the sink is closed
+            _news_buffer.close()
+            log.info("News output queue: %s", _news_buffer.stats())
+        if _story_sink is not None:
+            _story_sink.close()
+        if _story_archive is not None:
+            _story_archive.close()
+        if _frame_capture is not None:
+            _frame_capture.close()
+            log.info("Frame capture: %s", _frame_capture.stats())
+        if _story_publisher is not None:
+            _story_publisher.close()
+            log.info("News publisher: %s", _story_publisher.stats())
@@ -12,14 +12,34 @@ import sys
 import time
 import getopt
 import socket
-import json
+import signal
+import random
 import threading
 from datetime import datetime
-import base64
 import zlib
+import logging
 import requests
 import websocket
 from dotenv import load_dotenv
+import mrn_codec
+from mrn_logging import configure_logging, JsonDump, log_news, log_decoded_news, LOG_LEVELS, DEFAULT_LOG_LEVEL
+from mrn_pipeline import DecodePipeline, contains_ping, PIPELINE_EXECUTORS, DEFAULT_PIPELINE_WORKERS, \
+    DEFAULT_PIPELINE_QUEUE_SIZE
+from mrn_reassembly import DEFAULT_ENVELOPE_TTL, DEFAULT_MAX_ENVELOPES, DEFAULT_MAX_ENVELOPE_BYTES, \
+    DECOMPRESS_MODES, DEFAULT_DECOMPRESS_MODE
+from mrn_streams import parse_items
+from mrn_decoder import MRNDecoder
+import mrn_sinks
+from mrn_archive import StoryArchive, DEFAULT_SEGMENT_BYTES
+import mrn_metrics
+from mrn_metrics import REGISTRY
+from mrn_dedup import open_cache, DEDUP_KINDS, DEFAULT_DEDUP_SIZE, DEFAULT_DEDUP_TTL, DEFAULT_DEDUP_FP_RATE
+from mrn_filter import HeaderFilter
+from mrn_router import TopicRouter, load_subscriptions
+from mrn_capture import FrameCapture
+from mrn_buffer import NewsBuffer, OVERFLOW_POLICIES, DEFAULT_OVERFLOW_POLICY, DEFAULT_SPILL_DIR
+from mrn_fanout import StoryPublisher
+from mrn_endpoints import EndpointRanker, load_discovery, save_discovery, DEFAULT_DISCOVERY_TTL, DEFAULT_PROBE_INTERVAL
 
 # Global Default Variables
 app_id = '256'
@@ -42,8 +62,77 @@ curTS = 0
 tokenTS = 0
 
 mrn_domain = 'NewsTextAnalytics'
-mrn_item = 'MRN_STORY'
-_news_envelopes = []
+mrn_items = ['MRN_STORY']
+envelope_ttl = DEFAULT_ENVELOPE_TTL
+max_envelopes = DEFAULT_MAX_ENVELOPES
+max_envelope_bytes = DEFAULT_MAX_ENVELOPE_BYTES
+decompress_mode = DEFAULT_DECOMPRESS_MODE
+log_level = DEFAULT_LOG_LEVEL
+json_codec = mrn_codec.DEFAULT_JSON_CODEC
+pipeline_executor = ''
+pipeline_workers = DEFAULT_PIPELINE_WORKERS
+pipeline_queue_size = DEFAULT_PIPELINE_QUEUE_SIZE
+connections = 1
+sink_format = ''
+sink_dir = mrn_sinks.DEFAULT_SINK_DIR
+sink_batch = mrn_sinks.DEFAULT_BATCH_SIZE
+sink_rotate_bytes = mrn_sinks.DEFAULT_ROTATE_BYTES
+sink_rotate_seconds = mrn_sinks.DEFAULT_ROTATE_SECONDS
+sink_fsync = mrn_sinks.DEFAULT_FSYNC_POLICY
+archive_dir = ''
+archive_segment_bytes = DEFAULT_SEGMENT_BYTES
+dedup = ''
+dedup_size = DEFAULT_DEDUP_SIZE
+dedup_ttl = DEFAULT_DEDUP_TTL
+dedup_fp_rate = DEFAULT_DEDUP_FP_RATE
+dedup_file = ''
+metrics_port = 0
+metrics_interval = 0.0
+discovery_cache = ''
+discovery_ttl = DEFAULT_DISCOVERY_TTL
+probe_interval = DEFAULT_PROBE_INTERVAL
+# Jittered exponential backoff of the reconnections: a random delay up to
+# reconnect_delay * 2^attempt seconds, capped at reconnect_max_delay
+reconnect_delay = 0.1
+reconnect_max_delay = 30.0
+filter_expression = ''
+subscriptions_file = ''
+capture_file = ''
+output_queue = 0
+overflow = DEFAULT_OVERFLOW_POLICY
+spill_dir = DEFAULT_SPILL_DIR
+publish_path = ''
+
+# File sink of the completed news shared by the sessions, None to output them on the console only
+story_sink = None
+# Archive of the completed news compressed data shared by the sessions, None to keep nothing
+story_archive = None
+# Header filter of the news, None to output all the news
+news_filter = None
+# Topic router of the decoded news to the subscribers of their codes, shared by the sessions, None to route nothing
+news_router = None
+# Capture of the frames received by the sessions for the mrn_capture.py replay, None to capture nothing
+frame_capture = None
+# Publisher of the decoded news to the local subscriber processes, shared by the sessions, None to publish nothing
+story_publisher = None
+# Endpoints ranked by connect latency, the sessions connect and fail over to the first ranked endpoints
+endpoint_ranker = None
+# Renews the access token, the sessions get a new token before reconnecting when it is about to expire
+token_manager = None
+# The WebSocket sessions, a reconnecting session fails over to an endpoint not used by the other sessions
+sessions = []
+# Set by shutdown(), the application outputs the remaining news and closes its files once
+stopped = False
+
+# Access token requests, the sessions metrics are registered by each WebSocketSession
+token_requests = REGISTRY.counter('mrn_token_requests_total', 'Access token requests', result='success')
+token_failures = REGISTRY.counter('mrn_token_requests_total', 'Access token requests', result='failure')
+token_request_seconds = REGISTRY.histogram('mrn_token_request_seconds', 'Access token request time')
+
+# The authentication and service discovery requests reuse the keep-alive connections of one HTTP session
+http_session = requests.Session()
+
+log = logging.getLogger('mrn_console_rto_v2')
 
 # Config the encoding for the console
 sys.stdin.reconfigure(encoding='utf-8')
@@ -58,132 +147,160 @@ class WebSocketSession:
     web_socket_open = False
     host = ''
     force_disconnected = False
-    reconnecting = True
+    reconnecting = False
     wst = None 
-
-    def __init__(self, name, host):
+    pipeline = None
+    news_buffer = None
+    logged_in = False
+    # Failed connections since the last successful subscription, and the time the connection was lost
+    reconnect_attempts = 0
+    disconnected_time = None
+
+    def __init__(self, name, host, pipeline_executor='', pipeline_workers=DEFAULT_PIPELINE_WORKERS,
+                 pipeline_queue_size=DEFAULT_PIPELINE_QUEUE_SIZE, news_cache=None):
         self.session_name = name
         self.host = host
+        # One stream ID, envelope store and counters per MRN item, all opened on this connection, and their decoding.
+        # The completed news keys are shared by the hot-standby sessions, the first complete copy of a news wins
+        self.decoder = MRNDecoder(mrn_items, envelope_ttl, max_envelopes, max_envelope_bytes, decompress_mode,
+                                  news_filter=news_filter, news_cache=news_cache, name=name)
+        self.item_streams = self.decoder.item_streams
+        # Bounded buffer of the completed news written by the output thread of the session
+        if output_queue > 0:
+            self.news_buffer = NewsBuffer(self._write_news, output_queue, overflow, spill_dir, name)
+        # In the pipeline mode the WebSocket thread only answers Ping and queues the received frames
+        if pipeline_executor:
+            self.pipeline = DecodePipeline(self._process_message, self._output_news, pipeline_executor,
+                                           pipeline_workers, pipeline_queue_size, name)
+        # Counters and latency histograms, exported with the --metrics_port and --metrics_interval options
+        self.frames = REGISTRY.counter('mrn_frames_total', 'WebSocket frames received', session=name)
+        self.frame_bytes = REGISTRY.counter('mrn_frame_bytes_total', 'WebSocket frames bytes received', session=name)
+        self.frame_parse_seconds = REGISTRY.histogram('mrn_frame_parse_seconds', 'JSON parsing time of a received frame',
+                                                      session=name)
+        self.news_output_seconds = REGISTRY.histogram('mrn_news_output_seconds',
+                                                      'Output time of a completed news (JSON parsing, console and sink)',
+                                                      session=name)
+        self.connects = REGISTRY.counter('mrn_connects_total', 'WebSocket connections and reconnections', session=name)
+        self.token_reissues = REGISTRY.counter('mrn_token_reissues_total', 'Access tokens reissued on the Login stream',
+                                               session=name)
+        self.resubscribe_seconds = REGISTRY.histogram('mrn_resubscribe_seconds',
+                                                      'Time from a connection loss to the MRN item Refresh',
+                                                      session=name)
+        # Set by disconnect(), interrupts a reconnection delay
+        self._stopped = threading.Event()
+        REGISTRY.gauge('mrn_connected', 'WebSocket connection open', lambda: self.web_socket_open, session=name)
+        self.item_streams.register_metrics(REGISTRY, session=name)
+        if self.news_buffer is not None:
+            self.news_buffer.register_metrics(REGISTRY, session=name)
+        if self.pipeline is not None:
+            REGISTRY.gauge('mrn_pipeline_frames', 'Received frames waiting for the pipeline assemble thread',
+                           self.pipeline.frames.qsize, session=name)
+            REGISTRY.gauge('mrn_pipeline_decoding', 'Completed news waiting for the pipeline output thread',
+                           self.pipeline.decoding.qsize, session=name)
 
     # --------------------MRN Process Code --------------------------------- #
     def decode_fieldlist(self, fieldlist_dict):
         """Function iterates and decodes fieldlist object"""
         for key, value in fieldlist_dict.items():
-            print(f'Name = {key}: Value = {value}')
+            log.debug('Name = %s: Value = %s', key, value)
 
 
     def send_mrn_request(self):
-        """ Create and send MRN request """
-        mrn_req_json = {
-            'ID': 2,
-            'Domain': mrn_domain,
-            'Key': {
-                'Name': mrn_item,
-                'Service': service
-            }
-        }
+        """ Create and send the MRN item requests, one stream ID per item in a single frame """
+        mrn_req_json = [stream.request_json(service) for stream in self.item_streams]
 
-        self.web_socket_app.send(json.dumps(mrn_req_json))
-        print('SENT:')
-        print(json.dumps(mrn_req_json, sort_keys=True, indent=2, separators=(',', ':')))
+        self.web_socket_app.send(mrn_codec.dumps(mrn_req_json))
+        log.debug('SENT:\n%s', JsonDump(log, mrn_req_json))
 
     def process_refresh(self, message_json):
         """Function process Refresh message"""
-        print('RECEIVED: Refresh Message')
-        self.decode_fieldlist(message_json['Fields'])
-
-    def process_mrn_update(self, message_json):  
-        """Function process Update Message for MRN domain data"""
-        fields_data = message_json['Fields']
+        log.info('RECEIVED: Refresh Message for %s', message_json.get('Key', {}).get('Name'))
+        if self.disconnected_time is not None:
+            # the items are subscribed again, the next connection loss starts a new backoff
+            resubscribed = time.monotonic() - self.disconnected_time
+            self.resubscribe_seconds.observe(resubscribed)
+            log.info('%s %s: Resubscribed %.0f ms after the connection loss', datetime.now(), self.session_name,
+                     resubscribed * 1000)
+            self.disconnected_time = None
+        self.reconnect_attempts = 0
+        if log.isEnabledFor(logging.DEBUG):
+            self.decode_fieldlist(message_json['Fields'])
+
+    def process_mrn_update(self, stream, message_json):
+        """Function process Update Message for MRN domain data of an item stream"""
         # Dump the FieldList first (for informational purposes)
         # self.decode_fieldlist(message_json["Fields"])
 
-        # declare variables
-        tot_size = 0
-        guid = None
+        # The decoder filters, de-duplicates and assembles the fragments, the news is completed with its last fragment
+        completed = self.decoder.assemble(stream, message_json['Fields'])
+        if completed is None:
+            return None
+        guid = completed.guid
 
         try:
-            # Get data for all required fields
-            fragment = base64.b64decode(fields_data['FRAGMENT'])
-            frag_num = int(fields_data['FRAG_NUM'])
-            guid = fields_data['GUID']
-            mrn_src = fields_data['MRN_SRC']
-
-            #print("GUID  = %s" % guid)
-            #print("FRAG_NUM = %d" % frag_num)
-            #print("MRN_SRC = %s" % mrn_src)
-
-            if frag_num > 1:  # We are now processing more than one part of an envelope - retrieve the current details
-                guid_index = next((index for (index, d) in enumerate(_news_envelopes) if d['GUID'] == guid), None)
-                envelop = _news_envelopes[guid_index]
-                if envelop and envelop['data']['MRN_SRC'] == mrn_src and frag_num == envelop['data']['FRAG_NUM'] + 1:
-                    print(f'process multiple fragments for guid {envelop["GUID"]}')
-
-                    #print(f'fragment before merge = {len(envelop["data"]["FRAGMENT"])}')
-                    # Merge incoming data to existing news envelop and getting FRAGMENT and TOT_SIZE data to local variables
-                    fragment = envelop['data']['FRAGMENT'] = envelop['data']['FRAGMENT'] + fragment
-                    envelop['data']['FRAG_NUM'] = frag_num
-                    tot_size = envelop['data']['tot_size']
-                    print(f'TOT_SIZE = {tot_size}')
-                    print(f'Current FRAGMENT length = {len(fragment)}')
-
-                    # The multiple fragments news are not completed, waiting.
-                    if tot_size != len(fragment):
-                        return None
-                    # The multiple fragments news are completed, delete associate GUID envelop
-                    elif tot_size == len(fragment):
-                        del _news_envelopes[guid_index]
-                else:
-                    print(f'Error: Cannot find fragment for GUID {guid} with matching FRAG_NUM or MRN_SRC {mrn_src}')
-                    return None
-            else:  # FRAG_NUM = 1 The first fragment
-                tot_size = int(fields_data['TOT_SIZE'])
-                print(f'FRAGMENT length = {len(fragment)}')
-                # The fragment news is not completed, waiting and add this news data to envelop object.
-                if tot_size != len(fragment):
-                    print(f'Add new fragments to news envelop for guid {guid}')
-                    _news_envelopes.append({  # the envelop object is a Python dictionary with GUID as a key and other fields are data
-                        'GUID': guid,
-                        'data': {
-                            'FRAGMENT': fragment,
-                            'MRN_SRC': mrn_src,
-                            'FRAG_NUM': frag_num,
-                            "tot_size": tot_size
-                        }
-                    })
-                    return None
-
+            if story_archive is not None:
+                # the news is archived as received, it is decompressed again only when read from the archive
+                story_archive.append(stream.item, guid, completed.fragment)
+            if self.pipeline is not None:
+                # the pipeline workers decompress and parse the news, the stream mode news are already decompressed
+                data, compressed = completed.payload()
+                self.pipeline.submit_news(stream.item, guid, data, compressed)
+                return None
             # News Fragment(s) completed, decompress and print data as JSON to console
-            if tot_size == len(fragment):
-                print(f'decompress News FRAGMENT(s) for GUID {guid}')
-                decompressed_data = zlib.decompress(fragment, zlib.MAX_WBITS | 32)
-                print(f'News = {json.loads(decompressed_data)}')
-
-        except KeyError as keyerror:
-            print('KeyError exception: ', keyerror)
-        except IndexError as indexerror:
-            print('IndexError exception: ', indexerror)
-        except binascii.Error as b64error:
-            print('base64 decoding exception:', b64error)
+            decompressed_data = completed.decompress()
+            self._output_news(stream.item, guid, len(decompressed_data), decompressed_data)
+
         except zlib.error as error:
-            print('zlib decompressing exception: ', error)
+            stream.errors += 1
+            log.warning('zlib decompressing exception: %s', error)
         # Some console environments like Windows may encounter this unicode display as a limitation of OS
         except UnicodeEncodeError as encodeerror:
-            print(f'UnicodeEncodeError exception. Cannot decode unicode character for {guid} in this environment: ', encodeerror)
+            log.warning('UnicodeEncodeError exception. Cannot decode unicode character for %s in this environment: %s', guid, encodeerror)
         except Exception as e:
-            print('exception: ', sys.exc_info()[0])
+            stream.errors += 1
+            log.warning('exception: %s', sys.exc_info()[0])
 
+    def _output_news(self, item, guid, size, news):
+        """
+            Output a completed news, called on the WebSocket thread or on the pipeline output thread. news is
+            the decompressed JSON data, or the news parsed by the pipeline workers
+        """
+        if self.news_buffer is not None:
+            # the output thread outputs the news, a slow console or sink does not hold the session
+            self.news_buffer.put(item, guid, size, news)
+        else:
+            self._write_news(item, guid, size, news)
+
+    def _write_news(self, item, guid, size, news):
+        """ Output a completed news on the console, to its subscribers, to the sink and to the local subscribers """
+        started = time.perf_counter()
+        # The full news at debug level, one line per news at info level
+        if not isinstance(news, bytes):
+            log_decoded_news(log, guid, size, news)
+        elif news_router is not None:
+            # the news is parsed once for the output and the routing
+            news = mrn_codec.loads(news)
+            log_decoded_news(log, guid, size, news)
+        else:
+            log_news(log, guid, news)
+        if news_router is not None:
+            news_router.route(item, guid, news)
+        if story_sink is not None:
+            story_sink.write(item, guid, news, size)
+        if story_publisher is not None:
+            story_publisher.publish(item, guid, size, news)
+        self.news_output_seconds.observe(time.perf_counter() - started)
 
     def process_status(self, message_json):  # process incoming status message
         """Function process incoming status message"""
-        print('RECEIVED: Status Message')
-        print(json.dumps(message_json, sort_keys=True, indent=2, separators=(',', ':')))
+        log.info('RECEIVED: Status Message\n%s', JsonDump(log, message_json))
 
     # ---JSON-OMM Process functions ---#
-    def _send_login_request(self, authn_token):
+    def _send_login_request(self, authn_token, refresh=True):
         """
             Send login request with authentication token.
-            Used both for the initial login and subsequent reissues to update the authentication token
+            Used both for the initial login and subsequent reissues to update the authentication token,
+            a reissue does not request a Login Refresh message
         """
         login_json = {
             'ID': 1,
@@ -201,24 +318,42 @@ class WebSocketSession:
         login_json['Key']['Elements']['ApplicationId'] = app_id
         login_json['Key']['Elements']['Position'] = position
         login_json['Key']['Elements']['AuthenticationToken'] = authn_token
+        if not refresh:
+            login_json['Refresh'] = False
 
-        self.web_socket_app.send(json.dumps(login_json))
-        print(str(datetime.now()) + " SENT on " + self.session_name + ":")
-        print(json.dumps(login_json, sort_keys=True, indent=2, separators=(',', ':')))
+        self.web_socket_app.send(mrn_codec.dumps(login_json))
+        log.debug('%s SENT on %s:\n%s', datetime.now(), self.session_name, JsonDump(log, login_json))
 
     def _process_login_response(self, message_json):
         """ Send item request upon login success """
         if message_json['Type'] == "Status" and message_json['Domain'] == "Login" and \
                 (message_json['State']['Stream'] != "Open" or message_json['State']['Data'] != "Ok"):
-            print(f'{str(datetime.now())} Error: Login failed, received status message, closing: StreamState={message_json["State"]["Stream"]}, DataState={message_json["State"]["Data"]}')
+            log.error('%s Error: Login failed, received status message, closing: StreamState=%s, DataState=%s',
+                      datetime.now(), message_json['State']['Stream'], message_json['State']['Data'])
             if self.web_socket_open:
                 self.web_socket_app.close()
             self.force_disconnected = True
             return
+        if self.logged_in:
+            # the Login stream was already open, a Refresh of a token reissue does not request the items again
+            log.debug('%s %s: Login reissue accepted', datetime.now(), self.session_name)
+            return
+        self.logged_in = True
 
         #self._send_market_price_request(ric)
         self.send_mrn_request()
 
+    def reissue_token(self, authn_token):
+        """ Send a new access token on the open Login stream, the connection and item streams are kept """
+        if not (self.web_socket_open and self.logged_in):
+            return
+        try:
+            self._send_login_request(authn_token, refresh=False)
+            self.token_reissues.inc()
+            log.info('%s %s: Access token reissued on the Login stream', datetime.now(), self.session_name)
+        except websocket.WebSocketException as e:
+            log.warning('%s %s: Cannot reissue the access token: %s', datetime.now(), self.session_name, e)
+
     def _process_message(self, message_json):
         """ Parse at high level and output JSON of message """
         message_type = message_json['Type']
@@ -232,77 +367,152 @@ class WebSocketSession:
                     self.process_refresh(message_json)
         elif message_type == 'Update':
             if 'Domain' in message_json and message_json['Domain'] == mrn_domain:
-                self.process_mrn_update(message_json)
+                # Route the Update to the item stream of its ID
+                stream = self.item_streams.get(message_json.get('ID'))
+                if stream is None:
+                    log.warning('%s: Update for unknown stream ID %s', self.session_name, message_json.get('ID'))
+                    return
+                stream.updates += 1
+                self.process_mrn_update(stream, message_json)
         elif message_type == 'Status':
             self.process_status(message_json)
         elif message_type == 'Ping':
             pong_json = {'Type': 'Pong'}
-            self.web_socket_app.send(json.dumps(pong_json))
-            #print(str(datetime.now()) + " SENT on " + self.session_name + ":")
-            print(f'{str(datetime.now())} SENT on {self.session_name}:')
-            print(json.dumps(pong_json, sort_keys=True, indent=2, separators=(',', ':')))
+            self.web_socket_app.send(mrn_codec.dumps(pong_json))
+            log.debug('%s SENT on %s:\n%s', datetime.now(), self.session_name, JsonDump(log, pong_json))
 
     # Callback events from WebSocketApp
     def _on_message(self, ws, message):
         """ Called when message received, parse message into JSON for processing """
-        #print(str(datetime.now()) + " RECEIVED on " + self.session_name + ":")
-        print(f'{str(datetime.now())} RECEIVED on {self.session_name}:')
-        message_json = json.loads(message)
-        print(json.dumps(message_json, sort_keys=True, indent=2, separators=(',', ':')))
+        self.frames.inc()
+        self.frame_bytes.inc(len(message))
+        if frame_capture is not None:
+            frame_capture.write(message, self.session_name)
+        if self.pipeline is not None:
+            self._queue_message(message)
+            return
+        started = time.perf_counter()
+        message_json = mrn_codec.loads(message)
+        self.frame_parse_seconds.observe(time.perf_counter() - started)
+        # The pretty printed message is only formatted at debug level
+        log.debug('%s RECEIVED on %s:\n%s', datetime.now(), self.session_name, JsonDump(log, message_json))
 
         for single_msg in message_json:
             self._process_message(single_msg)
 
+    def _queue_message(self, message):
+        """ Answer Ping messages on the WebSocket thread and queue the other messages for the pipeline """
+        log.debug('%s RECEIVED on %s:\n%s', datetime.now(), self.session_name, message)
+        if not contains_ping(message):
+            self.pipeline.put_frame(message)
+            return
+        messages = []
+        for single_msg in mrn_codec.loads(message):
+            if single_msg.get('Type') == 'Ping':
+                self._process_message(single_msg)
+            else:
+                messages.append(single_msg)
+        if messages:
+            self.pipeline.put_frame(messages)
+
     def _on_error(self, ws, error):
         """ Called when websocket error has occurred """
-        #print(str(datetime.now()) + " " + str(self.session_name) + ": Error: "+ str(error))
-        print(f'{str(datetime.now())} {str(self.session_name)}: Error {str(error)}')
+        log.error('%s %s: Error %s', datetime.now(), self.session_name, error)
 
     def _on_close(self, ws, close_status_code, close_message):
         """ Called when websocket is closed """
         self.web_socket_open = False
-        #print(str(datetime.now()) + " " + str(self.session_name) + ": WebSocket Closed\n")
-        print(f'{str(datetime.now())} {str(self.session_name)}: WebSocket Closed\n')
+        if self.disconnected_time is None:
+            self.disconnected_time = time.monotonic()
+        log.info('%s %s: WebSocket Closed\n', datetime.now(), self.session_name)
+        # disconnect() outputs the counters once the pipeline is drained
+        if not self.force_disconnected:
+            self.log_stats()
+
+    def log_stats(self):
+        """ Output the counters of each MRN item stream """
+        for stream in self.item_streams:
+            log.info('%s %s stream %d: %s', self.session_name, stream.item, stream.stream_id, stream.stats())
 
     def _on_open(self, ws):
         """ Called when handshake is complete and websocket is open, send login """
 
-        #print(str(datetime.now()) + " " + str(self.session_name) + ": WebSocket successfully connected!")
-        print(f'{str(datetime.now())} {str(self.session_name)}: WebSocket successfully connected!')
+        log.info('%s %s: WebSocket successfully connected!', datetime.now(), self.session_name)
         self.web_socket_open = True
         self.reconnecting = False
+        self.logged_in = False
         self._send_login_request(auth_token)
 
     # Operations
     def connect(self):
-        ''' Connect to RTO WebSocket '''
-        # Start websocket handshake
-        ws_address = f'wss://{self.host}/WebSocket'
-        #websocket.enableTrace(True)
-        if (not self.web_socket_app) or self.reconnecting:
+        ''' Connect to RTO WebSocket, the session thread reconnects as soon as the connection is lost '''
+        if self.pipeline is not None:
+            self.pipeline.start()
+        if self.wst is None:
+            # Each session runs its own event loop thread, so the other sessions keep being supervised
+            self.wst = threading.Thread(target=self._run, name=self.session_name, daemon=True)
+            self.wst.start()
+
+    def _run(self):
+        """ Run the WebSocket event loop, and a new one after a backoff delay when it ends, until disconnect() """
+        while not self.force_disconnected:
+            if self.reconnecting:
+                # jittered exponential backoff, the sessions do not all reconnect at the same time
+                delay = random.uniform(0, min(reconnect_max_delay, reconnect_delay * 2 ** min(self.reconnect_attempts, 30)))
+                self.reconnect_attempts += 1
+                log.info('%s %s: Reconnecting in %.3f seconds (attempt %d)', datetime.now(), self.session_name, delay,
+                         self.reconnect_attempts)
+                if self._stopped.wait(delay):
+                    break
+                if not self._prepare_reconnect():
+                    continue
+            ws_address = f'wss://{self.host}/WebSocket'
+            log.info('%s %s: %s WebSocket to %s ...', datetime.now(), self.session_name,
+                     'Reconnecting' if self.reconnecting else 'Connecting', ws_address)
+            #websocket.enableTrace(True)
             self.web_socket_app = websocket.WebSocketApp(ws_address, 
                                                      on_message=self._on_message,
                                                      on_error=self._on_error,
                                                      on_close=self._on_close,
                                                      on_open=self._on_open,
                                                      subprotocols=['tr_json2'])
-        # Event loop
-        if not self.wst:
-            print(f'{str(datetime.now())} {str(self.session_name)}: Connecting WebSocket to {ws_address} ...')
-            self.wst = threading.Thread(target=self.web_socket_app.run_forever, kwargs={'sslopt': {'check_hostname': False}})
-            self.wst.daemon = True
-            self.wst.start()
-        elif self.reconnecting and not self.force_disconnected:
-            print(f'{str(datetime.now())} {str(self.session_name)}: Reconnecting WebSocket to {ws_address} ...')
-            self.web_socket_app.run_forever()
-
+            self.connects.inc()
+            # Returns when the connection is closed or could not be opened
+            self.web_socket_app.run_forever(sslopt={'check_hostname': False})
+            self.web_socket_open = False
+            if self.disconnected_time is None:
+                self.disconnected_time = time.monotonic()
+            self.reconnecting = True
+
+    def _prepare_reconnect(self):
+        """ Renew the access token if it is about to expire and select the endpoint, False to wait again """
+        if token_manager is not None and token_manager.refresh_delay() <= 0 and token_manager.refresh() is None:
+            log.error('%s %s: Failed authentication with Delivery Platform', datetime.now(), self.session_name)
+            return False
+        if endpoint_ranker is not None:
+            # Fail over to the first ranked endpoint which is not used by the other open sessions
+            endpoint_ranker.mark_failed(self.host)
+            endpoint = endpoint_ranker.best({session.host for session in sessions if session.web_socket_open})
+            if endpoint != self.host:
+                log.info('%s %s: Failing over from %s to %s', datetime.now(), self.session_name, self.host, endpoint)
+                self.host = endpoint
+        return True
 
     def disconnect(self):
         """Function disconnect the WebSocket connection"""
         self.force_disconnected = True
+        self._stopped.set()
         if self.web_socket_open:
-            print(str(datetime.now()) + " " + self.session_name + ": Closing WebSocket\n")
+            log.info('%s %s: Closing WebSocket\n', datetime.now(), self.session_name)
             self.web_socket_app.close()
+        if self.pipeline is not None:
+            # Output the news of the frames already received
+            self.pipeline.stop()
+        if self.news_buffer is not None:
+            # Output the buffered and spilled news
+            self.news_buffer.close()
+            log.info('%s news output queue: %s', self.session_name, self.news_buffer.stats())
+        self.log_stats()
 
 
 def query_service_discovery(url=None):
@@ -312,71 +522,78 @@ def query_service_discovery(url=None):
     if url is None:
         url = discovery_url
 
-    print(f'\n{str(datetime.now())}Sending Delivery Platform service discovery request to {url}...\n')
+    log.info('\n%s Sending Delivery Platform service discovery request to %s...\n', datetime.now(), url)
     try:
-        r = requests.get(url, 
+        r = http_session.get(url, 
                          headers={'Authorization': f'Bearer {auth_token}'}, 
                          params={'transport': 'websocket'}, 
                          allow_redirects=False , timeout= 45)
 
     except requests.exceptions.RequestException as e:
-        print('Delivery Platform service discovery exception failure:', e)
+        log.error('Delivery Platform service discovery exception failure: %s', e)
         return False
 
     if r.status_code == 200:
         # Authentication was successful. Deserialize the response.
         response_json = r.json()
-        print(str(datetime.now()) + " Delivery Platform Service discovery succeeded." + \
-                " RECEIVED:")
-        print(json.dumps(response_json, sort_keys=True, indent=2, separators=(',', ':')))
-
-        for index in range(len(response_json['services'])):
-            if not response_json['services'][index]['location'][0].startswith(region):
-                continue
-
-
-            if len(response_json['services'][index]['location']) >= 2:
-                hostList.append(response_json['services'][index]['endpoint'] + ":" +
-                                str(response_json['services'][index]['port']))
-                continue
-            if len(response_json['services'][index]['location']) == 1:
-                backupHostList.append(response_json['services'][index]['endpoint'] + ":" +
-                                str(response_json['services'][index]['port']))
-                continue
-
-
-        if len(hostList) == 0:
-            if len(backupHostList) > 0:
-                for hostIndex in range(len(backupHostList)):
-                    hostList.append(backupHostList[hostIndex])
-            else:
-                print(f'The region: {region} is not present in list of endpoints')
-                sys.exit(1)
-
+        log.info('%s Delivery Platform Service discovery succeeded.', datetime.now())
+        log.debug('RECEIVED:\n%s', JsonDump(log, response_json))
+        if discovery_cache:
+            save_discovery(discovery_cache, discovery_url, response_json)
+        process_service_discovery(response_json)
         return True
 
     elif r.status_code in [ 301, 302, 307, 308 ]:
         # Perform URL redirect
-        print('Delivery Platform service discovery HTTP code:', r.status_code, r.reason)
+        log.info('Delivery Platform service discovery HTTP code: %s %s', r.status_code, r.reason)
         new_host = r.headers['Location']
         if new_host != None:
-            print('Perform URL redirect to ', new_host)
+            log.info('Perform URL redirect to %s', new_host)
             return query_service_discovery(new_host)
         return False
     elif r.status_code in [ 403, 404, 410, 451 ]:
         # Stop trying the request
-        print('Delivery Platform service discovery HTTP code:', r.status_code, r.reason)
-        print('Unrecoverable error when performing service discovery: stopped retrying request')
+        log.error('Delivery Platform service discovery HTTP code: %s %s', r.status_code, r.reason)
+        log.error('Unrecoverable error when performing service discovery: stopped retrying request')
         return False
     else:
         # Retry request with an appropriate delay: 
-        print('Delivery Platform service discovery HTTP code:', r.status_code, r.reason)
+        log.warning('Delivery Platform service discovery HTTP code: %s %s', r.status_code, r.reason)
         time.sleep(5)
         # CAUTION: This is sample code with infinite retries.
-        print('Retrying the service discovery request')
+        log.warning('Retrying the service discovery request')
         return query_service_discovery()
 
 
+def process_service_discovery(response_json):
+    """
+        Fill hostList and backupHostList with the endpoints of the region, from a service discovery
+        response received or read from the --discovery_cache file.
+    """
+    for index in range(len(response_json['services'])):
+        if not response_json['services'][index]['location'][0].startswith(region):
+            continue
+
+
+        if len(response_json['services'][index]['location']) >= 2:
+            hostList.append(response_json['services'][index]['endpoint'] + ":" +
+                            str(response_json['services'][index]['port']))
+            continue
+        if len(response_json['services'][index]['location']) == 1:
+            backupHostList.append(response_json['services'][index]['endpoint'] + ":" +
+                            str(response_json['services'][index]['port']))
+            continue
+
+
+    if len(hostList) == 0:
+        if len(backupHostList) > 0:
+            for hostIndex in range(len(backupHostList)):
+                hostList.append(backupHostList[hostIndex])
+        else:
+            log.error('The region: %s is not present in list of endpoints', region)
+            sys.exit(1)
+
+
 def get_auth_token(url=None):
     """
         Retrieves an authentication token.
@@ -387,52 +604,155 @@ def get_auth_token(url=None):
 
     data = {'grant_type': 'client_credentials', 'scope': scope, 'client_id': clientid, 'client_secret': client_secret}
 
-    print(f'\n{str(datetime.now())}Sending authentication request with client credentials to {url} ...\n')
+    log.info('\n%s Sending authentication request with client credentials to %s ...\n', datetime.now(), url)
+    started = time.perf_counter()
     try:
         # Request with auth for https protocol    
-        r = requests.post(url,
+        r = http_session.post(url,
                 headers={'Accept' : 'application/json'},
                           data=data,
                           verify=True,
                           allow_redirects=False, timeout= 45)
 
     except requests.exceptions.RequestException as e:
-        print('Delivery Platform authentication exception failure:', e)
+        token_failures.inc()
+        log.error('Delivery Platform authentication exception failure: %s', e)
         return None, None
+    token_request_seconds.observe(time.perf_counter() - started)
+    if r.status_code != 200:
+        token_failures.inc()
 
     if r.status_code == 200:
+        token_requests.inc()
         auth_json = r.json()
-        print(f'{str(datetime.now())} Delivery Platform Authentication succeeded. RECEIVED:')
-        print(json.dumps(auth_json, sort_keys=True, indent=2, separators=(',', ':')))
+        log.info('%s Delivery Platform Authentication succeeded.', datetime.now())
+        log.debug('RECEIVED:\n%s', JsonDump(log, auth_json))
         return auth_json['access_token'], auth_json['expires_in']
     elif r.status_code in [ 301, 302, 307, 308 ]:
         # Perform URL redirect
-        print('Delivery Platform authentication HTTP code:', r.status_code, r.reason)
+        log.info('Delivery Platform authentication HTTP code: %s %s', r.status_code, r.reason)
         new_host = r.headers['Location']
         if new_host != None:
-            print('Perform URL redirect to ', new_host)
+            log.info('Perform URL redirect to %s', new_host)
             return get_auth_token(new_host)
         return None, None
     elif r.status_code in [ 400, 401, 403, 404, 410, 451 ]:
         # Stop trying the request
         # NOTE: With 400 and 401, there is not retry to keep this sample code simple
-        print('Delivery Platform authentication HTTP code:', r.status_code, r.reason)
-        print('Unrecoverable error: stopped retrying request')
+        log.error('Delivery Platform authentication HTTP code: %s %s', r.status_code, r.reason)
+        log.error('Unrecoverable error: stopped retrying request')
         return None, None
     else:
-        print('Delivery Platform authentication failed. HTTP code:', r.status_code, r.reason)
+        log.warning('Delivery Platform authentication failed. HTTP code: %s %s', r.status_code, r.reason)
         time.sleep(5)
         # CAUTION: This is sample code with infinite retries.
-        print('Retrying auth request')
+        log.warning('Retrying auth request')
         return get_auth_token()
 
 
+class TokenManager:
+    '''
+        Renews the access token before it expires, on a background thread, and reissues it on the Login
+        stream of the open sessions, so the connections are not dropped at the token expiry:
+        5% of the token lifetime before expiry for short lived tokens, 300 seconds otherwise.
+    '''
+    # Delay before a new attempt when the token could not be renewed
+    retry_delay = 30
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='token-manager', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def refresh_delay(self):
+        """ Seconds until the token must be renewed """
+        expires_in = float(expire_time)
+        delta = expires_in * 0.05 if expires_in < 600 else 300
+        return max(0.0, float(tokenTS) + expires_in - delta - time.time())
+
+    def refresh(self):
+        """ Get a new access token and reissue it on the open sessions, returns None if it failed """
+        global auth_token, expire_time, tokenTS
+        with self._lock:
+            token, expires_in = get_auth_token()
+            if token is None:
+                return None
+            auth_token, expire_time, tokenTS = token, expires_in, time.time()
+        for session in self.sessions:
+            session.reissue_token(token)
+        return token
+
+    def _run(self):
+        delay = self.refresh_delay()
+        while not self._stopped.wait(delay):
+            if self.refresh() is None:
+                log.error('Failed to renew the access token, retrying in %d seconds', self.retry_delay)
+                delay = self.retry_delay
+            else:
+                delay = self.refresh_delay()
+
+
+def shutdown(news_cache=None):
+    """
+        Stop the sessions, output their remaining news, then close the sink, archive, capture and publisher
+        and save the de-duplication keys. Runs once, however the application stops.
+    """
+    global stopped
+    if stopped:
+        return
+    stopped = True
+    if token_manager is not None:
+        token_manager.stop()
+    if endpoint_ranker is not None:
+        endpoint_ranker.stop()
+    for session in sessions:
+        session.disconnect()
+    if news_cache is not None:
+        log.info('News de-duplication: %s', news_cache.stats())
+        if dedup_file:
+            try:
+                news_cache.save(dedup_file)
+            except OSError as e:
+                log.error('Cannot save the de-duplication cache file %s: %s', dedup_file, e)
+    if story_sink is not None:
+        story_sink.close()
+        log.info('News sink: %s', story_sink.stats())
+    if story_archive is not None:
+        story_archive.close()
+        log.info('News archive: %s', story_archive.stats())
+    if news_router is not None:
+        log.info('News routing: %s', news_router.stats())
+    if frame_capture is not None:
+        frame_capture.close()
+        log.info('Frame capture: %s', frame_capture.stats())
+    if story_publisher is not None:
+        story_publisher.close()
+        log.info('News publisher: %s', story_publisher.stats())
+
+
 def print_commandline_usage_and_exit(exit_code):
     print('Usage: market_price_rdpgw_client_cred_auth.py [--app_id app_id] '
           '--clientid clientid --clientsecret client secret [--position position] [--auth_url auth_url] '
           '[--hostname hostname] [--port port] ' 
           '[--discovery_url discovery_url] [--scope scope] [--service service]'
-          '[--region region] [--ric ric] [--help]')
+          '[--region region] [--ric ric[,ric...]] [--envelope_ttl seconds] [--max_envelopes count] '
+          '[--max_envelope_bytes bytes] [--decompress_mode stream|final] [--log_level debug|info|warning|error] '
+          '[--json auto|orjson|json] [--pipeline thread|process] [--pipeline_workers count] '
+          '[--pipeline_queue_size count] [--connections count] [--sink jsonl|jsonl.gz|parquet] [--sink_dir directory] '
+          '[--sink_batch count] [--sink_rotate_bytes bytes] [--sink_rotate_seconds seconds] '
+          '[--sink_fsync batch|rotate|none] [--archive_dir directory] [--archive_segment_bytes bytes] '
+          '[--dedup lru|bloom] [--dedup_size count] [--dedup_ttl seconds] [--dedup_fp_rate rate] [--dedup_file file] '
+          '[--metrics_port port] [--metrics_interval seconds] [--discovery_cache file] [--discovery_ttl seconds] '
+          '[--probe_interval seconds] [--reconnect_delay seconds] [--reconnect_max_delay seconds] '
+          '[--filter expression] [--subscriptions file] [--capture file] [--output_queue count] '
+          '[--overflow block|drop_oldest|spill] [--spill_dir directory] [--publish socket] [--help]')
     sys.exit(exit_code)
 
 
@@ -449,7 +769,15 @@ if __name__ == "__main__":
             "help", "app_id=", "clientsecret=", "clientid=", 
             "hostname=", "port=", 
             "position=", "auth_url=", "discovery_url=", 
-            "scope=", "service=", "region=", "ric="])
+            "scope=", "service=", "region=", "ric=",
+            "envelope_ttl=", "max_envelopes=", "max_envelope_bytes=", "decompress_mode=", "log_level=", "json=",
+            "pipeline=", "pipeline_workers=", "pipeline_queue_size=", "connections=",
+            "sink=", "sink_dir=", "sink_batch=", "sink_rotate_bytes=", "sink_rotate_seconds=", "sink_fsync=",
+            "archive_dir=", "archive_segment_bytes=",
+            "dedup=", "dedup_size=", "dedup_ttl=", "dedup_fp_rate=", "dedup_file=",
+            "metrics_port=", "metrics_interval=", "discovery_cache=", "discovery_ttl=", "probe_interval=",
+            "reconnect_delay=", "reconnect_max_delay=", "filter=", "subscriptions=", "capture=", "output_queue=",
+            "overflow=", "spill_dir=", "publish="])
     except getopt.GetoptError:
         print_commandline_usage_and_exit(2)
     for opt, arg in opts:
@@ -467,16 +795,185 @@ if __name__ == "__main__":
             port = arg
         elif opt in "--position":
             position = arg
+        elif opt in "--auth_url":
+            auth_url = arg
+        elif opt in "--discovery_url":
+            discovery_url = arg
+        elif opt in "--scope":
+            scope = arg
         elif opt in "--service":
             service = arg
         elif opt in "--region":
             region = arg
         elif opt in "--ric":
-            if arg not in ['MRN_STORY', 'MRN_TRNA', 'MRN_TRNA_DOC', 'MRN_TRSI']:
+            # Comma separated MRN RIC names are opened as item streams on the same connection
+            try:
+                mrn_items = parse_items(arg)
+            except ValueError:
                 print('The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRSI only')
                 sys.exit(2)
-            else:
-                mrn_item = arg
+        elif opt in "--envelope_ttl":
+            envelope_ttl = float(arg)
+        elif opt in "--max_envelopes":
+            max_envelopes = int(arg)
+        elif opt in "--max_envelope_bytes":
+            max_envelope_bytes = int(arg)
+        elif opt in "--decompress_mode":
+            if arg not in DECOMPRESS_MODES:
+                print('The supported decompress modes are stream or final only')
+                sys.exit(2)
+            decompress_mode = arg
+        elif opt in "--log_level":
+            if arg not in LOG_LEVELS:
+                print('The supported log levels are debug, info, warning or error only')
+                sys.exit(2)
+            log_level = arg
+        elif opt in "--json":
+            if arg not in mrn_codec.JSON_CODECS:
+                print('The supported JSON codecs are auto, orjson or json only')
+                sys.exit(2)
+            json_codec = arg
+        elif opt in "--pipeline":
+            if arg not in PIPELINE_EXECUTORS:
+                print('The supported pipeline executors are thread or process only')
+                sys.exit(2)
+            pipeline_executor = arg
+        elif opt in "--pipeline_workers":
+            pipeline_workers = int(arg)
+        elif opt in "--pipeline_queue_size":
+            pipeline_queue_size = int(arg)
+        elif opt in "--connections":
+            connections = int(arg)
+        elif opt in "--sink":
+            if arg not in mrn_sinks.SINK_FORMATS:
+                print('The supported sink formats are jsonl, jsonl.gz or parquet only')
+                sys.exit(2)
+            sink_format = arg
+        elif opt in "--sink_dir":
+            sink_dir = arg
+        elif opt in "--sink_batch":
+            sink_batch = int(arg)
+        elif opt in "--sink_rotate_bytes":
+            sink_rotate_bytes = int(arg)
+        elif opt in "--sink_rotate_seconds":
+            sink_rotate_seconds = float(arg)
+        elif opt in "--sink_fsync":
+            if arg not in mrn_sinks.FSYNC_POLICIES:
+                print('The supported sink fsync policies are batch, rotate or none only')
+                sys.exit(2)
+            sink_fsync = arg
+        elif opt in "--archive_dir":
+            archive_dir = arg
+        elif opt in "--archive_segment_bytes":
+            archive_segment_bytes = int(arg)
+        elif opt in "--dedup":
+            if arg not in DEDUP_KINDS:
+                print('The supported de-duplication caches are lru or bloom only')
+                sys.exit(2)
+            dedup = arg
+        elif opt in "--dedup_size":
+            dedup_size = int(arg)
+        elif opt in "--dedup_ttl":
+            dedup_ttl = float(arg)
+        elif opt in "--dedup_fp_rate":
+            dedup_fp_rate = float(arg)
+            if not 0 < dedup_fp_rate < 1:
+                print('The de-duplication false positive rate must be between 0 and 1')
+                sys.exit(2)
+        elif opt in "--dedup_file":
+            dedup_file = arg
+        elif opt in "--metrics_port":
+            metrics_port = int(arg)
+        elif opt in "--metrics_interval":
+            metrics_interval = float(arg)
+        elif opt in "--discovery_cache":
+            discovery_cache = arg
+        elif opt in "--discovery_ttl":
+            discovery_ttl = float(arg)
+        elif opt in "--probe_interval":
+            probe_interval = float(arg)
+        elif opt in "--reconnect_delay":
+            reconnect_delay = float(arg)
+        elif opt in "--reconnect_max_delay":
+            reconnect_max_delay = float(arg)
+        elif opt in "--filter":
+            filter_expression = arg
+        elif opt in "--subscriptions":
+            subscriptions_file = arg
+        elif opt in "--capture":
+            capture_file = arg
+        elif opt in "--output_queue":
+            output_queue = int(arg)
+        elif opt in "--overflow":
+            if arg not in OVERFLOW_POLICIES:
+                print('The supported overflow policies are block, drop_oldest or spill only')
+                sys.exit(2)
+            overflow = arg
+        elif opt in "--spill_dir":
+            spill_dir = arg
+        elif opt in "--publish":
+            publish_path = arg
+
+    configure_logging(log_level)
+    try:
+        mrn_codec.use_codec(json_codec)
+    except ImportError as e:
+        print(f'{e}, use --json json or install it with pip install orjson')
+        sys.exit(2)
+    log.info('JSON codec: %s', mrn_codec.codec_name)
+    if filter_expression:
+        try:
+            news_filter = HeaderFilter(filter_expression)
+        except ValueError as e:
+            print(e)
+            sys.exit(2)
+        log.info('News filter: %s', news_filter)
+    if subscriptions_file:
+        news_router = TopicRouter()
+        try:
+            load_subscriptions(subscriptions_file, news_router, log)
+        except (OSError, ValueError) as e:
+            print(f'Cannot read the subscriptions file {subscriptions_file}: {e}')
+            sys.exit(2)
+        log.info('News routing: %s', news_router.stats())
+        REGISTRY.counter('mrn_routed_deliveries_total', 'News delivered to the subscribers of their codes',
+                         lambda: news_router.deliveries)
+    if sink_format:
+        try:
+            story_sink = mrn_sinks.open_sink(sink_format, directory=sink_dir, prefix='mrn_rto', batch_size=sink_batch,
+                                             rotate_bytes=sink_rotate_bytes, rotate_seconds=sink_rotate_seconds,
+                                             fsync=sink_fsync)
+        except ImportError as e:
+            print(f'{e}, install it with pip install pyarrow')
+            sys.exit(2)
+        log.info('News sink: %s files in %s', sink_format, sink_dir)
+    if archive_dir:
+        story_archive = StoryArchive(archive_dir, archive_segment_bytes)
+    if capture_file:
+        try:
+            frame_capture = FrameCapture(capture_file)
+        except OSError as e:
+            print(f'Cannot write the capture file {capture_file}: {e}')
+            sys.exit(2)
+        log.info('Capturing the received frames to %s', capture_file)
+    if publish_path:
+        try:
+            story_publisher = StoryPublisher(publish_path)
+        except OSError as e:
+            print(f'Cannot publish the news on {publish_path}: {e}')
+            sys.exit(2)
+        story_publisher.register_metrics(REGISTRY)
+        log.info('Publishing the news on %s', publish_path)
+    if output_queue > 0:
+        log.info('News output queue: %d news per session, %s overflow policy', output_queue, overflow)
+    if metrics_port:
+        try:
+            mrn_metrics.start_http_server(metrics_port)
+        except OSError as e:
+            print(f'Cannot serve the metrics on port {metrics_port}: {e}')
+            sys.exit(2)
+    if metrics_interval > 0:
+        mrn_metrics.SummaryReporter(metrics_interval).start()
 
     if clientid == '' or client_secret == '':
         print('Authentication Version 2 clientid and clientsecret are required options')
@@ -492,58 +989,73 @@ if __name__ == "__main__":
 
     auth_token, expire_time = get_auth_token()
     if not auth_token:
-        print('Failed initial authentication with Delivery Platform. Exiting...')
+        log.error('Failed initial authentication with Delivery Platform. Exiting...')
         sys.exit(1)
     # get an access token receiving time, used for connection logic
     tokenTS = time.time() 
+    REGISTRY.gauge('mrn_token_expires_seconds', 'Time until the access token expires',
+                   lambda: float(tokenTS) + float(expire_time) - time.time())
 
     # If hostname is specified, use it for the connection
     if hostName != '':
         hostList.append(f'{hostName}:{str(port)}')
     else:
-        # Query VIPs from Delivery Platform service discovery if user did not specify hostname
-        if not query_service_discovery():
-            print('Failed to retrieve endpoints from Delivery Platform Service Discovery. Exiting...')
+        # Query VIPs from Delivery Platform service discovery if user did not specify hostname,
+        # unless the --discovery_cache file holds a response younger than --discovery_ttl
+        cached_discovery = load_discovery(discovery_cache, discovery_url, discovery_ttl) if discovery_cache else None
+        if cached_discovery is not None:
+            process_service_discovery(cached_discovery)
+        elif not query_service_discovery():
+            log.error('Failed to retrieve endpoints from Delivery Platform Service Discovery. Exiting...')
             sys.exit(1)
 
-    # Start websocket handshake;
-    session1 = WebSocketSession('Session1', hostList[0])
-    session1.connect()
-
+    # Start websocket handshake; with several connections, the sessions are opened to the first ranked
+    # endpoints: hostList then backupHostList, each by connect latency, reusing the endpoints if there are fewer of them
+    endpoint_ranker = EndpointRanker(hostList, backupHostList, interval=probe_interval)
+    if len(endpoint_ranker.endpoints) > 1:
+        endpoint_ranker.probe_all()
+        endpoint_ranker.start()
+    for endpoint in endpoint_ranker.endpoints:
+        REGISTRY.gauge('mrn_endpoint_connect_seconds', 'Connect and TLS handshake time of the last endpoint probe',
+                       lambda endpoint=endpoint: endpoint_ranker.latency(endpoint), endpoint=endpoint)
+    endpoints = endpoint_ranker.ranked()
+    # The news completed by a session are dropped on the other sessions and after a reconnect,
+    # the hot-standby sessions always de-duplicate the news
+    if connections > 1 and not dedup:
+        dedup = 'lru'
+    news_cache = open_cache(dedup, dedup_size, dedup_ttl, dedup_fp_rate, dedup_file) if dedup else None
+    if news_cache is not None:
+        REGISTRY.gauge('mrn_dedup_keys', 'Completed news keys in the de-duplication cache', lambda: len(news_cache))
+        REGISTRY.counter('mrn_dedup_duplicates_total', 'News dropped as duplicates by all sessions',
+                         lambda: news_cache.duplicates)
     try:
-        while True:
-            # NOTE about connection recovery: When connecting or reconnecting 
-            #   to the server, a valid token must be used. Upon being disconnecting, initial 
-            #   reconnect attempt must be done with  a new token.
-            #   If a successful reconnect takes longer than token expiration time, 
-            #   a new token must be obtained proactively. 
-
-            # Waiting a few seconds before checking for connection down and attempting reconnect
-            time.sleep(5)
-            if not session1.web_socket_open:
-                if session1.reconnecting:
-                    curTS = time.time()
-                    if (int(expire_time) < 600):
-                        DELTA_TIME = float(expire_time) * 0.05
-                    else:
-                        DELTA_TIME = 300
-                    if (int(curTS) >= int(float(tokenTS) + float(expire_time) - float(DELTA_TIME))):
-                        auth_token, expire_time = get_auth_token() 
-                        tokenTS = time.time()
-                else:
-                    auth_token, expire_time = get_auth_token() 
-                    tokenTS = time.time()
-
-                if not session1.web_socket_open and not session1.force_disconnected:
-                    session1.reconnecting = True
-
-                if auth_token is not None:
-                    if (not session1.force_disconnected) and session1.reconnecting:
-                        session1.connect()
-                else:
-                    print('Failed authentication with Delivery Platform. Exiting...')
-                    sys.exit(1) 
+        sessions = [WebSocketSession(f'Session{index + 1}', endpoints[index % len(endpoints)], pipeline_executor,
+                                     pipeline_workers, pipeline_queue_size, news_cache)
+                    for index in range(connections)]
+    except OSError as e:
+        print(f'Cannot create the spill file in {spill_dir}: {e}')
+        sys.exit(2)
+    # The token is renewed before it expires and reissued on the open connections
+    token_manager = TokenManager(sessions)
+    for session in sessions:
+        session.connect()
+    token_manager.start()
+    # docker stop sends SIGTERM, the application then stops as with Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
 
+    try:
+        # NOTE about connection recovery: each session reconnects on its own thread as soon as its
+        #   connection is lost, with a jittered exponential backoff between the attempts, to the first
+        #   ranked endpoint. A new token is obtained first if the current one is about to expire.
+        for session in sessions:
+            while session.wst.is_alive():
+                session.wst.join(1)
+        log.error('All the sessions are stopped. Exiting...')
+        sys.exit(1)
 
     except KeyboardInterrupt:
-        session1.disconnect()
\ No newline at end of file
+        pass
+    finally:
+        # The remaining news are output and the files closed however the application stops: Ctrl+C, SIGTERM,
+        # all the sessions stopped or an error
+        shutdown(news_cache)
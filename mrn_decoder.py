@@ -0,0 +1,243 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    MRN news decoder without any connection: the header filter, de-duplication, fragment assembly and
+    decompression of the MRN Update messages of the item streams of one connection. The console examples
+    and the asyncio example decode their Update messages with it, an application can feed it with
+    messages received or captured by any other means:
+
+        decoder = MRNDecoder(['MRN_STORY', 'MRN_TRNA'])
+        stories, stats = decoder.feed(websocket_text)
+        for story in stories:
+            print(story.item, story.guid, story.news)
+
+    The messages are routed to the item streams by their ID, assigned from FIRST_ITEM_STREAM_ID in the
+    order of items like the item requests of the examples.
+"""
+
+import sys
+import time
+import zlib
+import base64
+import binascii
+import logging
+import mrn_codec
+from mrn_reassembly import DEFAULT_ENVELOPE_TTL, DEFAULT_MAX_ENVELOPES, DEFAULT_MAX_ENVELOPE_BYTES, \
+    DEFAULT_DECOMPRESS_MODE
+from mrn_streams import MRNItemStreams, mrn_domain
+
+log = logging.getLogger('mrn_decoder')
+
+# Counters of MRNItemStream summed in the feed() batch statistics
+BATCH_COUNTERS = ('updates', 'news', 'errors', 'duplicates', 'filtered')
+
+
+class Story:
+    """ A completed MRN news of an item stream, size is the decompressed data length """
+    __slots__ = ('item', 'guid', 'size', 'news', 'session_name')
+
+    def __init__(self, item, guid, size, news, session_name=''):
+        self.item = item
+        self.guid = guid
+        self.size = size
+        self.news = news
+        self.session_name = session_name
+
+    def __repr__(self):
+        return f'Story({self.item!r}, {self.guid!r}, {self.size})'
+
+
+class CompletedNews:
+    """
+        The FRAGMENT data of a news whose fragments are all received. envelope is the assembled envelope of
+        a multiple fragments news, None for a single fragment news.
+    """
+    __slots__ = ('stream', 'guid', 'fragment', 'envelope')
+
+    def __init__(self, stream, guid, fragment, envelope):
+        self.stream = stream
+        self.guid = guid
+        self.fragment = fragment
+        self.envelope = envelope
+
+    @property
+    def item(self):
+        return self.stream.item
+
+    def decompress(self):
+        """ The decompressed news data, zlib.error if it is corrupted """
+        started = time.perf_counter()
+        if self.envelope is not None:
+            # the multiple fragments news are decompressed while assembled in the stream mode
+            data = self.envelope.decompress()
+        else:
+            data = zlib.decompress(self.fragment, zlib.MAX_WBITS | 32)
+        self.stream.decompress_seconds.observe(time.perf_counter() - started)
+        return data
+
+    def payload(self):
+        """ (data, compressed): the news already decompressed in the stream mode, else its compressed data """
+        if self.envelope is not None and self.envelope.decompressor is not None:
+            return self.decompress(), False
+        return self.fragment, True
+
+
+class MRNDecoder:
+    """
+        The MRN item streams of one connection and their decoding. news_filter, a HeaderFilter, drops the
+        news it does not select before they are decoded. news_cache, shared by the decoders of hot-standby
+        connections, completes the first copy of each news only. name is the session_name of the stories.
+    """
+
+    def __init__(self, items=('MRN_STORY',), envelope_ttl=DEFAULT_ENVELOPE_TTL, max_envelopes=DEFAULT_MAX_ENVELOPES,
+                 max_envelope_bytes=DEFAULT_MAX_ENVELOPE_BYTES, decompress_mode=DEFAULT_DECOMPRESS_MODE,
+                 news_filter=None, news_cache=None, name=''):
+        self.item_streams = MRNItemStreams(items, envelope_ttl, max_envelopes, max_envelope_bytes, decompress_mode)
+        self.news_filter = news_filter
+        self.news_cache = news_cache
+        self.name = name
+
+    def stream(self, message_json):
+        """ The item stream of an MRN Update message, None for another message or an unknown stream ID """
+        if message_json.get('Type') != 'Update' or message_json.get('Domain') != mrn_domain:
+            return None
+        stream = self.item_streams.get(message_json.get('ID'))
+        if stream is None:
+            log.warning('Update for unknown stream ID %s', message_json.get('ID'))
+        return stream
+
+    def assemble(self, stream, fields_data):
+        """
+            Assemble the fields of an Update message of an item stream, returns the CompletedNews with the
+            last fragment of a news, None while it is incomplete or when the message is dropped
+        """
+        guid = None
+        try:
+            frag_num = int(fields_data['FRAG_NUM'])
+            guid = fields_data['GUID']
+            # The news which are not selected by the header filter are dropped before their FRAGMENT is decoded
+            if self.news_filter is not None and self.news_filter.drop(stream, guid, frag_num, fields_data):
+                return None
+            mrn_src = fields_data['MRN_SRC']
+            news_cache = self.news_cache
+            # A news already completed by another connection is dropped before its FRAGMENT is decoded
+            if frag_num == 1 and news_cache is not None and (stream.item, guid) in news_cache:
+                stream.duplicates += 1
+                news_cache.count_duplicate()
+                return None
+            fragment = base64.b64decode(fields_data['FRAGMENT'])
+
+            envelope = None
+            tot_size = int(fields_data['TOT_SIZE']) if frag_num == 1 else None
+            # A single fragment news is completed without the envelope store
+            if tot_size is None or tot_size != len(fragment):
+                if frag_num > 1 and news_cache is not None and (stream.item, guid) in news_cache and \
+                        stream.envelopes.get(guid, mrn_src) is None:
+                    # the next fragments of a news dropped at FRAG_NUM 1
+                    return None
+                # the envelope store is indexed by GUID and MRN_SRC, the fragments received ahead of their turn
+                # wait for the previous ones, the duplicate fragments are ignored
+                envelope, removed = stream.envelopes.put(guid, mrn_src, frag_num, fragment, tot_size)
+                if removed:
+                    log.warning('Removed %d incomplete news envelop(s): %s', removed, stream.envelopes.stats())
+                if envelope is None:
+                    log.debug('Ignore duplicate FRAG_NUM %d of GUID %s', frag_num, guid)
+                    return None
+                log.debug('GUID %s FRAGMENT %d bytes of TOT_SIZE %s', guid, envelope.size, envelope.tot_size)
+                # The multiple fragments news are not completed, waiting.
+                if not envelope.complete:
+                    return None
+                stream.envelopes.remove(envelope)
+                fragment = envelope.fragment
+                frag_num = envelope.frag_num
+            elif not stream.envelopes.complete(guid, mrn_src):
+                log.debug('Ignore duplicate single fragment news GUID %s', guid)
+                return None
+
+            # News Fragment(s) completed
+            if news_cache is not None and not news_cache.add((stream.item, guid)):
+                log.debug('drop News GUID %s already completed by another session', guid)
+                stream.duplicates += 1
+                return None
+            stream.news += 1
+            stream.fragments.observe(frag_num)
+            if envelope is not None:
+                stream.reassembly_seconds.observe(time.monotonic() - envelope.created)
+            return CompletedNews(stream, guid, fragment, envelope)
+
+        except KeyError as keyerror:
+            stream.errors += 1
+            log.warning('KeyError exception: %s', keyerror)
+        except IndexError as indexerror:
+            stream.errors += 1
+            log.warning('IndexError exception: %s', indexerror)
+        except binascii.Error as b64error:
+            stream.errors += 1
+            log.warning('base64 decoding exception: %s', b64error)
+        except ValueError as valueerror:
+            stream.errors += 1
+            log.warning('Invalid FRAG_NUM or TOT_SIZE of GUID %s: %s', guid, valueerror)
+        except zlib.error as error:
+            # the stream mode decompresses the fragments while they are assembled
+            stream.errors += 1
+            log.warning('zlib decompressing exception: %s', error)
+        except Exception as e:
+            stream.errors += 1
+            log.warning('exception: %s', sys.exc_info()[0])
+        return None
+
+    def decode(self, message_json, parse=True):
+        """
+            Decode one message, returns the Story when it completes a news, None otherwise. The news of the
+            Story is parsed JSON, or the decompressed bytes when parse is False.
+        """
+        stream = self.stream(message_json)
+        if stream is None:
+            return None
+        stream.updates += 1
+        completed = self.assemble(stream, message_json['Fields'])
+        if completed is None:
+            return None
+        try:
+            data = completed.decompress()
+            return Story(stream.item, completed.guid, len(data), mrn_codec.loads(data) if parse else data, self.name)
+        except (ValueError, zlib.error) as error:
+            stream.errors += 1
+            log.warning('Cannot decode the news %s: %r', completed.guid, error)
+            return None
+
+    def feed(self, updates, parse=True):
+        """
+            Decode a batch of messages: a received WebSocket text, or a list of parsed messages. The messages
+            other than the MRN Update messages are skipped. Returns the Story list of the completed news and
+            the batch statistics: the item stream counters of the batch, the stories, their decompressed
+            bytes and the decoding seconds.
+        """
+        started = time.perf_counter()
+        if isinstance(updates, (str, bytes, bytearray)):
+            updates = mrn_codec.loads(updates)
+        before = self.totals()
+        stories = []
+        decode = self.decode
+        for message_json in updates:
+            story = decode(message_json, parse)
+            if story is not None:
+                stories.append(story)
+        stats = {counter: total - before[counter] for counter, total in self.totals().items()}
+        stats['stories'] = len(stories)
+        stats['bytes'] = sum(story.size for story in stories)
+        stats['seconds'] = time.perf_counter() - started
+        return stories, stats
+
+    def totals(self):
+        """ Counters of all the item streams """
+        totals = dict.fromkeys(BATCH_COUNTERS, 0)
+        for stream in self.item_streams:
+            for counter in BATCH_COUNTERS:
+                totals[counter] += getattr(stream, counter)
+        return totals
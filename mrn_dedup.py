@@ -0,0 +1,249 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+""" De-duplication of the news received more than once, on several connections or again after a reconnect """
+
+import os
+import math
+import time
+import struct
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import mrn_codec
+
+DEDUP_KINDS = ('lru', 'bloom')
+
+# Default limits of the completed news cache
+DEFAULT_DEDUP_TTL = 600.0
+DEFAULT_DEDUP_SIZE = 100000
+DEFAULT_DEDUP_FP_RATE = 0.0001
+
+BLOOM_MAGIC = b'MRNBLM1\n'
+# bits and hash functions per generation, keys in the current and previous generations
+BLOOM_HEADER = struct.Struct('<QIQQ')
+
+log = logging.getLogger('mrn_dedup')
+
+
+class GuidCache:
+    """
+        Bounded set of the completed news keys, (MRN item, GUID), shared by the connections.
+
+        The first connection which completes a news adds its key and outputs it, the later copies
+        are dropped. Keys are kept in least recently used order: a key found again by a copy of its
+        news becomes the most recent and its ttl restarts. The least recently used keys are removed
+        after ttl seconds or when the cache holds more than max_size keys. Safe to use from several
+        WebSocket threads.
+    """
+
+    def __init__(self, ttl=DEFAULT_DEDUP_TTL, max_size=DEFAULT_DEDUP_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # Number of news dropped as duplicates
+        self.duplicates = 0
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        """ True if the news was already completed, the later fragments of its copies can be dropped """
+        now = time.monotonic()
+        with self._lock:
+            used = self._keys.get(key)
+            if used is None or (self.ttl and now - used > self.ttl):
+                return False
+            self._use(key, now)
+            return True
+
+    def add(self, key, now=None):
+        """ Add the key of a completed news, returns False (and counts a duplicate) if it was already added """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._keys:
+                self.duplicates += 1
+                self._use(key, now)
+                return False
+            self._keys[key] = now
+            while self.max_size and len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+            return True
+
+    def count_duplicate(self):
+        """ Count a copy dropped before it was completed """
+        with self._lock:
+            self.duplicates += 1
+
+    def stats(self):
+        """ Current cache occupancy and duplicate counter """
+        return {'keys': len(self._keys), 'duplicates': self.duplicates}
+
+    def save(self, path):
+        """ Write the keys with their age since last used, so a restarted application keeps dropping the news it output """
+        now = time.monotonic()
+        with self._lock:
+            keys = [[item, guid, now - used] for (item, guid), used in self._keys.items()]
+        _write_file(path, mrn_codec.dumps({'saved': time.time(), 'keys': keys}).encode('utf-8'))
+
+    def load(self, path):
+        """ Add the keys saved by save() which are still within ttl, returns the number of loaded keys """
+        with open(path, 'rb') as cache_file:
+            saved = mrn_codec.loads(cache_file.read())
+        now = time.monotonic()
+        elapsed = max(time.time() - saved['saved'], 0.0)
+        with self._lock:
+            for item, guid, age in saved['keys']:
+                age += elapsed
+                if not (self.ttl and age > self.ttl):
+                    self._keys[(item, guid)] = now - age
+            while self.max_size and len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+            return len(self._keys)
+
+    def _use(self, key, now):
+        """ Make a key the most recently used, the keys stay in the order of their last use time """
+        self._keys[key] = now
+        self._keys.move_to_end(key)
+
+    def _expire(self, now):
+        if not self.ttl:
+            return
+        deadline = now - self.ttl
+        while self._keys:
+            key, added = next(iter(self._keys.items()))
+            if added > deadline:
+                break
+            del self._keys[key]
+
+
+class BloomGuidCache:
+    """
+        Fixed memory alternative to GuidCache: the completed news keys are added to Bloom filters.
+
+        A Bloom filter never misses an added key, but a new news is taken for a duplicate (and dropped)
+        with the probability fp_rate. Two generations of max_size keys are kept, when the current one is
+        full it replaces the previous one, so the last max_size to 2 * max_size news are remembered.
+        Each generation is sized for fp_rate / 2, a key is checked in both.
+    """
+
+    def __init__(self, max_size=DEFAULT_DEDUP_SIZE, fp_rate=DEFAULT_DEDUP_FP_RATE):
+        if not 0 < fp_rate < 1:
+            raise ValueError(f'The false positive rate {fp_rate} is not between 0 and 1')
+        self.max_size = max(max_size, 1)
+        self.fp_rate = fp_rate
+        # m = -n ln(p) / ln(2)^2 bits and k = m / n ln(2) hash functions for n keys at the rate p
+        self.bits = max(int(-self.max_size * math.log(fp_rate / 2) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.bits / self.max_size * math.log(2)), 1)
+        self.duplicates = 0
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._current_keys = 0
+        self._previous_keys = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._current_keys + self._previous_keys
+
+    def __contains__(self, key):
+        """ True if the news was probably already completed, the later fragments of its copies can be dropped """
+        positions = self._positions(key)
+        with self._lock:
+            return self._contains(self._current, positions) or self._contains(self._previous, positions)
+
+    def add(self, key, now=None):
+        """ Add the key of a completed news, returns False (and counts a duplicate) if it was probably already added """
+        positions = self._positions(key)
+        with self._lock:
+            if self._contains(self._current, positions):
+                self.duplicates += 1
+                return False
+            # a key of the previous generation is added again, it then outlives the next rotation
+            added = not self._contains(self._previous, positions)
+            if self._current_keys >= self.max_size:
+                self._previous, self._current = self._current, self._previous
+                self._previous_keys = self._current_keys
+                self._current[:] = bytes(len(self._current))
+                self._current_keys = 0
+            for position in positions:
+                self._current[position >> 3] |= 1 << (position & 7)
+            self._current_keys += 1
+            if not added:
+                self.duplicates += 1
+            return added
+
+    def count_duplicate(self):
+        """ Count a copy dropped before it was completed """
+        with self._lock:
+            self.duplicates += 1
+
+    def stats(self):
+        """ Current filter occupancy and duplicate counter """
+        return {'keys': len(self), 'bytes': 2 * len(self._current), 'duplicates': self.duplicates}
+
+    def save(self, path):
+        """ Write both generations, so a restarted application keeps dropping the news it already output """
+        with self._lock:
+            data = BLOOM_MAGIC + BLOOM_HEADER.pack(self.bits, self.hashes, self._current_keys, self._previous_keys) + \
+                self._current + self._previous
+        _write_file(path, data)
+
+    def load(self, path):
+        """ Restore the generations saved by save() with the same size and rate, returns the number of loaded keys """
+        with open(path, 'rb') as cache_file:
+            data = cache_file.read()
+        if not data.startswith(BLOOM_MAGIC):
+            raise ValueError(f'{path} is not a saved Bloom filter')
+        bits, hashes, current_keys, previous_keys = BLOOM_HEADER.unpack_from(data, len(BLOOM_MAGIC))
+        if (bits, hashes) != (self.bits, self.hashes):
+            raise ValueError(f'{path} was saved with another size or false positive rate')
+        start = len(BLOOM_MAGIC) + BLOOM_HEADER.size
+        length = len(self._current)
+        with self._lock:
+            self._current[:] = data[start:start + length]
+            self._previous[:] = data[start + length:start + 2 * length]
+            self._current_keys = current_keys
+            self._previous_keys = previous_keys
+            return len(self)
+
+    def _positions(self, key):
+        # double hashing of a process independent digest, the filter is saved and loaded again
+        digest = hashlib.blake2b('\0'.join(key).encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.bits for index in range(self.hashes)]
+
+    @staticmethod
+    def _contains(bits, positions):
+        for position in positions:
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+def open_cache(kind='lru', max_size=DEFAULT_DEDUP_SIZE, ttl=DEFAULT_DEDUP_TTL, fp_rate=DEFAULT_DEDUP_FP_RATE, path=''):
+    """ Create a DEDUP_KINDS cache and load the keys saved in path, if it exists """
+    if kind not in DEDUP_KINDS:
+        raise ValueError(f'Unknown de-duplication cache {kind}')
+    cache = GuidCache(ttl, max_size) if kind == 'lru' else BloomGuidCache(max_size, fp_rate)
+    if path and os.path.exists(path):
+        try:
+            log.info('Loaded %d de-duplication keys from %s', cache.load(path), path)
+        except (OSError, ValueError, KeyError, struct.error) as error:
+            log.warning('Cannot load the de-duplication keys from %s: %s', path, error)
+    return cache
+
+
+def _write_file(path, data):
+    """ Replace the file at once, a crash while saving keeps the previous file """
+    with open(path + '.tmp', 'wb') as cache_file:
+        cache_file.write(data)
+    os.replace(path + '.tmp', path)
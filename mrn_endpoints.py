@@ -0,0 +1,167 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    Delivery Platform WebSocket endpoint selection of the RTO console example.
+
+    The service discovery response is cached in a file for a TTL, so a restarted application does not
+    wait for the discovery request. The candidate endpoints are probed concurrently (TCP connect and TLS
+    handshake time) and ranked by tier, then by measured latency: the multiple locations endpoints first,
+    the single location endpoints only when no multiple locations endpoint is reachable. The probes are
+    repeated in the background, and an endpoint whose connection failed is ranked last until it answers
+    a probe again. When several endpoints failed, the one which failed first is tried first, so the
+    reconnections rotate through the endpoints.
+"""
+
+import os
+import ssl
+import json
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_DISCOVERY_TTL = 3600.0
+DEFAULT_PROBE_INTERVAL = 300.0
+DEFAULT_PROBE_TIMEOUT = 5.0
+
+log = logging.getLogger('mrn_endpoints')
+
+
+def load_discovery(path, url, ttl=DEFAULT_DISCOVERY_TTL):
+    """ The cached service discovery response of url, None if there is none or it is older than ttl seconds """
+    try:
+        with open(path, encoding='utf-8') as cache_file:
+            cached = json.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning('Cannot read the service discovery cache %s: %s', path, e)
+        return None
+    age = time.time() - cached.get('saved', 0)
+    if cached.get('url') != url or not 0 <= age < ttl:
+        return None
+    log.info('Service discovery response of %s read from %s, %d seconds old', url, path, age)
+    return cached['response']
+
+
+def save_discovery(path, url, response_json):
+    """ Cache a service discovery response, the file is replaced atomically """
+    temporary_path = f'{path}.tmp'
+    try:
+        with open(temporary_path, 'w', encoding='utf-8') as cache_file:
+            json.dump({'saved': time.time(), 'url': url, 'response': response_json}, cache_file)
+        os.replace(temporary_path, path)
+    except OSError as e:
+        log.warning('Cannot write the service discovery cache %s: %s', path, e)
+
+
+def probe(endpoint, tls=True, timeout=DEFAULT_PROBE_TIMEOUT):
+    """ Seconds to open a TCP connection to 'host:port' and complete the TLS handshake, None if it failed """
+    host, _, port = endpoint.rpartition(':')
+    started = time.perf_counter()
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout) as connection:
+            if tls:
+                # Only the handshake time is measured, the WebSocket connection verifies the certificate
+                context = ssl.create_default_context()
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+                with context.wrap_socket(connection, server_hostname=host):
+                    pass
+    except (OSError, ValueError) as e:
+        log.debug('Endpoint %s probe failed: %s', endpoint, e)
+        return None
+    return time.perf_counter() - started
+
+
+class EndpointRanker:
+    """
+        Candidate endpoints ('host:port') ranked by tier and connect latency, safe to use from several
+        threads. Each tiers argument is a list of endpoints, the first list is the preferred tier.
+    """
+
+    def __init__(self, *tiers, tls=True, interval=DEFAULT_PROBE_INTERVAL, timeout=DEFAULT_PROBE_TIMEOUT):
+        self.tiers = {}
+        for tier, endpoints in enumerate(tiers):
+            for endpoint in endpoints:
+                self.tiers.setdefault(endpoint, tier)
+        self.endpoints = list(self.tiers)
+        self.tls = tls
+        self.interval = interval
+        self.timeout = timeout
+        # Last probe latency by endpoint, None if it failed or was not probed
+        self.latencies = dict.fromkeys(self.endpoints)
+        # Time of the last connection failure by endpoint
+        self.failed = {}
+        self.probes = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def probe_all(self):
+        """ Probe all the endpoints concurrently, returns the ranked endpoints """
+        with ThreadPoolExecutor(max_workers=min(len(self.endpoints), 16) or 1,
+                                thread_name_prefix='endpoint-probe') as executor:
+            latencies = dict(zip(self.endpoints, executor.map(lambda endpoint: probe(endpoint, self.tls, self.timeout),
+                                                              self.endpoints)))
+        with self._lock:
+            self.latencies = latencies
+            # an endpoint answering the probe is healthy again
+            self.failed = {endpoint: failed for endpoint, failed in self.failed.items() if latencies[endpoint] is None}
+            self.probes += 1
+        ranked = self.ranked()
+        log.info('Endpoints by connect latency: %s', ', '.join(
+            f'{endpoint} {latencies[endpoint] * 1000:.1f} ms' if latencies[endpoint] is not None
+            else f'{endpoint} unreachable' for endpoint in ranked))
+        return ranked
+
+    def ranked(self):
+        """ The endpoints by tier and latency, then the unreachable endpoints, then the failed endpoints by failure time """
+        with self._lock:
+            def rank(endpoint):
+                latency = self.latencies[endpoint]
+                if endpoint in self.failed:
+                    return 2, self.failed[endpoint]
+                if latency is None and self.probes > 0:
+                    return 1, self.tiers[endpoint]
+                return 0, self.tiers[endpoint], latency if latency is not None else 0.0
+            return sorted(self.endpoints, key=rank)
+
+    def best(self, exclude=()):
+        """ The first ranked endpoint not in exclude, the first ranked endpoint if they are all excluded """
+        ranked = self.ranked()
+        for endpoint in ranked:
+            if endpoint not in exclude:
+                return endpoint
+        return ranked[0]
+
+    def mark_failed(self, endpoint):
+        """ Rank an endpoint last until it answers a probe """
+        with self._lock:
+            if endpoint in self.tiers:
+                self.failed[endpoint] = time.monotonic()
+
+    def latency(self, endpoint):
+        """ Last probe latency of an endpoint, infinite if it is unreachable """
+        latency = self.latencies.get(endpoint)
+        return float('inf') if latency is None or endpoint in self.failed else latency
+
+    def start(self):
+        """ Probe the endpoints again every interval seconds on a daemon thread """
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='endpoint-ranker', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.probe_all()
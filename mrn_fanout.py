@@ -0,0 +1,324 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+
+#!/usr/bin/env python
+"""
+    Local fan-out of the decoded MRN news: one console example logs in, subscribes and decodes the news
+    once, and publishes them on a Unix domain socket to any number of local subscriber processes.
+
+    A subscriber connects to the socket and sends one line with the comma separated MRN items it wants,
+    an empty line for all the items. The publisher then sends it a record per news: a RECORD_HEADER
+    (item length, GUID length, decompressed size, data length), the item, the GUID and the news JSON
+    data. The record is encoded once and shared by the subscribers. Each subscriber has its own bounded
+    queue and sender thread, the oldest news of a subscriber which does not keep up are dropped, the
+    publisher never waits for a subscriber.
+
+        (MRN_RTO) $> python mrn_console_rto_v2.py --publish /tmp/mrn.sock
+        (MRN_RTO) $> python mrn_fanout.py --socket /tmp/mrn.sock --ric MRN_STORY
+"""
+
+import os
+import sys
+import stat
+import getopt
+import socket
+import struct
+import logging
+import threading
+from collections import deque
+import mrn_codec
+
+# item length, GUID length, decompressed size, data length
+RECORD_HEADER = struct.Struct('<BHII')
+
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 10000
+
+log = logging.getLogger('mrn_fanout')
+
+
+def encode_record(item, guid, size, news):
+    """ The record of a news, news is the decompressed JSON data or the parsed news """
+    if not isinstance(news, (bytes, bytearray, memoryview)):
+        news = mrn_codec.dumps(news).encode('utf-8')
+    item_bytes = item.encode('utf-8')
+    guid_bytes = guid.encode('utf-8')
+    return b''.join((RECORD_HEADER.pack(len(item_bytes), len(guid_bytes), size, len(news)), item_bytes, guid_bytes,
+                     news))
+
+
+class StorySubscriber:
+    """ A connected subscriber process: its item filter, queue of records and sender thread """
+
+    def __init__(self, publisher, connection, items, queue_size):
+        self.publisher = publisher
+        self.connection = connection
+        # None for all the items
+        self.items = items
+        self.queue_size = queue_size
+        # Number of news sent and dropped because the subscriber did not keep up
+        self.sent = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._ready = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='fanout-subscriber', daemon=True)
+        self._thread.start()
+
+    def wants(self, item):
+        return self.items is None or item in self.items
+
+    def put(self, record):
+        with self._ready:
+            if len(self._queue) >= self.queue_size:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(record)
+            self._ready.notify()
+
+    def close(self):
+        """ Send the queued news, then close the connection """
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def stats(self):
+        return {'items': ','.join(self.items) if self.items is not None else 'all', 'queued': len(self._queue),
+                'sent': self.sent, 'dropped': self.dropped}
+
+    def _run(self):
+        try:
+            while True:
+                with self._ready:
+                    while not self._queue and not self._closed:
+                        self._ready.wait()
+                    if not self._queue:
+                        break
+                    # the queued records are sent in one call
+                    records = list(self._queue)
+                    self._queue.clear()
+                self.connection.sendall(b''.join(records))
+                self.sent += len(records)
+        except OSError as e:
+            log.info('Subscriber disconnected: %s', e)
+        finally:
+            self.connection.close()
+            self.publisher._remove(self)
+
+
+class StoryPublisher:
+    """
+        Publishes the completed news on a Unix domain socket, safe to use from several sessions. publish()
+        only encodes the news and queues it for the subscribers which want its item.
+    """
+
+    def __init__(self, path, queue_size=DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError('Unix domain sockets are not supported on this platform')
+        self.path = path
+        self.queue_size = queue_size
+        # Number of published news, and of news dropped or sent by the disconnected subscribers
+        self.published = 0
+        self.dropped = 0
+        self.sent = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+        # a socket file left by a stopped publisher is replaced, any other file is kept
+        if os.path.exists(path):
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise OSError(f'{path} exists and is not a socket')
+            os.remove(path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen()
+        self._closed = False
+        self._acceptor = threading.Thread(target=self._accept_loop, name='fanout-accept', daemon=True)
+        self._acceptor.start()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def publish(self, item, guid, size, news):
+        """ Queue a completed news for the subscribers of its item, news is the decompressed data or parsed news """
+        self.published += 1
+        subscribers = [subscriber for subscriber in self._subscribers if subscriber.wants(item)]
+        if not subscribers:
+            return
+        record = encode_record(item, guid, size, news)
+        for subscriber in subscribers:
+            subscriber.put(record)
+
+    def close(self):
+        """ Stop accepting subscribers, send them the queued news and disconnect them """
+        self._closed = True
+        self._server.close()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+        if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+            os.remove(self.path)
+
+    def stats(self):
+        """ Counters of the publisher and of every connected subscriber """
+        subscribers = list(self._subscribers)
+        return {
+            'path': self.path,
+            'published': self.published,
+            'sent': self.sent + sum(subscriber.sent for subscriber in subscribers),
+            'dropped': self.dropped + sum(subscriber.dropped for subscriber in subscribers),
+            'subscribers': [subscriber.stats() for subscriber in subscribers]
+        }
+
+    def register_metrics(self, registry, **labels):
+        """ Export the subscribers and the published, sent and dropped news with these labels """
+        registry.gauge('mrn_fanout_subscribers', 'Connected fan-out subscriber processes', self.__len__, **labels)
+        registry.counter('mrn_fanout_published_total', 'Completed news published to the fan-out subscribers',
+                         lambda: self.published, **labels)
+        registry.counter('mrn_fanout_sent_total', 'News sent to the fan-out subscribers',
+                         lambda: self.stats()['sent'], **labels)
+        registry.counter('mrn_fanout_dropped_total', 'News dropped for the fan-out subscribers which did not keep up',
+                         lambda: self.stats()['dropped'], **labels)
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                # the server socket is closed
+                break
+            try:
+                items = self._read_subscription(connection)
+            except (OSError, UnicodeDecodeError) as e:
+                log.warning('Invalid fan-out subscription: %s', e)
+                connection.close()
+                continue
+            connection.shutdown(socket.SHUT_RD)
+            with self._lock:
+                self._subscribers = self._subscribers + [
+                    StorySubscriber(self, connection, items, self.queue_size)]
+            log.info('Fan-out subscriber connected, items %s', ','.join(items) if items is not None else 'all')
+
+    def _read_subscription(self, connection):
+        """ The items of the subscription line, None for all the items """
+        connection.settimeout(5)
+        line = b''
+        while not line.endswith(b'\n'):
+            data = connection.recv(256)
+            if not data:
+                raise OSError('connection closed before the subscription')
+            line += data
+        connection.settimeout(None)
+        items = [item.strip() for item in line.decode('utf-8').split(',') if item.strip()]
+        return frozenset(items) if items else None
+
+    def _remove(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                # the counters of the disconnected subscribers are kept in the publisher counters
+                self._subscribers = [other for other in self._subscribers if other is not subscriber]
+                self.sent += subscriber.sent
+                self.dropped += subscriber.dropped
+
+
+def _read_exactly(stream, length):
+    data = stream.read(length)
+    if len(data) < length:
+        raise EOFError('publisher disconnected')
+    return data
+
+
+def subscribe(path, items=None, parse=True):
+    """
+        Connect to a publisher and iterate its news of these items (all the items when None) as Story
+        objects, until the publisher closes the connection. The news is parsed JSON, or the decompressed
+        bytes when parse is False.
+    """
+    from mrn_decoder import Story
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(path)
+    try:
+        connection.sendall((','.join(items or []) + '\n').encode('utf-8'))
+        with connection.makefile('rb') as stream:
+            while True:
+                header = stream.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                item_length, guid_length, size, data_length = RECORD_HEADER.unpack(header)
+                item = _read_exactly(stream, item_length).decode('utf-8')
+                guid = _read_exactly(stream, guid_length).decode('utf-8')
+                data = _read_exactly(stream, data_length)
+                yield Story(item, guid, size, mrn_codec.loads(data) if parse else data)
+    except EOFError:
+        return
+    finally:
+        connection.close()
+
+
+def print_commandline_usage_and_exit(exit_code):
+    print('Usage: mrn_fanout.py --socket path [--ric MRN_STORY,MRN_TRNA,...] '
+          '[--log_level debug|info|warning|error] [--json auto|orjson|json] [--help]')
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    from mrn_logging import configure_logging, log_decoded_news, LOG_LEVELS, DEFAULT_LOG_LEVEL
+    from mrn_streams import parse_items
+
+    socket_path = ''
+    items = None
+    log_level = DEFAULT_LOG_LEVEL
+    json_codec = mrn_codec.DEFAULT_JSON_CODEC
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", ["help", "socket=", "ric=", "log_level=", "json="])
+    except getopt.GetoptError:
+        print_commandline_usage_and_exit(2)
+    for opt, arg in opts:
+        if opt in "--help":
+            print_commandline_usage_and_exit(0)
+        elif opt in "--socket":
+            socket_path = arg
+        elif opt in "--ric":
+            try:
+                items = parse_items(arg)
+            except ValueError:
+                print('The supported MRN RIC names are MRN_STORY or MRN_TRNA or MRN_TRNA_DOC or MRN_TRSI only')
+                sys.exit(2)
+        elif opt in "--log_level":
+            if arg not in LOG_LEVELS:
+                print('The supported log levels are debug, info, warning or error only')
+                sys.exit(2)
+            log_level = arg
+        elif opt in "--json":
+            if arg not in mrn_codec.JSON_CODECS:
+                print('The supported JSON codecs are auto, orjson or json only')
+                sys.exit(2)
+            json_codec = arg
+
+    if not socket_path:
+        print_commandline_usage_and_exit(2)
+    configure_logging(log_level)
+    try:
+        mrn_codec.use_codec(json_codec)
+    except ImportError as e:
+        print(f'{e}, use --json json or install it with pip install orjson')
+        sys.exit(2)
+
+    received = {}
+    try:
+        for story in subscribe(socket_path, items):
+            received[story.item] = received.get(story.item, 0) + 1
+            log_decoded_news(log, story.guid, story.size, story.news)
+        log.info('The publisher closed the connection')
+    except OSError as e:
+        print(f'Cannot subscribe to {socket_path}: {e}')
+        sys.exit(2)
+    except KeyboardInterrupt:
+        pass
+    log.info('Received news: %s', received)
@@ -0,0 +1,97 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    Header level filter of the MRN Update messages: the news are selected from the envelope fields
+    (MRN_SRC, MRN_TYPE, ...) of their first fragment, before the FRAGMENT data is base64 decoded or
+    decompressed.
+
+    A filter expression is a list of terms separated by ';', a news is kept when all the terms match.
+    A term is FIELD=value[,value...] (the field has one of the values) or FIELD!=value[,value...] (it has
+    none of them). FIELD is an Update message field name, or 'item' for the MRN item name. For example:
+
+        MRN_TYPE=STORY;MRN_SRC!=HK_RCS_IENCODE
+"""
+
+# Number of rejected multiple fragments news remembered per item stream
+DEFAULT_MAX_REJECTED = 100000
+
+ITEM_FIELD = 'item'
+
+
+def fragment_size(fragment_text):
+    """ Decoded length of base64 FRAGMENT text, without decoding it """
+    return len(fragment_text) // 4 * 3 - fragment_text[-2:].count('=')
+
+
+class HeaderFilter:
+    """
+        A parsed filter expression, ValueError for an invalid expression. drop() is called for every
+        Update message of an item stream, it remembers the GUID of a rejected news until its last
+        fragment, so the next fragments are dropped with one dictionary lookup.
+    """
+
+    def __init__(self, expression, max_rejected=DEFAULT_MAX_REJECTED):
+        self.expression = expression
+        self.max_rejected = max_rejected
+        # (field, values, negated) of each term
+        self.terms = []
+        for term in expression.split(';'):
+            term = term.strip()
+            if not term:
+                continue
+            field, separator, values = term.partition('=')
+            negated = field.endswith('!')
+            field = field.rstrip('!').strip()
+            values = frozenset(value.strip() for value in values.split(',') if value.strip())
+            if not separator or not field or not values:
+                raise ValueError(f'Invalid filter term {term!r}, expected FIELD=value[,value...] or FIELD!=value[,value...]')
+            self.terms.append((field, values, negated))
+        if not self.terms:
+            raise ValueError('Empty filter expression')
+
+    def __str__(self):
+        return self.expression
+
+    def accepts(self, item, fields):
+        """ True when the header fields of a news first fragment match all the terms """
+        for field, values, negated in self.terms:
+            value = item if field == ITEM_FIELD else fields.get(field)
+            if value is not None and not isinstance(value, str):
+                value = str(value)
+            if (value in values) == negated:
+                return False
+        return True
+
+    def drop(self, stream, guid, frag_num, fields):
+        """ True when the Update message of an MRNItemStream is not selected and must not be decoded """
+        rejected = stream.rejected
+        if frag_num > 1:
+            remaining = rejected.get(guid)
+            if remaining is None:
+                return False
+            # the news GUID is forgotten with its last fragment
+            remaining -= fragment_size(fields['FRAGMENT'])
+            if remaining > 0:
+                rejected[guid] = remaining
+            else:
+                del rejected[guid]
+            return True
+        if self.accepts(stream.item, fields):
+            return False
+        stream.filtered += 1
+        remaining = int(fields['TOT_SIZE']) - fragment_size(fields['FRAGMENT'])
+        # the next fragments received before the first one wait in an envelope, they are dropped with it
+        envelope = stream.envelopes.discard(guid, fields.get('MRN_SRC'))
+        if envelope is not None:
+            remaining -= envelope.size + envelope.slots_size
+        if remaining > 0:
+            if len(rejected) >= self.max_rejected:
+                # the oldest rejected news, its last fragments were probably lost
+                del rejected[next(iter(rejected))]
+            rejected[guid] = remaining
+        return True
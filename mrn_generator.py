@@ -0,0 +1,214 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+""" Synthetic Machine Readable News generator: gzip compressed, Base64 fragmented MRN Update messages """
+
+import base64
+import gzip
+import json
+import random
+import string
+from datetime import datetime, timezone
+from mrn_streams import mrn_domain, MRN_ITEMS
+
+MRN_TYPES = {'MRN_STORY': 'STORY', 'MRN_TRNA': 'TRNA', 'MRN_TRNA_DOC': 'TRNA_DOC', 'MRN_TRSI': 'TRSI'}
+MRN_SOURCES = ('HK1_PRD_A', 'DTC_PRD_A', 'DTC_PRD_B')
+
+DEFAULT_FRAGMENT_SIZE = 3000
+DEFAULT_MIN_BODY_SIZE = 200
+DEFAULT_MAX_BODY_SIZE = 100000
+DEFAULT_OPEN_STORIES = 8
+
+_WORDS = ('market', 'shares', 'profit', 'quarter', 'bank', 'rates', 'oil', 'growth', 'outlook',
+          'trade', 'bond', 'yield', 'inflation', 'revenue', 'guidance', 'merger', 'deal', 'court',
+          'exports', 'index', 'central', 'dividend', 'forecast', 'analysts', 'said', 'on', 'the')
+_RICS = ('AAPL.O', 'MSFT.O', 'VOD.L', '0005.HK', '7203.T', 'BHP.AX', 'XPSG.JK', 'LSEG.L', 'IBM.N', 'JPM.N')
+_TOPICS = ('N2:EQTY', 'N2:STX', 'N2:ASIA', 'N2:US', 'N2:MRG', 'N2:RES', 'N2:CMPNY', 'N2:ECI', 'N2:FUND', 'N2:REG')
+_AUDIENCES = ('NP:CNRA', 'NP:IDXN', 'NP:RNP', 'NP:PSC', 'NP:E', 'NP:U', 'NP:FNW')
+
+
+def _timestamp(now):
+    return now.strftime('%Y-%m-%dT%H:%M:%S.') + f'{now.microsecond // 1000:03d}Z'
+
+
+def _text(rng, size):
+    # Average word length with the separator is about 6 characters
+    return ' '.join(rng.choices(_WORDS, k=max(1, size // 6)))
+
+
+def make_guid(rng):
+    """ Random MRN style GUID """
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(rng.choice(alphabet) for _ in range(10)) + '_' + \
+        ''.join(rng.choice(alphabet + '+/') for _ in range(40))
+
+
+def make_story(item, guid, rng, body_size):
+    """ Create the JSON content of one MRN item: a news story, news analytics or sentiment indices """
+    now = datetime.now(timezone.utc)
+    rics = rng.sample(_RICS, rng.randint(1, 4))
+    if item == 'MRN_STORY':
+        return {
+            'altId': 'n' + guid[:9],
+            'audiences': rng.sample(_AUDIENCES, rng.randint(1, 3)),
+            'body': _text(rng, body_size),
+            'firstCreated': _timestamp(now),
+            'headline': _text(rng, 80).capitalize(),
+            'id': guid,
+            'instancesOf': [],
+            'language': 'en',
+            'messageType': rng.randint(1, 6),
+            'mimeType': 'text/plain',
+            'provider': 'NS:RTRS',
+            'pubStatus': 'stat:usable',
+            'subjects': ['R:' + ric for ric in rics] + rng.sample(_TOPICS, rng.randint(1, 6)),
+            'takeSequence': 1,
+            'urgency': rng.randint(1, 3),
+            'versionCreated': _timestamp(now)
+        }
+    if item in ('MRN_TRNA', 'MRN_TRNA_DOC'):
+        scores = []
+        for ric in rics:
+            negative, neutral = rng.random() / 2, rng.random() / 2
+            scores.append({
+                'assetCodes': ['P:' + str(rng.randint(4295000000, 4299999999)), 'R:' + ric],
+                'assetId': str(rng.randint(4295000000, 4299999999)),
+                'assetName': ric.split('.')[0],
+                'firstMentionSentence': rng.randint(0, 5),
+                'relevance': round(rng.random(), 6),
+                'sentimentClass': rng.choice((-1, 0, 1)),
+                'sentimentNegative': round(negative, 6),
+                'sentimentNeutral': round(neutral, 6),
+                'sentimentPositive': round(1 - negative - neutral, 6),
+                'sentimentWordCount': rng.randint(0, 200),
+                'noveltyCounts': [{'period': period, 'count': rng.randint(0, 9)}
+                                  for period in ('12H', '24H', '3D', '5D', '7D')],
+                'volumeCounts': [{'period': period, 'count': rng.randint(0, 99)}
+                                 for period in ('12H', '24H', '3D', '5D', '7D')]
+            })
+        return {
+            'analytics': {
+                'analyticsScores': scores,
+                'newsTopics': rng.sample(_TOPICS, rng.randint(0, 4)),
+                'systemVersion': 'MLNA_3.2'
+            },
+            'id': 'tr:' + guid,
+            'newsItem': {
+                'bodySize': body_size,
+                'dataType': 'News',
+                'headline': _text(rng, 80).capitalize(),
+                'metadata': {
+                    'altId': 'n' + guid[:9],
+                    'firstCreated': _timestamp(now),
+                    'guid': guid
+                },
+                'sourceId': guid,
+                'subjects': rng.sample(_TOPICS, rng.randint(1, 6)),
+                'urgency': rng.randint(1, 3)
+            }
+        }
+    # MRN_TRSI sentiment indices
+    return {
+        'id': 'tr:' + guid,
+        'windowTimestamp': _timestamp(now),
+        'dataType': 'Scores',
+        'indices': [{
+            'assetCode': 'R:' + ric,
+            'scores': {name: round(rng.uniform(-1, 1), 6) for name in
+                       ('Sentiment', 'Optimism', 'Fear', 'Joy', 'Trust', 'Anger', 'Uncertainty')},
+            'buzz': round(rng.uniform(0, 500), 3)
+        } for ric in rics]
+    }
+
+
+def fragment_story(item, stream_id, guid, story, fragment_size, mrn_src):
+    """ Compress and split one MRN item into the list of its Update messages """
+    compressed = gzip.compress(json.dumps(story).encode('utf-8'), mtime=0)
+    tot_size = len(compressed)
+    now = datetime.now(timezone.utc)
+    messages = []
+    for frag_num, start in enumerate(range(0, tot_size, fragment_size), 1):
+        fields = {
+            'FRAGMENT': base64.b64encode(compressed[start:start + fragment_size]).decode('ascii'),
+            'FRAG_NUM': frag_num,
+            'GUID': guid,
+            'MRN_SRC': mrn_src
+        }
+        if frag_num == 1:
+            # Only the first fragment carries the news item metadata fields
+            fields.update({
+                'ACTIV_DATE': now.strftime('%Y-%m-%d'),
+                'MRN_TYPE': MRN_TYPES[item],
+                'MRN_V_MAJ': '2',
+                'MRN_V_MIN': '10',
+                'TIMACT_MS': (now.hour * 3600 + now.minute * 60 + now.second) * 1000 + now.microsecond // 1000,
+                'TOT_SIZE': tot_size
+            })
+        messages.append({
+            'Domain': mrn_domain,
+            'Fields': fields,
+            'ID': stream_id,
+            'Key': {'Name': item, 'Service': 'ELEKTRON_DD'},
+            'Type': 'Update',
+            'UpdateType': 'Unspecified',
+            'DoNotCache': True,
+            'DoNotConflate': True,
+            'DoNotRipple': True
+        })
+    return messages
+
+
+class MRNGenerator:
+    """
+        Generates an endless, reproducible sequence of MRN Update messages.
+
+        Story bodies have a log-uniform size between min_body_size and max_body_size, so TOT_SIZE
+        and the number of fragments vary. Up to open_stories news items are in flight at the same
+        time and their fragments are interleaved, the way they arrive from a busy MRN feed.
+    """
+
+    def __init__(self, items=MRN_ITEMS, stream_ids=None, fragment_size=DEFAULT_FRAGMENT_SIZE,
+                 min_body_size=DEFAULT_MIN_BODY_SIZE, max_body_size=DEFAULT_MAX_BODY_SIZE,
+                 open_stories=DEFAULT_OPEN_STORIES, seed=None):
+        self.items = list(items)
+        # Stream ID of each item, the example applications request the first item with ID 2
+        self.stream_ids = stream_ids or {item: index + 2 for index, item in enumerate(self.items)}
+        self.fragment_size = fragment_size
+        self.min_body_size = min_body_size
+        self.max_body_size = max_body_size
+        self.open_stories = max(1, open_stories)
+        self.rng = random.Random(seed)
+
+    def story_messages(self, item=None):
+        """ Create the Update messages of one new news item """
+        rng = self.rng
+        if item is None:
+            item = rng.choice(self.items)
+        guid = make_guid(rng)
+        body_size = int(self.min_body_size * (self.max_body_size / self.min_body_size) ** rng.random())
+        story = make_story(item, guid, rng, body_size)
+        return fragment_story(item, self.stream_ids[item], guid, story, self.fragment_size,
+                              rng.choice(MRN_SOURCES))
+
+    def fragments(self):
+        """ Yield (Update message, is last fragment of its news item) tuples forever """
+        rng = self.rng
+        in_flight = [self.story_messages() for _ in range(self.open_stories)]
+        while True:
+            index = rng.randrange(len(in_flight))
+            messages = in_flight[index]
+            message = messages.pop(0)
+            if not messages:
+                in_flight[index] = self.story_messages()
+                yield message, True
+            else:
+                yield message, False
+
+    def updates(self):
+        """ Yield Update messages forever """
+        for message, _ in self.fragments():
+            yield message
@@ -0,0 +1,86 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    Console output levels of the MRN examples.
+
+    debug: every received and sent message as pretty JSON, fragment assembly details and the full news.
+    info: connection events and one compact line per completed news.
+    warning: problems only.
+"""
+
+import sys
+import json
+import logging
+import mrn_codec
+
+LOG_LEVELS = {'debug': logging.DEBUG, 'info': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR}
+DEFAULT_LOG_LEVEL = 'debug'
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """ Console log handler which lets UnicodeEncodeError reach the example, the same way as print() """
+
+    def handleError(self, record):
+        error = sys.exc_info()[1]
+        if isinstance(error, UnicodeEncodeError):
+            raise error
+        super().handleError(record)
+
+
+def configure_logging(level=DEFAULT_LOG_LEVEL, stream=None):
+    """ Send the example output to the console (stdout) at the given level name """
+    handler = ConsoleHandler(stream if stream is not None else sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    root = logging.getLogger()
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVELS[level])
+    # Keep the websocket-client library messages out of the example output
+    logging.getLogger('websocket').setLevel(max(LOG_LEVELS[level], logging.WARNING))
+
+
+class JsonDump:
+    """
+        Lazy JSON text of a message for log arguments, formatted only if the record is emitted:
+        pretty printed when the logger is at debug level, a single compact line otherwise.
+    """
+    __slots__ = ('logger', 'message_json')
+
+    def __init__(self, logger, message_json):
+        self.logger = logger
+        self.message_json = message_json
+
+    def __str__(self):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            return json.dumps(self.message_json, sort_keys=True, indent=2, separators=(',', ':'))
+        return json.dumps(self.message_json, separators=(',', ':'), ensure_ascii=False)
+
+
+def news_headline(news):
+    """ Headline of a news story or of the news analysed by a TRNA item, empty for other MRN items """
+    headline = news.get('headline')
+    if headline is None and isinstance(news.get('newsItem'), dict):
+        headline = news['newsItem'].get('headline')
+    return headline or ''
+
+
+def log_news(logger, guid, decompressed_data):
+    """ Output a completed news: the full news at debug level, one compact line at info level """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('News = %s', mrn_codec.loads(decompressed_data))
+    elif logger.isEnabledFor(logging.INFO):
+        logger.info('News %s %d bytes %s', guid, len(decompressed_data), news_headline(mrn_codec.loads(decompressed_data)))
+
+
+def log_decoded_news(logger, guid, size, news):
+    """ Output a completed news already parsed, size is the decompressed data length """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('News = %s', news)
+    elif logger.isEnabledFor(logging.INFO):
+        logger.info('News %s %d bytes %s', guid, size, news_headline(news))
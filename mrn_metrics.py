@@ -0,0 +1,301 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    Low overhead counters and latency histograms of the MRN examples, exposed in the Prometheus text
+    format on a local HTTP /metrics endpoint and as periodic summary lines.
+
+    Counters and histograms are plain attribute updates without locks: each one is updated by a single
+    thread (the metrics are labeled per session and MRN item), the exporter threads only read them.
+    Values which already exist elsewhere, like the envelope store occupancy, are registered as
+    functions and only read when the metrics are exported.
+"""
+
+import math
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Histogram buckets: SUB_BUCKETS per power of two from 2^(MIN_EXPONENT - 1) (~0.5 microsecond) to
+# 2^MAX_EXPONENT (~2 million), every bucket is at most 1 / SUB_BUCKETS (12.5%) wide
+SUB_BUCKETS = 8
+MIN_EXPONENT = -20
+MAX_EXPONENT = 21
+# Cumulative buckets of the Prometheus output, one per power of two
+EXPORT_EXPONENTS = range(MIN_EXPONENT, MAX_EXPONENT + 1)
+
+DEFAULT_METRICS_HOST = '127.0.0.1'
+
+_frexp = math.frexp
+_MANTISSA_SCALE = 2 * SUB_BUCKETS
+_LAST_BUCKET = (MAX_EXPONENT - MIN_EXPONENT + 1) * SUB_BUCKETS - 1
+
+log = logging.getLogger('mrn_metrics')
+
+
+class Counter:
+    """ Monotonic counter """
+    __slots__ = ('value',)
+    kind = 'counter'
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def get(self):
+        return self.value
+
+
+class FunctionMetric:
+    """ Counter or gauge read from a function when the metrics are exported """
+    __slots__ = ('kind', 'function')
+
+    def __init__(self, kind, function):
+        self.kind = kind
+        self.function = function
+
+    def get(self):
+        return self.function()
+
+
+class Histogram:
+    """
+        Log-linear (HDR style) histogram: observe() is a frexp and a list increment. Quantiles are
+        the upper bound of their bucket, so they are at most 12.5% above the observed value.
+    """
+    __slots__ = ('counts', 'count', 'sum', 'max')
+    kind = 'histogram'
+
+    def __init__(self):
+        self.counts = [0] * (_LAST_BUCKET + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        mantissa, exponent = _frexp(value)
+        index = (exponent - MIN_EXPONENT) * SUB_BUCKETS + int(mantissa * _MANTISSA_SCALE) - SUB_BUCKETS
+        if value <= 0 or index < 0:
+            index = 0
+        elif index > _LAST_BUCKET:
+            index = _LAST_BUCKET
+        self.counts[index] += 1
+
+    def snapshot(self):
+        """ Copy of the bucket counts, count and sum, for the difference between two exports """
+        return list(self.counts), self.count, self.sum
+
+    @staticmethod
+    def upper_bound(index):
+        exponent, sub_bucket = divmod(index, SUB_BUCKETS)
+        return (0.5 + (sub_bucket + 1) / (2 * SUB_BUCKETS)) * 2.0 ** (exponent + MIN_EXPONENT)
+
+    @staticmethod
+    def quantile(counts, total, fraction):
+        """ The upper bound of the bucket holding the fraction quantile of bucket counts """
+        if not total:
+            return 0.0
+        rank = math.ceil(total * fraction)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return Histogram.upper_bound(index)
+        return Histogram.upper_bound(len(counts) - 1)
+
+    def cumulative(self):
+        """ (upper bound, cumulative count) of the Prometheus buckets, one per power of two """
+        # the frexp exponent e buckets hold the values from 2^(e - 1) to 2^e
+        counts = self.counts
+        buckets = []
+        seen = 0
+        for exponent in EXPORT_EXPONENTS:
+            start = (exponent - MIN_EXPONENT) * SUB_BUCKETS
+            seen += sum(counts[start:start + SUB_BUCKETS])
+            buckets.append((2.0 ** exponent, seen))
+        return buckets
+
+
+class MetricsRegistry:
+    """ Named metrics with labels, in registration order """
+
+    def __init__(self):
+        # name -> (kind, help, {labels: metric})
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, function=None, **labels):
+        """ A new Counter, or a counter read from function """
+        return self.add(name, help_text, Counter() if function is None else FunctionMetric('counter', function), **labels)
+
+    def gauge(self, name, help_text, function, **labels):
+        """ A gauge read from function """
+        return self.add(name, help_text, FunctionMetric('gauge', function), **labels)
+
+    def histogram(self, name, help_text, **labels):
+        return self.add(name, help_text, Histogram(), **labels)
+
+    def add(self, name, help_text, metric, **labels):
+        """ Register a metric, it replaces the metric of the same name and labels """
+        with self._lock:
+            family = self._families.setdefault(name, (metric.kind, help_text, {}))
+            family[2][tuple(sorted(labels.items()))] = metric
+        return metric
+
+    def remove(self, **labels):
+        """ Unregister the metrics having these labels, for example of a closed session """
+        selected = set(labels.items())
+        with self._lock:
+            for _, _, metrics in self._families.values():
+                for key in [key for key in metrics if selected <= set(key)]:
+                    del metrics[key]
+
+    def collect(self):
+        """ (name, kind, help, [(labels, metric)]) of every metric family """
+        with self._lock:
+            return [(name, kind, help_text, list(metrics.items()))
+                    for name, (kind, help_text, metrics) in self._families.items()]
+
+    def exposition(self):
+        """ The metrics in the Prometheus text exposition format """
+        lines = []
+        for name, kind, help_text, metrics in self.collect():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, metric in metrics:
+                if kind == 'histogram':
+                    for bound, count in metric.cumulative():
+                        lines.append(f'{name}_bucket{_labels(labels, le=_number(bound))} {count}')
+                    lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {metric.count}')
+                    lines.append(f'{name}_sum{_labels(labels)} {_number(metric.sum)}')
+                    lines.append(f'{name}_count{_labels(labels)} {metric.count}')
+                else:
+                    try:
+                        lines.append(f'{name}{_labels(labels)} {_number(metric.get())}')
+                    except Exception as e:
+                        log.debug('Cannot read metric %s: %s', name, e)
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    text = ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in items)
+    return '{' + text + '}'
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else ('+Inf' if value > 0 else '-Inf')
+    return str(value)
+
+
+# The metrics of the application
+REGISTRY = MetricsRegistry()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.exposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug('metrics request: ' + format, *args)
+
+
+def start_http_server(port, host=DEFAULT_METRICS_HOST, registry=REGISTRY):
+    """ Serve http://host:port/metrics on a daemon thread, returns the server """
+    handler = type('RegistryMetricsHandler', (MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    log.info('Metrics endpoint http://%s:%d/metrics', host, server.server_address[1])
+    return server
+
+
+class SummaryReporter:
+    """
+        Logs one line per active metric every interval seconds: counter rates and histogram quantiles of
+        the interval. The lines are logged at info level, the default logger is enabled at info level even
+        when the console output level is higher.
+    """
+
+    def __init__(self, interval, logger=log, registry=REGISTRY):
+        self.interval = interval
+        self.logger = logger
+        self.registry = registry
+        self._previous = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-summary', daemon=True)
+
+    def start(self):
+        if not self.logger.isEnabledFor(logging.INFO):
+            self.logger.setLevel(logging.INFO)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def report(self):
+        for name, kind, _, metrics in self.registry.collect():
+            for labels, metric in metrics:
+                key = (name, labels)
+                if kind == 'histogram':
+                    counts, count, total = metric.snapshot()
+                    previous_counts, previous_count, previous_total = self._previous.get(key, (None, 0, 0.0))
+                    self._previous[key] = (counts, count, total)
+                    observed = count - previous_count
+                    if not observed:
+                        continue
+                    if previous_counts is not None:
+                        counts = [now - before for now, before in zip(counts, previous_counts)]
+                    # the quantiles are bucket upper bounds, not above the largest value observed so far
+                    highest = min(Histogram.quantile(counts, observed, 1.0), metric.max)
+                    self.logger.info('%s%s n=%d mean=%s p50=%s p99=%s max=%s', name, _labels(labels), observed,
+                                     _short((total - previous_total) / observed),
+                                     _short(min(Histogram.quantile(counts, observed, 0.5), highest)),
+                                     _short(min(Histogram.quantile(counts, observed, 0.99), highest)), _short(highest))
+                else:
+                    try:
+                        value = metric.get()
+                    except Exception:
+                        continue
+                    if kind == 'counter':
+                        rate = (value - self._previous.get(key, 0)) / self.interval
+                        self._previous[key] = value
+                        if rate:
+                            self.logger.info('%s%s %s/s total %s', name, _labels(labels), _short(rate), _number(value))
+                    elif value:
+                        self.logger.info('%s%s %s', name, _labels(labels), _number(value))
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.report()
+
+
+def _short(value):
+    return f'{value:.3g}'
@@ -0,0 +1,158 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    Staged decode pipeline of the MRN examples, so the WebSocket thread only receives.
+
+    socket thread: answers Ping messages and puts the received frames into a bounded frame queue.
+    assemble thread: parses the frames and processes the messages in order, the MRN fragments of a
+        GUID are assembled in the order they were received.
+    workers: a thread or process pool decompresses and parses the completed news.
+    output thread: outputs the decoded news in the order they were completed.
+"""
+
+import os
+import sys
+import zlib
+import queue
+import signal
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import mrn_codec
+
+PIPELINE_EXECUTORS = ('thread', 'process')
+DEFAULT_PIPELINE_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_PIPELINE_QUEUE_SIZE = 10000
+
+# Number of completed news waiting for or being decoded by each worker
+NEWS_PER_WORKER = 4
+
+log = logging.getLogger('mrn_pipeline')
+
+
+def _init_process_worker(codec_name):
+    # Ctrl+C stops the application, which then shuts the workers down after the queued news
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    mrn_codec.use_codec(codec_name)
+
+
+def decode_news(item, guid, data, compressed):
+    """ Decompress (if compressed) and parse a completed news, runs on the pool workers """
+    if compressed:
+        data = zlib.decompress(data, zlib.MAX_WBITS | 32)
+    return item, guid, len(data), mrn_codec.loads(data)
+
+
+def contains_ping(message):
+    """ True if a received WebSocket text may contain a Ping message, checked without parsing it """
+    return '"Ping"' in message if isinstance(message, str) else b'"Ping"' in message
+
+
+class DecodePipeline:
+    """
+        Moves the MRN decoding off the WebSocket thread.
+
+        process_message(message_json) is called on the assemble thread for each received message,
+        it calls submit_news() for the completed news. on_news(item, guid, size, news) is called on the
+        output thread for each decoded news. A full frame queue blocks the WebSocket thread, which
+        stops reading the socket until the pipeline catches up.
+    """
+
+    def __init__(self, process_message, on_news, executor='thread', workers=DEFAULT_PIPELINE_WORKERS,
+                 queue_size=DEFAULT_PIPELINE_QUEUE_SIZE, name='MRN'):
+        if executor not in PIPELINE_EXECUTORS:
+            raise ValueError(f'Unknown pipeline executor {executor}')
+        self.process_message = process_message
+        self.on_news = on_news
+        self.executor_name = executor
+        self.workers = workers
+        self.name = name
+        self.frames = queue.Queue(queue_size)
+        self.decoding = queue.Queue(workers * NEWS_PER_WORKER)
+        # Number of news which could not be decoded
+        self.errors = 0
+        self._executor = None
+        self._threads = []
+
+    def start(self):
+        """ Start the pool and the assemble and output threads """
+        if self._threads:
+            return
+        if self.executor_name == 'process':
+            # The workers decode the news with the codec of this process
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_process_worker,
+                                                 initargs=(mrn_codec.codec_name,))
+        else:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f'{self.name}-decode')
+        self._threads = [threading.Thread(target=self._assemble, name=f'{self.name}-assemble', daemon=True),
+                         threading.Thread(target=self._output, name=f'{self.name}-output', daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """ Decode the frames already received and stop the threads and the pool """
+        if not self._threads:
+            return
+        self.frames.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._executor.shutdown()
+        self._executor = None
+
+    def put_frame(self, message):
+        """ Queue a received WebSocket text or an already parsed list of messages, called on the WebSocket thread """
+        self.frames.put(message)
+
+    def submit_news(self, item, guid, data, compressed):
+        """ Decode a completed news on the pool, called by process_message on the assemble thread """
+        if self.executor_name == 'process':
+            # The envelope buffer views cannot be sent to another process
+            data = bytes(data)
+        self.decoding.put(self._executor.submit(decode_news, item, guid, data, compressed))
+
+    def stats(self):
+        """ Current queue occupancy and decode error counter """
+        return {
+            'frames': self.frames.qsize(),
+            'decoding': self.decoding.qsize(),
+            'errors': self.errors
+        }
+
+    def _assemble(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            try:
+                messages = mrn_codec.loads(frame) if isinstance(frame, (str, bytes)) else frame
+                for message_json in messages:
+                    self.process_message(message_json)
+            except Exception as e:
+                log.warning('%s: pipeline message processing exception: %s', self.name, e)
+        self.decoding.put(None)
+
+    def _output(self):
+        while True:
+            future = self.decoding.get()
+            if future is None:
+                break
+            guid = None
+            try:
+                item, guid, size, news = future.result()
+                self.on_news(item, guid, size, news)
+            except zlib.error as error:
+                self.errors += 1
+                log.warning('zlib decompressing exception: %s', error)
+            # Some console environments like Windows may encounter this unicode display as a limitation of OS
+            except UnicodeEncodeError as encodeerror:
+                log.warning('UnicodeEncodeError exception. Cannot decode unicode character for %s in this environment: %s',
+                            guid, encodeerror)
+            except Exception as e:
+                self.errors += 1
+                log.warning('exception: %s', sys.exc_info()[0])
@@ -0,0 +1,274 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+""" MRN fragment assembly: GUID indexed store of incomplete news envelopes """
+
+import time
+import zlib
+from collections import OrderedDict
+
+# Default limits for the incomplete news envelopes store
+DEFAULT_ENVELOPE_TTL = 60.0
+DEFAULT_MAX_ENVELOPES = 10000
+DEFAULT_MAX_ENVELOPE_BYTES = 64 * 1024 * 1024
+
+# 'stream' decompresses each fragment on arrival, 'final' decompresses the complete news item only
+DECOMPRESS_MODES = ('stream', 'final')
+DEFAULT_DECOMPRESS_MODE = 'stream'
+
+
+class NewsEnvelope:
+    """
+        Incomplete news item: the FRAGMENT data received so far for one GUID and MRN_SRC.
+
+        Fragments are written into a buffer preallocated from TOT_SIZE in FRAG_NUM order, frag_num is the
+        last fragment written. A fragment received before the previous fragments, or before the first
+        fragment which carries TOT_SIZE, waits in a slot by FRAG_NUM until they are received. In the
+        'stream' decompress mode each fragment is also fed to a zlib decompressor when it is written, so
+        completing the news item only needs to flush the decompressor.
+    """
+    __slots__ = ('guid', 'mrn_src', 'frag_num', 'tot_size', 'size', 'buffer', 'created', 'last_update',
+                 'decompressor', 'decompressed', 'decompressed_size', 'slots', 'slots_size')
+
+    def __init__(self, guid, mrn_src, last_update, stream=True):
+        self.guid = guid
+        self.mrn_src = mrn_src
+        self.frag_num = 0
+        # None until the first fragment is received
+        self.tot_size = None
+        self.created = last_update
+        self.last_update = last_update
+        self.buffer = bytearray()
+        self.size = 0
+        self.decompressed = []
+        self.decompressed_size = 0
+        self.decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32) if stream else None
+        # Fragments received ahead of their turn by FRAG_NUM, and their total length
+        self.slots = {}
+        self.slots_size = 0
+
+    @property
+    def fragment(self):
+        """ The FRAGMENT bytes received so far, without copying the buffer """
+        return memoryview(self.buffer)[:self.size]
+
+    @property
+    def complete(self):
+        """ True when all TOT_SIZE bytes of the news item have been written """
+        return self.size == self.tot_size
+
+    @property
+    def footprint(self):
+        """ Memory held by the envelope: the FRAGMENT buffer, the waiting fragments and the data decompressed so far """
+        return len(self.buffer) + self.slots_size + self.decompressed_size
+
+    def put(self, frag_num, fragment, tot_size=None):
+        """
+            Write a fragment, or keep it in its slot until the previous fragments are received. tot_size is
+            the TOT_SIZE of the first fragment. Returns False for a fragment already received.
+        """
+        if frag_num <= self.frag_num or frag_num in self.slots:
+            return False
+        if tot_size is not None and self.tot_size is None:
+            self.tot_size = tot_size
+            self.buffer = bytearray(tot_size)
+        if frag_num != self.frag_num + 1:
+            self.slots[frag_num] = fragment
+            self.slots_size += len(fragment)
+            return True
+        self.write(fragment)
+        self.frag_num = frag_num
+        # the fragments waiting for this one
+        slots = self.slots
+        while slots and self.frag_num + 1 in slots:
+            fragment = slots.pop(self.frag_num + 1)
+            self.slots_size -= len(fragment)
+            self.write(fragment)
+            self.frag_num += 1
+        return True
+
+    def write(self, fragment):
+        """ Copy a fragment into the buffer at the current position and decompress it in stream mode """
+        end = self.size + len(fragment)
+        # A fragment beyond TOT_SIZE grows the buffer, the envelope then never completes
+        self.buffer[self.size:end] = fragment
+        self.size = end
+        if self.decompressor is not None:
+            data = self.decompressor.decompress(fragment)
+            if data:
+                self.decompressed.append(data)
+                self.decompressed_size += len(data)
+
+    def decompress(self):
+        """ Return the decompressed news item data of a complete envelope """
+        if self.decompressor is None:
+            return zlib.decompress(self.fragment, zlib.MAX_WBITS | 32)
+        self.decompressed.append(self.decompressor.flush())
+        if not self.decompressor.eof:
+            raise zlib.error('Error -5 while decompressing data: incomplete or truncated stream')
+        return b''.join(self.decompressed)
+
+
+class NewsEnvelopeStore:
+    """
+        Keeps the incomplete news envelopes indexed by (GUID, MRN_SRC) for O(1) fragment lookup.
+
+        Envelopes are kept in least recently updated order. Envelopes which do not receive a
+        fragment within ttl seconds are expired, and the least recently updated envelopes are
+        evicted when the store holds more than max_envelopes envelopes or max_bytes of envelope memory.
+    """
+
+    def __init__(self, ttl=DEFAULT_ENVELOPE_TTL, max_envelopes=DEFAULT_MAX_ENVELOPES,
+                 max_bytes=DEFAULT_MAX_ENVELOPE_BYTES, decompress_mode=DEFAULT_DECOMPRESS_MODE):
+        if decompress_mode not in DECOMPRESS_MODES:
+            raise ValueError(f'Unknown decompress mode {decompress_mode}')
+        self.ttl = ttl
+        self.decompress_mode = decompress_mode
+        self.max_envelopes = max_envelopes
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # Number of envelopes removed by the TTL and by the count/byte limits
+        self.expired = 0
+        self.evicted = 0
+        # Number of fragments received ahead of their turn, received again, and of the removed envelopes
+        self.reordered = 0
+        self.duplicates = 0
+        self.lost_fragments = 0
+        self._envelopes = OrderedDict()
+        # Keys of the recently completed news, a fragment of a completed news is a duplicate
+        self._completed = {}
+        self.max_completed = max_envelopes or DEFAULT_MAX_ENVELOPES
+
+    def __len__(self):
+        return len(self._envelopes)
+
+    def get(self, guid, mrn_src, now=None):
+        """ Return the envelope of GUID and MRN_SRC, or None if it is unknown or expired """
+        envelope = self._envelopes.get((guid, mrn_src))
+        if envelope is None:
+            return None
+        if now is None:
+            now = time.monotonic()
+        if self.ttl and now - envelope.last_update > self.ttl:
+            self.expire(now)
+            return None
+        return envelope
+
+    def put(self, guid, mrn_src, frag_num, fragment, tot_size=None, now=None):
+        """
+            Store a fragment of a multiple fragments news in any order, tot_size is the TOT_SIZE of the first
+            fragment. Returns the envelope, None for a duplicate fragment, and the number of older envelopes
+            removed to make room for it. A fragment which cannot be decompressed removes the envelope and
+            raises zlib.error.
+        """
+        if (guid, mrn_src) in self._completed:
+            self.duplicates += 1
+            return None, 0
+        if now is None:
+            now = time.monotonic()
+        envelope = self.get(guid, mrn_src, now)
+        if envelope is None:
+            envelope = NewsEnvelope(guid, mrn_src, now, stream=self.decompress_mode == 'stream')
+            self._envelopes[(guid, mrn_src)] = envelope
+        footprint = envelope.footprint
+        waiting = len(envelope.slots)
+        try:
+            stored = envelope.put(frag_num, fragment, tot_size)
+        except zlib.error:
+            self.total_bytes -= footprint
+            del self._envelopes[(guid, mrn_src)]
+            raise
+        if not stored:
+            self.duplicates += 1
+            return None, 0
+        if len(envelope.slots) > waiting:
+            self.reordered += 1
+        envelope.last_update = now
+        self.total_bytes += envelope.footprint - footprint
+        self._envelopes.move_to_end((guid, mrn_src))
+        return envelope, self.expire(now) + self._enforce_limits()
+
+    def remove(self, envelope):
+        """ Remove a completed envelope from the store """
+        key = (envelope.guid, envelope.mrn_src)
+        if self._envelopes.pop(key, None) is not None:
+            self.total_bytes -= envelope.footprint
+        self._remember(key)
+
+    def discard(self, guid, mrn_src):
+        """
+            Remove the envelope of a news dropped by the header filter, returns it or None. The late copies of
+            its fragments are ignored like the fragments of a completed news.
+        """
+        key = (guid, mrn_src)
+        envelope = self._envelopes.pop(key, None)
+        if envelope is not None:
+            self.total_bytes -= envelope.footprint
+            self._remember(key)
+        return envelope
+
+    def complete(self, guid, mrn_src):
+        """ Remember a completed single fragment news, False if it was already completed """
+        key = (guid, mrn_src)
+        if key in self._completed:
+            self.duplicates += 1
+            return False
+        self._remember(key)
+        return True
+
+    def _remember(self, key):
+        completed = self._completed
+        if len(completed) >= self.max_completed:
+            # the oldest completed news
+            del completed[next(iter(completed))]
+        completed[key] = None
+
+    def expire(self, now=None):
+        """ Remove the envelopes not updated within ttl seconds, returns the number removed """
+        if not self.ttl:
+            return 0
+        if now is None:
+            now = time.monotonic()
+        deadline = now - self.ttl
+        removed = 0
+        # The least recently updated envelope is always first
+        while self._envelopes:
+            envelope = next(iter(self._envelopes.values()))
+            if envelope.last_update > deadline:
+                break
+            self._pop_oldest()
+            removed += 1
+        self.expired += removed
+        return removed
+
+    def stats(self):
+        """ Current store occupancy and removal counters """
+        return {
+            'envelopes': len(self._envelopes),
+            'bytes': self.total_bytes,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'reordered': self.reordered,
+            'duplicates': self.duplicates,
+            'lost_fragments': self.lost_fragments
+        }
+
+    def _enforce_limits(self):
+        removed = 0
+        # Keep the most recent envelope even if it is larger than max_bytes on its own
+        while len(self._envelopes) > 1 and \
+                ((self.max_envelopes and len(self._envelopes) > self.max_envelopes) or
+                 (self.max_bytes and self.total_bytes > self.max_bytes)):
+            self._pop_oldest()
+            removed += 1
+        self.evicted += removed
+        return removed
+
+    def _pop_oldest(self):
+        _, envelope = self._envelopes.popitem(last=False)
+        self.total_bytes -= envelope.footprint
+        self.lost_fragments += envelope.frag_num + len(envelope.slots)
@@ -0,0 +1,141 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    Topic router of the decoded MRN news: subscribers subscribe to codes (RIC codes like 'R:LSEG.L',
+    topic codes like 'N2:EQTY', audience codes like 'NP:RITN') and receive each news having one of
+    their codes once.
+
+    The router keeps an inverted index from code to subscribers, so routing a news costs one lookup per
+    code of the news, whatever the number of subscriptions.
+"""
+
+import json
+import logging
+import threading
+
+log = logging.getLogger('mrn_router')
+
+
+def story_codes(item, news):
+    """
+        The routing codes of a parsed news: subjects and audiences of MRN_STORY, asset codes, news topics
+        and subjects of MRN_TRNA and MRN_TRNA_DOC, asset codes of MRN_TRSI
+    """
+    if item == 'MRN_STORY':
+        return news.get('subjects', []) + news.get('audiences', [])
+    if item in ('MRN_TRNA', 'MRN_TRNA_DOC'):
+        analytics = news.get('analytics', {})
+        codes = []
+        for score in analytics.get('analyticsScores', []):
+            codes.extend(score.get('assetCodes', []))
+        codes.extend(analytics.get('newsTopics', []))
+        codes.extend(news.get('newsItem', {}).get('subjects', []))
+        return codes
+    return [index['assetCode'] for index in news.get('indices', []) if 'assetCode' in index]
+
+
+class TopicRouter:
+    """
+        Inverted index of the subscriptions, safe to use from several threads. A subscriber is a callable
+        subscriber(item, guid, news), it is called on the thread routing the news, outside of the lock.
+    """
+
+    def __init__(self):
+        # code -> set of subscribers, subscriber -> set of codes
+        self._index = {}
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        # Number of routed news and of news delivered to the subscribers
+        self.news = 0
+        self.deliveries = 0
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, subscriber, codes):
+        """ Add codes to the subscriptions of a subscriber """
+        with self._lock:
+            subscribed = self._subscriptions.setdefault(subscriber, set())
+            for code in codes:
+                subscribed.add(code)
+                self._index.setdefault(code, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber, codes=None):
+        """ Remove codes, or all the codes, from the subscriptions of a subscriber """
+        with self._lock:
+            subscribed = self._subscriptions.get(subscriber, set())
+            codes = set(subscribed) if codes is None else subscribed.intersection(codes)
+            for code in codes:
+                subscribers = self._index[code]
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._index[code]
+            subscribed -= codes
+            if not subscribed:
+                self._subscriptions.pop(subscriber, None)
+
+    def subscribers(self, codes):
+        """ The subscribers of any of codes """
+        index = self._index
+        matched = set()
+        with self._lock:
+            for code in codes:
+                subscribers = index.get(code)
+                if subscribers:
+                    matched.update(subscribers)
+        return matched
+
+    def route(self, item, guid, news):
+        """ Deliver a parsed news to its subscribers, returns the number of subscribers """
+        matched = self.subscribers(story_codes(item, news))
+        self.news += 1
+        for subscriber in matched:
+            try:
+                subscriber(item, guid, news)
+            except Exception as e:
+                log.warning('Subscriber %s failed on news %s: %s', subscriber, guid, e)
+        self.deliveries += len(matched)
+        return len(matched)
+
+    def stats(self):
+        return {'subscribers': len(self._subscriptions), 'codes': len(self._index), 'news': self.news,
+                'deliveries': self.deliveries}
+
+
+class LoggingSubscriber:
+    """ A named subscriber of the console examples: counts its news and outputs one line per news """
+    __slots__ = ('name', 'news', 'logger')
+
+    def __init__(self, name, logger=log):
+        self.name = name
+        self.news = 0
+        self.logger = logger
+
+    def __call__(self, item, guid, news):
+        self.news += 1
+        self.logger.info('Routed %s news %s to %s', item, guid, self.name)
+
+    def __repr__(self):
+        return self.name
+
+
+def load_subscriptions(path, router, logger=log):
+    """
+        Subscribe a LoggingSubscriber per entry of a JSON file {"subscriber name": ["code", ...], ...},
+        returns the subscribers. OSError or ValueError when the file cannot be read.
+    """
+    with open(path, encoding='utf-8') as subscriptions_file:
+        subscriptions = json.load(subscriptions_file)
+    if not isinstance(subscriptions, dict):
+        raise ValueError(f'{path} is not a JSON object of subscriber names and codes')
+    subscribers = []
+    for name, codes in subscriptions.items():
+        subscriber = LoggingSubscriber(name, logger)
+        router.subscribe(subscriber, [codes] if isinstance(codes, str) else codes)
+        subscribers.append(subscriber)
+    return subscribers
@@ -0,0 +1,304 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+"""
+    File sinks for the completed news of the MRN examples.
+
+    jsonl: one JSON line per news, jsonl.gz: the same lines gzip compressed, parquet: one row group per
+    batch with the received, item, guid, size and news (JSON text) columns, requires pyarrow.
+
+    The news are written in batches (group commit) by a flusher thread: a batch is written, flushed and
+    optionally fsync'ed when it holds batch_size news or flush_interval seconds after its first news, the
+    threads which add the news never wait for a write. A batch which cannot be written is logged and dropped. Files are written as
+    '<name>.part' and renamed to '<name>' when they are rotated by size or age, so bulk loaders only
+    see complete files.
+"""
+
+import os
+import gzip
+import time
+import logging
+import threading
+from datetime import datetime
+import mrn_codec
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+SINK_FORMATS = ('jsonl', 'jsonl.gz', 'parquet')
+# batch: fsync every batch, rotate: fsync when a file is completed, none: leave it to the OS
+FSYNC_POLICIES = ('batch', 'rotate', 'none')
+
+DEFAULT_SINK_DIR = 'news'
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_ROTATE_BYTES = 256 * 1024 * 1024
+DEFAULT_ROTATE_SECONDS = 3600.0
+DEFAULT_FSYNC_POLICY = 'batch'
+
+log = logging.getLogger('mrn_sinks')
+
+
+class StorySink:
+    """
+        Batched, rotating file sink of the completed news, safe to use from several threads. write() only
+        queues the news, the flusher thread writes the batches. Subclasses open the files and write the batches.
+    """
+    extension = ''
+
+    def __init__(self, directory=DEFAULT_SINK_DIR, prefix='mrn', batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, rotate_bytes=DEFAULT_ROTATE_BYTES,
+                 rotate_seconds=DEFAULT_ROTATE_SECONDS, fsync=DEFAULT_FSYNC_POLICY):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'Unknown fsync policy {fsync}')
+        self.directory = directory
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.fsync = fsync
+        # Number of news and batches written, of news dropped because they could not be written, and of
+        # completed files
+        self.news = 0
+        self.batches = 0
+        self.dropped = 0
+        self.files = 0
+        self.path = None
+        self._file = None
+        self._file_opened = 0.0
+        self._file_sequence = 0
+        # _lock guards the current and full batches only, it is never held during a write. _write_lock
+        # guards the file, the batches are taken and written under it so they are written in order
+        self._batch = []
+        self._batch_started = 0.0
+        self._full_batches = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+        self._flusher = threading.Thread(target=self._flush_loop, name=f'{prefix}-sink', daemon=True)
+        self._flusher.start()
+
+    def write(self, item, guid, news, size=None):
+        """
+            Add a completed news to the current batch. news is the decompressed JSON data (bytes) or the parsed
+            news, size the decompressed data length.
+        """
+        if size is None:
+            size = len(news) if isinstance(news, (bytes, bytearray, memoryview)) else 0
+        with self._lock:
+            if not self._batch:
+                self._batch_started = time.monotonic()
+            self._batch.append((time.time(), item, guid, size, news))
+            if len(self._batch) >= self.batch_size:
+                self._full_batches.append(self._batch)
+                self._batch = []
+                self._ready.notify()
+
+    def flush(self):
+        """ Write the full batches and the current batch now """
+        self._write_batches(everything=True)
+
+    def close(self):
+        """ Write the remaining batches and complete the current file """
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        self._flusher.join()
+        self._write_batches(everything=True)
+        with self._write_lock:
+            self._complete_file()
+
+    def stats(self):
+        return {'news': self.news, 'batches': self.batches, 'dropped': self.dropped, 'files': self.files,
+                'path': self.path}
+
+    def _flush_loop(self):
+        while True:
+            with self._ready:
+                if not self._full_batches and not self._closed:
+                    self._ready.wait(self.flush_interval / 4)
+                if self._closed:
+                    # close() writes the remaining batches
+                    return
+            self._write_batches()
+            with self._write_lock:
+                if self._file is not None and self.rotate_seconds and \
+                        time.monotonic() - self._file_opened >= self.rotate_seconds:
+                    self._complete_file()
+
+    def _write_batches(self, everything=False):
+        """ Write the full batches, and the current batch if everything or once it is flush_interval old """
+        with self._write_lock:
+            with self._lock:
+                batches, self._full_batches = self._full_batches, []
+                if self._batch and (everything or time.monotonic() - self._batch_started >= self.flush_interval):
+                    batches.append(self._batch)
+                    self._batch = []
+            for batch in batches:
+                self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            if self._file is None:
+                self._open_file()
+            self._write_batch(batch)
+            self._sync(self.fsync == 'batch')
+        except Exception as error:
+            # an OSError, or a ValueError like pyarrow.ArrowInvalid for an invalid news, the next batches
+            # are still written
+            self.dropped += len(batch)
+            log.error('Dropped a batch of %d news, cannot write it to %s: %s', len(batch), self.path, error)
+            return
+        self.news += len(batch)
+        self.batches += 1
+        if self.rotate_bytes and self._size() >= self.rotate_bytes:
+            self._complete_file()
+
+    def _complete_file(self):
+        """ Complete the current file, a file which cannot be completed is left as '<name>.part' """
+        try:
+            self._close_file()
+        except Exception as error:
+            log.error('Cannot complete the news file %s: %s', self.path, error)
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                # the next batch is written to a new file
+                self._file = None
+
+    def _open_file(self):
+        self._file_sequence += 1
+        name = f'{self.prefix}-{datetime.now().strftime("%Y%m%d-%H%M%S")}-{self._file_sequence:04d}.{self.extension}'
+        self.path = os.path.join(self.directory, name)
+        self._file = open(self.path + '.part', 'wb')
+        self._file_opened = time.monotonic()
+        try:
+            self._open_writer()
+        except Exception:
+            self._file.close()
+            self._file = None
+            raise
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        self._close_writer()
+        self._file.flush()
+        if self.fsync != 'none':
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self.path + '.part', self.path)
+        self.files += 1
+        log.info('Completed news file %s', self.path)
+
+    def _sync(self, fsync):
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def _size(self):
+        return self._file.tell()
+
+    def _open_writer(self):
+        pass
+
+    def _close_writer(self):
+        pass
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+
+def _json_text(news):
+    """ JSON text of a news, the decompressed data is used as is """
+    if isinstance(news, (bytes, bytearray, memoryview)):
+        return bytes(news).decode('utf-8')
+    return mrn_codec.dumps(news)
+
+
+def _jsonl_lines(batch):
+    # The decompressed news is embedded as is, only the record fields are serialized
+    lines = []
+    for received, item, guid, size, news in batch:
+        header = mrn_codec.dumps({'received': received, 'item': item, 'guid': guid, 'size': size})
+        lines.append(f'{header[:-1]},"news":{_json_text(news)}}}\n')
+    return ''.join(lines).encode('utf-8')
+
+
+class JsonlSink(StorySink):
+    """ One JSON line per news: {"received": epoch seconds, "item", "guid", "size", "news": {...}} """
+    extension = 'jsonl'
+
+    def _write_batch(self, batch):
+        self._file.write(_jsonl_lines(batch))
+
+
+class GzipJsonlSink(StorySink):
+    """ The JSON lines of JsonlSink, gzip compressed, each batch ends with a gzip sync flush """
+    extension = 'jsonl.gz'
+
+    def _open_writer(self):
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode='wb', compresslevel=6)
+
+    def _close_writer(self):
+        self._gzip.close()
+
+    def _write_batch(self, batch):
+        self._gzip.write(_jsonl_lines(batch))
+
+    def _sync(self, fsync):
+        self._gzip.flush()
+        super()._sync(fsync)
+
+
+class ParquetSink(StorySink):
+    """ Columnar news files, one row group per batch, the footer is written when the file is completed """
+    extension = 'parquet'
+
+    def __init__(self, *args, **kwargs):
+        if pyarrow is None:
+            raise ImportError('The pyarrow package is not installed')
+        self._schema = pyarrow.schema([('received', pyarrow.float64()), ('item', pyarrow.string()),
+                                       ('guid', pyarrow.string()), ('size', pyarrow.int64()),
+                                       ('news', pyarrow.string())])
+        self._writer = None
+        super().__init__(*args, **kwargs)
+
+    def _open_writer(self):
+        self._writer = pyarrow.parquet.ParquetWriter(self._file, self._schema, compression='zstd')
+
+    def _close_writer(self):
+        self._writer.close()
+        self._writer = None
+
+    def _write_batch(self, batch):
+        received, items, guids, sizes, news = zip(*batch)
+        table = pyarrow.Table.from_arrays(
+            [pyarrow.array(received, pyarrow.float64()), pyarrow.array(items, pyarrow.string()),
+             pyarrow.array(guids, pyarrow.string()), pyarrow.array(sizes, pyarrow.int64()),
+             pyarrow.array([_json_text(value) for value in news], pyarrow.string())],
+            schema=self._schema)
+        self._writer.write_table(table)
+
+
+SINKS = {'jsonl': JsonlSink, 'jsonl.gz': GzipJsonlSink, 'parquet': ParquetSink}
+
+
+def open_sink(sink_format, **kwargs):
+    """ Create the sink of a SINK_FORMATS format, raises ImportError if parquet is requested without pyarrow """
+    if sink_format not in SINKS:
+        raise ValueError(f'Unknown sink format {sink_format}')
+    return SINKS[sink_format](**kwargs)
@@ -0,0 +1,139 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+""" MRN item streams of one WebSocket connection: a stream ID, envelope store and counters per MRN item """
+
+from mrn_reassembly import NewsEnvelopeStore, DEFAULT_ENVELOPE_TTL, DEFAULT_MAX_ENVELOPES, DEFAULT_MAX_ENVELOPE_BYTES, \
+    DEFAULT_DECOMPRESS_MODE
+from mrn_metrics import Histogram
+
+mrn_domain = 'NewsTextAnalytics'
+MRN_ITEMS = ('MRN_STORY', 'MRN_TRNA', 'MRN_TRNA_DOC', 'MRN_TRSI')
+
+# The Login stream uses ID 1, the MRN item streams use the following IDs
+FIRST_ITEM_STREAM_ID = 2
+
+
+def parse_items(arg):
+    """ MRN item names of a comma separated command line value, ValueError for an unsupported item """
+    items = []
+    for item in arg.split(','):
+        item = item.strip()
+        if item not in MRN_ITEMS:
+            raise ValueError(f'Unsupported MRN item {item}')
+        if item not in items:
+            items.append(item)
+    return items
+
+
+class MRNItemStream:
+    """ One MRN item stream: its own incomplete news envelopes store, counters and latency histograms """
+    __slots__ = ('stream_id', 'item', 'envelopes', 'updates', 'news', 'errors', 'duplicates', 'filtered', 'rejected',
+                 'fragments', 'reassembly_seconds', 'decompress_seconds')
+
+    def __init__(self, stream_id, item, envelopes):
+        self.stream_id = stream_id
+        self.item = item
+        self.envelopes = envelopes
+        # Number of Update messages, completed news, Update messages which could not be decoded
+        # and news dropped because another connection completed them first
+        self.updates = 0
+        self.news = 0
+        self.errors = 0
+        self.duplicates = 0
+        # Number of news dropped by the header filter, and remaining FRAGMENT bytes by GUID of the
+        # rejected news which are not completed yet
+        self.filtered = 0
+        self.rejected = {}
+        # Fragments per completed news, time from the first to the last fragment of the multiple
+        # fragments news and decompression time of the news decompressed on the receiving thread
+        self.fragments = Histogram()
+        self.reassembly_seconds = Histogram()
+        self.decompress_seconds = Histogram()
+
+    def request_json(self, service=None):
+        """ The item request message of this stream """
+        key = {'Name': self.item}
+        if service:
+            key['Service'] = service
+        return {'ID': self.stream_id, 'Domain': mrn_domain, 'Key': key}
+
+    def stats(self):
+        """ Counters of the stream and occupancy of its envelope store """
+        return {
+            'item': self.item,
+            'updates': self.updates,
+            'news': self.news,
+            'errors': self.errors,
+            'duplicates': self.duplicates,
+            'filtered': self.filtered,
+            'envelopes': self.envelopes.stats()
+        }
+
+
+class MRNItemStreams:
+    """
+        The MRN item streams opened on one connection, stream IDs are assigned from FIRST_ITEM_STREAM_ID
+        in the order of items. Messages are routed to their stream with get(message ID).
+    """
+
+    def __init__(self, items, envelope_ttl=DEFAULT_ENVELOPE_TTL, max_envelopes=DEFAULT_MAX_ENVELOPES,
+                 max_envelope_bytes=DEFAULT_MAX_ENVELOPE_BYTES, decompress_mode=DEFAULT_DECOMPRESS_MODE):
+        self._streams = {}
+        for index, item in enumerate(items):
+            stream_id = FIRST_ITEM_STREAM_ID + index
+            self._streams[stream_id] = MRNItemStream(
+                stream_id, item,
+                NewsEnvelopeStore(envelope_ttl, max_envelopes, max_envelope_bytes, decompress_mode))
+
+    def __iter__(self):
+        return iter(self._streams.values())
+
+    def __len__(self):
+        return len(self._streams)
+
+    def get(self, stream_id):
+        """ The stream of a message ID, None for the Login stream or an unknown ID """
+        return self._streams.get(stream_id)
+
+    def stats(self):
+        """ Counters of every stream by item name """
+        return {stream.item: stream.stats() for stream in self._streams.values()}
+
+    def register_metrics(self, registry, **labels):
+        """ Export the counters, histograms and envelope store occupancy of every stream with these labels """
+        for stream in self._streams.values():
+            item_labels = dict(labels, item=stream.item)
+            # the counters are read when the metrics are exported
+            registry.counter('mrn_updates_total', 'MRN Update messages received',
+                             lambda stream=stream: stream.updates, **item_labels)
+            registry.counter('mrn_news_total', 'Completed news', lambda stream=stream: stream.news, **item_labels)
+            registry.counter('mrn_errors_total', 'MRN Update messages which could not be decoded',
+                             lambda stream=stream: stream.errors, **item_labels)
+            registry.counter('mrn_duplicates_total', 'News dropped as duplicates',
+                             lambda stream=stream: stream.duplicates, **item_labels)
+            registry.counter('mrn_filtered_total', 'News dropped by the header filter',
+                             lambda stream=stream: stream.filtered, **item_labels)
+            registry.gauge('mrn_envelopes', 'Incomplete news envelopes',
+                           lambda stream=stream: len(stream.envelopes), **item_labels)
+            registry.gauge('mrn_envelope_bytes', 'Memory held by the incomplete news envelopes',
+                           lambda stream=stream: stream.envelopes.total_bytes, **item_labels)
+            registry.counter('mrn_envelopes_expired_total', 'Incomplete news envelopes removed after the envelope TTL',
+                             lambda stream=stream: stream.envelopes.expired, **item_labels)
+            registry.counter('mrn_envelopes_evicted_total', 'Incomplete news envelopes removed by the store limits',
+                             lambda stream=stream: stream.envelopes.evicted, **item_labels)
+            registry.counter('mrn_fragments_reordered_total', 'Fragments received before the previous fragments of their news',
+                             lambda stream=stream: stream.envelopes.reordered, **item_labels)
+            registry.counter('mrn_fragments_duplicate_total', 'Fragments received again and ignored',
+                             lambda stream=stream: stream.envelopes.duplicates, **item_labels)
+            registry.counter('mrn_fragments_lost_total', 'Fragments of the removed incomplete news envelopes',
+                             lambda stream=stream: stream.envelopes.lost_fragments, **item_labels)
+            registry.add('mrn_fragments_per_news', 'FRAGMENT messages per completed news', stream.fragments, **item_labels)
+            registry.add('mrn_reassembly_seconds', 'Time from the first to the last fragment of a multiple fragments news',
+                         stream.reassembly_seconds, **item_labels)
+            registry.add('mrn_decompress_seconds', 'Decompression time of a completed news', stream.decompress_seconds,
+                         **item_labels)
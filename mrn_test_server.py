@@ -0,0 +1,400 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+
+#!/usr/bin/env python
+"""
+    Local stand-in for the Real-Time Advanced Distribution Server and the RTO WebSocket, authentication
+    and service discovery endpoints. Publishes synthetic MRN data over the tr_json2 WebSocket protocol
+    for load testing the console examples offline.
+"""
+
+import sys
+import time
+import getopt
+import json
+import ssl
+import asyncio
+import secrets
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+import mrn_wsproto as wsproto
+from mrn_generator import MRNGenerator, MRN_ITEMS, mrn_domain, DEFAULT_FRAGMENT_SIZE, DEFAULT_MAX_BODY_SIZE, \
+    DEFAULT_OPEN_STORIES
+
+# Global Default Variables
+hostname = '127.0.0.1'
+port = 15000
+advertise_host = ''
+certfile = ''
+keyfile = ''
+region = 'ap-southeast-1'
+update_rate = 100.0
+pack = 1
+fragment_size = DEFAULT_FRAGMENT_SIZE
+max_body_size = DEFAULT_MAX_BODY_SIZE
+open_stories = DEFAULT_OPEN_STORIES
+ping_interval = 30.0
+disconnect_after = 0.0
+disconnect_mode = 'close'
+token_lifetime = 600
+check_token = True
+stats_interval = 10.0
+seed = None
+
+auth_path = '/auth/oauth2/v2/token'
+discovery_path = '/streaming/pricing/v1/'
+
+# Access tokens issued by the mock authentication endpoint and their expiry time
+issued_tokens = {}
+# Totals of all connections, reported every stats_interval seconds
+stats = {'connections': 0, 'frames': 0, 'messages': 0, 'bytes': 0}
+
+
+def log(text):
+    print(f'{str(datetime.now())} {text}')
+
+
+def token_valid(token):
+    """ Check an access token against the tokens issued by the mock authentication endpoint """
+    if not check_token:
+        return True
+    expiry = issued_tokens.get(token)
+    return expiry is not None and expiry > time.time()
+
+
+class MRNClientConnection:
+    """ One tr_json2 WebSocket client connection: Login, MRN item streams and Ping/Pong """
+
+    def __init__(self, name, reader, writer):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.logged_in = False
+        self.streams = {}
+        self.tasks = []
+        self.last_pong = time.monotonic()
+
+    async def send(self, messages):
+        """ Send a list of messages packed into a single WebSocket text frame """
+        payload = json.dumps(messages, separators=(',', ':')).encode('utf-8')
+        self.writer.write(wsproto.encode_frame(wsproto.OP_TEXT, payload))
+        stats['frames'] += 1
+        stats['messages'] += len(messages)
+        stats['bytes'] += len(payload)
+        await self.writer.drain()
+
+    async def run(self):
+        """ Process the client messages until the connection closes """
+        self.tasks.append(asyncio.create_task(self.ping_loop()))
+        if disconnect_after > 0:
+            self.tasks.append(asyncio.create_task(self.disconnect_later()))
+        try:
+            while True:
+                opcode, payload = await wsproto.read_message(self.reader, self.writer)
+                if opcode == wsproto.OP_CLOSE:
+                    self.writer.write(wsproto.encode_frame(wsproto.OP_CLOSE, payload[:2]))
+                    break
+                for message_json in self.parse(payload):
+                    await self.process_message(message_json)
+        except (asyncio.IncompleteReadError, ConnectionError, wsproto.WebSocketProtocolError) as error:
+            log(f'{self.name}: Connection lost {error!r}')
+        finally:
+            for task in self.tasks + list(self.streams.values()):
+                task.cancel()
+            self.writer.close()
+            log(f'{self.name}: WebSocket Closed')
+
+    @staticmethod
+    def parse(payload):
+        message_json = json.loads(payload)
+        return message_json if isinstance(message_json, list) else [message_json]
+
+    async def process_message(self, message_json):
+        message_type = message_json.get('Type', 'Request')
+        if message_type == 'Pong':
+            self.last_pong = time.monotonic()
+        elif message_type == 'Ping':
+            await self.send([{'Type': 'Pong'}])
+        elif message_type == 'Close':
+            self.close_stream(message_json.get('ID'))
+        elif message_type == 'Request':
+            if message_json.get('Domain') == 'Login':
+                await self.process_login(message_json)
+            else:
+                await self.process_item_request(message_json)
+
+    async def process_login(self, message_json):
+        """ Accept a user name Login (RTDS) or an AuthnToken Login (RTO), initial or reissue """
+        key = message_json.get('Key', {})
+        elements = key.get('Elements', {})
+        if key.get('NameType') == 'AuthnToken':
+            if not token_valid(elements.get('AuthenticationToken')):
+                log(f'{self.name}: Login rejected, invalid AuthenticationToken')
+                await self.send([{
+                    'ID': message_json['ID'], 'Type': 'Status', 'Domain': 'Login',
+                    'Key': {'Name': 'AuthnToken', 'NameType': 'AuthnToken'},
+                    'State': {'Stream': 'Closed', 'Data': 'Suspect', 'Code': 'NotAuthorized',
+                              'Text': 'Authentication token is invalid or expired.'}
+                }])
+                return
+            response_key = {'Name': 'AuthnToken', 'NameType': 'AuthnToken',
+                            'Elements': {'AuthenticationErrorCode': 0,
+                                         'AuthenticationTokenExpiration': int(time.time()) + token_lifetime}}
+        else:
+            response_key = {'Name': key.get('Name', ''), 'Elements': {'ApplicationId': elements.get('ApplicationId', '')}}
+        reissue = self.logged_in
+        self.logged_in = True
+        log(f'{self.name}: Login {"reissue" if reissue else "request"} accepted for {response_key["Name"]}')
+        await self.send([{
+            'ID': message_json['ID'], 'Type': 'Refresh', 'Domain': 'Login', 'Key': response_key,
+            'Elements': {'MaxMsgSize': 61426, 'PingTimeout': int(ping_interval)},
+            'State': {'Stream': 'Open', 'Data': 'Ok', 'Text': 'Login accepted by host mrn_test_server.'}
+        }])
+
+    async def process_item_request(self, message_json):
+        stream_id = message_json['ID']
+        key = message_json.get('Key', {})
+        item = key.get('Name')
+        service = key.get('Service', 'ELEKTRON_DD')
+        status = None
+        if not self.logged_in:
+            status = ('NotEntitled', 'Login has not been accepted.')
+        elif message_json.get('Domain') != mrn_domain or item not in MRN_ITEMS:
+            status = ('NotFound', 'The record could not be found')
+        if status:
+            await self.send([{
+                'ID': stream_id, 'Type': 'Status', 'Domain': message_json.get('Domain', 'MarketPrice'), 'Key': key,
+                'State': {'Stream': 'Closed', 'Data': 'Suspect', 'Code': status[0], 'Text': status[1]}
+            }])
+            return
+        self.close_stream(stream_id)
+        log(f'{self.name}: Item request {item} on stream {stream_id}')
+        now = datetime.now()
+        await self.send([{
+            'ID': stream_id, 'Type': 'Refresh', 'Domain': mrn_domain, 'Key': {'Name': item, 'Service': service},
+            'Fields': {'ACTIV_DATE': now.strftime('%Y-%m-%d'), 'FRAGMENT': None, 'FRAG_NUM': 1, 'GUID': None,
+                       'MRN_SRC': 'HK1_PRD_A', 'MRN_TYPE': item[4:], 'MRN_V_MAJ': '2', 'MRN_V_MIN': '10',
+                       'PROD_PERM': 10001, 'RDN_EXCHD2': 'MRN', 'RECORDTYPE': 30, 'TOT_SIZE': 0},
+            'PermData': 'AwhCEAAc', 'Qos': {'Rate': 'TickByTick', 'Timeliness': 'Realtime'},
+            'State': {'Stream': 'Open', 'Data': 'Ok', 'Text': 'All is well'}
+        }])
+        self.streams[stream_id] = asyncio.create_task(self.publish(stream_id, item))
+
+    def close_stream(self, stream_id):
+        task = self.streams.pop(stream_id, None)
+        if task:
+            task.cancel()
+
+    async def publish(self, stream_id, item):
+        """ Publish Update messages of one MRN item at update_rate messages per second """
+        generator = MRNGenerator(items=[item], stream_ids={item: stream_id}, fragment_size=fragment_size,
+                                 max_body_size=max_body_size, open_stories=open_stories, seed=seed)
+        updates = generator.updates()
+        loop = asyncio.get_running_loop()
+        interval = pack / update_rate if update_rate > 0 else 0
+        next_time = loop.time()
+        try:
+            while True:
+                await self.send([next(updates) for _ in range(pack)])
+                next_time += interval
+                delay = next_time - loop.time()
+                if delay < -1.0:
+                    # Too far behind the requested rate, do not burst to catch up
+                    next_time = loop.time()
+                await asyncio.sleep(max(0, delay))
+        except (ConnectionError, RuntimeError):
+            pass
+
+    async def ping_loop(self):
+        """ Send Ping every ping_interval seconds, drop the connection if Pong does not come back """
+        if ping_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(ping_interval)
+            if time.monotonic() - self.last_pong > ping_interval * 2 + 1:
+                log(f'{self.name}: No Pong received, closing connection')
+                self.writer.close()
+                return
+            await self.send([{'Type': 'Ping'}])
+
+    async def disconnect_later(self):
+        """ Force a disconnect after disconnect_after seconds to exercise the client recovery """
+        await asyncio.sleep(disconnect_after)
+        log(f'{self.name}: Forced disconnect ({disconnect_mode})')
+        if disconnect_mode == 'drop':
+            self.writer.transport.abort()
+        else:
+            self.writer.write(wsproto.encode_frame(wsproto.OP_CLOSE,
+                                                   wsproto.close_payload(wsproto.CLOSE_GOING_AWAY, 'Forced disconnect')))
+            await self.writer.drain()
+            self.writer.close()
+
+
+def http_response(writer, status, body=None, content_type='application/json'):
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    writer.write((f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+                  f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n').encode('latin-1') + payload)
+
+
+def process_auth_request(writer, body):
+    """ Mock Delivery Platform authentication: issue an access token for any client credentials """
+    form = {name: values[0] for name, values in parse_qs(body.decode('utf-8')).items()}
+    if form.get('grant_type') not in ('client_credentials', 'password', 'refresh_token'):
+        http_response(writer, '400 Bad Request', {'error': 'unsupported_grant_type'})
+        return
+    token = secrets.token_urlsafe(32)
+    issued_tokens[token] = time.time() + token_lifetime
+    log(f'Issued access token for client {form.get("client_id", "")}, expires in {token_lifetime} seconds')
+    http_response(writer, '200 OK', {'access_token': token, 'expires_in': token_lifetime,
+                                     'token_type': 'Bearer', 'scope': form.get('scope', '')})
+
+
+def process_discovery_request(writer, headers):
+    """ Mock Delivery Platform service discovery: this server as a multiple and a single location endpoint """
+    token = headers.get('authorization', '')[len('Bearer '):]
+    if not token_valid(token):
+        http_response(writer, '401 Unauthorized', {'error': 'invalid_token'})
+        return
+    endpoint = advertise_host or hostname
+    services = [
+        {'endpoint': endpoint, 'port': port, 'location': [f'{region}a', f'{region}b'],
+         'provider': 'local', 'transport': 'websocket', 'dataFormat': ['tr_json2']},
+        {'endpoint': endpoint, 'port': port, 'location': [f'{region}a'],
+         'provider': 'local', 'transport': 'websocket', 'dataFormat': ['tr_json2']}
+    ]
+    http_response(writer, '200 OK', {'services': services})
+
+
+async def handle_connection(reader, writer):
+    """ Dispatch an incoming connection to the WebSocket, authentication or service discovery handler """
+    peer = writer.get_extra_info('peername')
+    try:
+        request_line, headers = await wsproto.read_http_head(reader)
+        method, target, _ = request_line.split(' ', 2)
+        path = urlsplit(target).path
+        body = await reader.readexactly(int(headers.get('content-length', 0)))
+        if path.rstrip('/') == '/WebSocket' and headers.get('upgrade', '').lower() == 'websocket':
+            protocols = [protocol.strip() for protocol in headers.get('sec-websocket-protocol', '').split(',')]
+            if 'tr_json2' not in protocols:
+                http_response(writer, '400 Bad Request', {'error': 'tr_json2 subprotocol is required'})
+                return
+            writer.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                          f'Sec-WebSocket-Accept: {wsproto.accept_key(headers["sec-websocket-key"])}\r\n'
+                          'Sec-WebSocket-Protocol: tr_json2\r\n\r\n').encode('latin-1'))
+            stats['connections'] += 1
+            name = f'Connection{stats["connections"]}'
+            log(f'{name}: WebSocket connected from {peer}')
+            await MRNClientConnection(name, reader, writer).run()
+            return
+        if method == 'POST' and path == auth_path:
+            process_auth_request(writer, body)
+        elif method == 'GET' and path.rstrip('/') == discovery_path.rstrip('/'):
+            process_discovery_request(writer, headers)
+        else:
+            http_response(writer, '404 Not Found', {'error': f'{path} not found'})
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError, KeyError) as error:
+        log(f'Invalid request from {peer}: {error!r}')
+    finally:
+        writer.close()
+
+
+async def report_stats():
+    """ Print the publishing rate every stats_interval seconds """
+    last = dict(stats)
+    while True:
+        await asyncio.sleep(stats_interval)
+        current = dict(stats)
+        log('Published {:.0f} frames/s, {:.0f} messages/s, {:.0f} KB/s'.format(
+            *((current[name] - last[name]) / stats_interval for name in ('frames', 'messages')),
+            (current['bytes'] - last['bytes']) / stats_interval / 1024))
+        last = current
+
+
+async def serve():
+    ssl_context = None
+    if certfile:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(certfile, keyfile or None)
+    server = await asyncio.start_server(handle_connection, hostname, port, ssl=ssl_context)
+    scheme = 'wss' if ssl_context else 'ws'
+    log(f'MRN test server listening on {scheme}://{hostname}:{port}/WebSocket')
+    log(f'Authentication endpoint {"https" if ssl_context else "http"}://{hostname}:{port}{auth_path}')
+    log(f'Service discovery endpoint {"https" if ssl_context else "http"}://{hostname}:{port}{discovery_path}')
+    if stats_interval > 0:
+        asyncio.create_task(report_stats())
+    async with server:
+        await server.serve_forever()
+
+
+def print_commandline_usage_and_exit(exit_code):
+    print('Usage: mrn_test_server.py [--hostname hostname] [--port port] [--advertise_host hostname] '
+          '[--certfile file] [--keyfile file] [--region region] [--rate messages per second] [--pack messages per frame] '
+          '[--fragment_size bytes] [--max_body_size bytes] [--open_stories count] [--ping_interval seconds] '
+          '[--disconnect_after seconds] [--disconnect_mode close|drop] [--token_lifetime seconds] '
+          '[--no_token_check] [--stats_interval seconds] [--seed seed] [--help]')
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    # Get command line parameters
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", [
+            "help", "hostname=", "port=", "advertise_host=", "certfile=", "keyfile=", "region=",
+            "rate=", "pack=", "fragment_size=", "max_body_size=", "open_stories=", "ping_interval=",
+            "disconnect_after=", "disconnect_mode=", "token_lifetime=", "no_token_check",
+            "stats_interval=", "seed="])
+    except getopt.GetoptError:
+        print_commandline_usage_and_exit(2)
+    for opt, arg in opts:
+        if opt == "--help":
+            print_commandline_usage_and_exit(0)
+        elif opt == "--hostname":
+            hostname = arg
+        elif opt == "--port":
+            port = int(arg)
+        elif opt == "--advertise_host":
+            advertise_host = arg
+        elif opt == "--certfile":
+            certfile = arg
+        elif opt == "--keyfile":
+            keyfile = arg
+        elif opt == "--region":
+            region = arg
+        elif opt == "--rate":
+            update_rate = float(arg)
+        elif opt == "--pack":
+            pack = max(1, int(arg))
+        elif opt == "--fragment_size":
+            fragment_size = int(arg)
+        elif opt == "--max_body_size":
+            max_body_size = int(arg)
+        elif opt == "--open_stories":
+            open_stories = int(arg)
+        elif opt == "--ping_interval":
+            ping_interval = float(arg)
+        elif opt == "--disconnect_after":
+            disconnect_after = float(arg)
+        elif opt == "--disconnect_mode":
+            if arg not in ['close', 'drop']:
+                print('The supported disconnect modes are close or drop only')
+                sys.exit(2)
+            disconnect_mode = arg
+        elif opt == "--token_lifetime":
+            token_lifetime = int(arg)
+        elif opt == "--no_token_check":
+            check_token = False
+        elif opt == "--stats_interval":
+            stats_interval = float(arg)
+        elif opt == "--seed":
+            seed = int(arg)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
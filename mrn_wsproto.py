@@ -0,0 +1,177 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+""" Minimal RFC 6455 WebSocket framing over asyncio streams, used by the local MRN test tools and the asyncio session """
+
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+CLOSE_NORMAL = 1000
+CLOSE_GOING_AWAY = 1001
+CLOSE_MESSAGE_TOO_BIG = 1009
+
+# Largest frame payload, and largest message (the total of its continuation frames), accepted from the peer
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+class WebSocketProtocolError(Exception):
+    """ Raised when the peer sends an invalid WebSocket frame """
+
+
+class MessageTooBigError(WebSocketProtocolError):
+    """ Raised when the peer sends a frame or message larger than the maximum size """
+
+
+def accept_key(key):
+    """ Sec-WebSocket-Accept value for a Sec-WebSocket-Key handshake header """
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def new_key():
+    """ Random Sec-WebSocket-Key for a client handshake """
+    return base64.b64encode(os.urandom(16)).decode('ascii')
+
+
+async def read_http_head(reader):
+    """ Read an HTTP request or response head, returns (start line, lower case headers dict) """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+async def client_connect(host, port, path='/WebSocket', ssl=None, subprotocols=('tr_json2',)):
+    """
+        Open a WebSocket client connection, ssl is an SSLContext for wss:// or None for ws://.
+        Returns (reader, writer) after the handshake, raises WebSocketProtocolError if the server refuses it.
+    """
+    reader, writer = await asyncio.open_connection(host, port, ssl=ssl)
+    key = new_key()
+    request = (f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+               f'Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\nUser-Agent: Python\r\n')
+    if subprotocols:
+        request += f'Sec-WebSocket-Protocol: {", ".join(subprotocols)}\r\n'
+    writer.write((request + '\r\n').encode('latin-1'))
+    try:
+        status_line, headers = await read_http_head(reader)
+        if status_line.split(' ', 2)[1:2] != ['101']:
+            raise WebSocketProtocolError(f'WebSocket handshake refused: {status_line}')
+        if headers.get('sec-websocket-accept') != accept_key(key):
+            raise WebSocketProtocolError('Invalid Sec-WebSocket-Accept handshake header')
+    except BaseException:
+        writer.close()
+        raise
+    return reader, writer
+
+
+def _mask(payload, mask_key):
+    # XOR the payload with the repeated 4 bytes mask using a single big integer operation
+    length = len(payload)
+    if not length:
+        return payload
+    repeated = (mask_key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(length, 'big')
+
+
+def encode_frame(opcode, payload, mask=False):
+    """ Encode a single final WebSocket frame, clients must mask their frames """
+    length = len(payload)
+    first = 0x80 | opcode
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack('!BB', first, mask_bit | length)
+    elif length < 65536:
+        header = struct.pack('!BBH', first, mask_bit | 126, length)
+    else:
+        header = struct.pack('!BBQ', first, mask_bit | 127, length)
+    if mask:
+        mask_key = os.urandom(4)
+        return header + mask_key + _mask(payload, mask_key)
+    return header + payload
+
+
+async def read_frame(reader, max_size=MAX_FRAME_SIZE):
+    """ Read one WebSocket frame, returns (fin, opcode, payload), the payload of a too large frame is not read """
+    first, second = await reader.readexactly(2)
+    fin = bool(first & 0x80)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if length > max_size:
+        raise MessageTooBigError(f'Frame of {length} bytes is larger than {max_size} bytes')
+    mask_key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask_key:
+        payload = _mask(payload, mask_key)
+    return fin, opcode, payload
+
+
+async def read_message(reader, writer, mask=False, max_frame_size=MAX_FRAME_SIZE, max_message_size=MAX_MESSAGE_SIZE):
+    """
+        Read the next complete data message, answering control frames on the way.
+        Returns (opcode, payload), or (OP_CLOSE, payload) when the peer closes the connection.
+        A frame or message larger than the maximum sizes sends a Close frame with code 1009 and raises
+        MessageTooBigError, the caller closes the connection.
+    """
+    try:
+        return await _read_message(reader, writer, mask, max_frame_size, max_message_size)
+    except MessageTooBigError as error:
+        writer.write(encode_frame(OP_CLOSE, close_payload(CLOSE_MESSAGE_TOO_BIG, 'Message too big'), mask))
+        raise error
+
+
+async def _read_message(reader, writer, mask, max_frame_size, max_message_size):
+    message_opcode = None
+    parts = []
+    message_size = 0
+    while True:
+        fin, opcode, payload = await read_frame(reader, max_frame_size)
+        if opcode == OP_PING:
+            writer.write(encode_frame(OP_PONG, payload, mask))
+            continue
+        if opcode == OP_PONG:
+            continue
+        if opcode == OP_CLOSE:
+            return OP_CLOSE, payload
+        if opcode != OP_CONTINUATION:
+            message_opcode = opcode
+            parts = []
+            message_size = 0
+        elif message_opcode is None:
+            raise WebSocketProtocolError('Continuation frame without a message')
+        message_size += len(payload)
+        if message_size > max_message_size:
+            raise MessageTooBigError(f'Message of more than {max_message_size} bytes')
+        parts.append(payload)
+        if fin:
+            return message_opcode, b''.join(parts)
+
+
+def close_payload(code=CLOSE_NORMAL, reason=''):
+    """ Payload of a Close frame """
+    return struct.pack('!H', code) + reason.encode('utf-8')
@@ -0,0 +1,177 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright LSEG 2026. All rights reserved.                       --
+# |-----------------------------------------------------------------------------
+
+""" Tests of the MRN fragment assembly: NewsEnvelope.put, NewsEnvelopeStore.put and discard """
+
+import gzip
+import base64
+import random
+import pytest
+from mrn_reassembly import NewsEnvelopeStore, DECOMPRESS_MODES
+from mrn_decoder import MRNDecoder
+from mrn_filter import HeaderFilter
+
+GUID = 'Abc1234_2026101710000Z'
+MRN_SRC = 'HDC_PRD_A'
+
+# gzip compressed news of random data, so it does not compress into a single fragment
+NEWS = b'{"body": "' + base64.b64encode(random.Random(1).randbytes(6000)) + b'"}'
+COMPRESSED = gzip.compress(NEWS)
+FRAGMENT_SIZE = 1000
+FRAGMENTS = [COMPRESSED[offset:offset + FRAGMENT_SIZE] for offset in range(0, len(COMPRESSED), FRAGMENT_SIZE)]
+
+
+def put(store, frag_num, guid=GUID, now=0.0):
+    """ Store a fragment of the test news, the first fragment carries TOT_SIZE """
+    tot_size = len(COMPRESSED) if frag_num == 1 else None
+    return store.put(guid, MRN_SRC, frag_num, FRAGMENTS[frag_num - 1], tot_size, now)
+
+
+def fields(frag_num, mrn_src=MRN_SRC):
+    """ Header fields of an Update message carrying a fragment of the test news """
+    fields_data = {'GUID': GUID, 'MRN_SRC': mrn_src, 'FRAG_NUM': frag_num,
+                   'FRAGMENT': base64.b64encode(FRAGMENTS[frag_num - 1]).decode('ascii')}
+    if frag_num == 1:
+        fields_data['TOT_SIZE'] = len(COMPRESSED)
+    return fields_data
+
+
+@pytest.mark.parametrize('decompress_mode', DECOMPRESS_MODES)
+@pytest.mark.parametrize('seed', range(5))
+def test_shuffled_fragments(decompress_mode, seed):
+    assert len(FRAGMENTS) > 3
+    store = NewsEnvelopeStore(decompress_mode=decompress_mode)
+    order = list(range(1, len(FRAGMENTS) + 1))
+    random.Random(seed).shuffle(order)
+    for frag_num in order[:-1]:
+        envelope, removed = put(store, frag_num)
+        assert envelope is not None and not envelope.complete
+        assert removed == 0
+    envelope, _ = put(store, order[-1])
+    assert envelope.complete
+    assert not envelope.slots and envelope.slots_size == 0
+    assert envelope.frag_num == len(FRAGMENTS)
+    assert envelope.decompress() == NEWS
+    # a fragment is written on arrival only when all the previous fragments were received before it
+    assert store.reordered == sum(1 for index, frag_num in enumerate(order)
+                                  if not set(range(1, frag_num)) <= set(order[:index]))
+
+
+def test_reversed_fragments_wait_in_slots():
+    store = NewsEnvelopeStore()
+    for frag_num in range(len(FRAGMENTS), 1, -1):
+        envelope, _ = put(store, frag_num)
+    assert envelope.tot_size is None and envelope.size == 0
+    assert envelope.slots_size == sum(len(fragment) for fragment in FRAGMENTS[1:])
+    assert store.total_bytes == envelope.footprint
+    envelope, _ = put(store, 1)
+    assert envelope.complete and envelope.decompress() == NEWS
+    assert store.reordered == len(FRAGMENTS) - 1
+
+
+def test_duplicate_fragments():
+    store = NewsEnvelopeStore()
+    # a copy of a fragment waiting in its slot, then of a fragment already written
+    assert put(store, 3)[0] is not None
+    assert put(store, 3) == (None, 0)
+    assert put(store, 1)[0] is not None
+    assert put(store, 1) == (None, 0)
+    assert store.duplicates == 2
+    for frag_num in range(2, len(FRAGMENTS) + 1):
+        if frag_num != 3:
+            envelope, _ = put(store, frag_num)
+    assert envelope.complete and envelope.decompress() == NEWS
+    store.remove(envelope)
+    assert len(store) == 0 and store.total_bytes == 0
+    # a late copy of a completed news does not start a new envelope
+    assert put(store, 2) == (None, 0)
+    assert len(store) == 0
+    assert store.duplicates == 3
+
+
+def test_filter_reject_after_next_fragments():
+    # the fragments 2 and 3 are received before FRAG_NUM 1, which the header filter rejects
+    decoder = MRNDecoder(['MRN_STORY'], news_filter=HeaderFilter('MRN_SRC!=' + MRN_SRC))
+    stream = next(iter(decoder.item_streams))
+    store = stream.envelopes
+    assert decoder.assemble(stream, fields(2)) is None
+    assert decoder.assemble(stream, fields(3)) is None
+    assert len(store) == 1
+    assert decoder.assemble(stream, fields(1)) is None
+    assert stream.filtered == 1
+    # the waiting fragments are dropped with the envelope
+    assert len(store) == 0 and store.total_bytes == 0
+    assert stream.rejected[GUID] == sum(len(fragment) for fragment in FRAGMENTS[3:])
+    for frag_num in range(4, len(FRAGMENTS) + 1):
+        assert decoder.assemble(stream, fields(frag_num)) is None
+    # the rejected news is forgotten with its last fragment
+    assert GUID not in stream.rejected
+    # a late copy of a fragment received before FRAG_NUM 1 does not start a new envelope
+    assert decoder.assemble(stream, fields(2)) is None
+    assert len(store) == 0
+    assert stream.news == 0 and stream.errors == 0
+
+
+def test_discard():
+    store = NewsEnvelopeStore()
+    put(store, 2)
+    put(store, 3)
+    envelope = store.discard(GUID, MRN_SRC)
+    assert envelope is not None and len(envelope.slots) == 2
+    assert len(store) == 0 and store.total_bytes == 0
+    assert store.discard(GUID, MRN_SRC) is None
+    assert put(store, 4) == (None, 0)
+    assert len(store) == 0
+
+
+def test_ttl_expiry_counts_lost_fragments():
+    store = NewsEnvelopeStore(ttl=10.0)
+    # one fragment written and two waiting in their slots
+    put(store, 1, now=0.0)
+    put(store, 3, now=1.0)
+    put(store, 4, now=2.0)
+    assert store.get(GUID, MRN_SRC, now=11.0) is not None
+    # another news received after the TTL of the first one
+    envelope, removed = put(store, 1, guid='Other_GUID', now=12.5)
+    assert envelope.guid == 'Other_GUID'
+    assert removed == 1
+    assert store.expired == 1 and store.evicted == 0
+    assert store.lost_fragments == 3
+    assert store.get(GUID, MRN_SRC, now=12.5) is None
+    assert len(store) == 1 and store.total_bytes == envelope.footprint
+    # an expired news is not completed, its next fragments start a new envelope
+    envelope, _ = put(store, 2, now=13.0)
+    assert envelope is not None and envelope.slots.keys() == {2}
+
+
+def test_expiry_on_get():
+    store = NewsEnvelopeStore(ttl=10.0)
+    put(store, 2, now=0.0)
+    assert store.get(GUID, MRN_SRC, now=10.5) is None
+    assert store.expired == 1 and store.lost_fragments == 1
+    assert len(store) == 0 and store.total_bytes == 0
+
+
+def test_completed_memory_drops_late_copies():
+    store = NewsEnvelopeStore(max_envelopes=2)
+    assert store.max_completed == 2
+    for frag_num in range(1, len(FRAGMENTS) + 1):
+        envelope, _ = put(store, frag_num)
+    store.remove(envelope)
+    assert store.complete('Single_1', MRN_SRC)
+    assert not store.complete('Single_1', MRN_SRC)
+    # the late copies of the completed news are dropped
+    assert put(store, len(FRAGMENTS)) == (None, 0)
+    assert put(store, 1) == (None, 0)
+    assert store.duplicates == 3
+    assert len(store) == 0
+    # the memory of the completed news is bounded, the oldest is forgotten
+    assert store.complete('Single_2', MRN_SRC)
+    assert GUID not in {guid for guid, _ in store._completed}
+    assert len(store._completed) == 2
+    envelope, _ = put(store, 1)
+    assert envelope is not None and len(store) == 1